@@ -1,9 +1,23 @@
 class Token:
-    def __init__(self, type, value, line):
+    __slots__ = ("type", "value", "line", "column")
+
+    def __init__(self, type, value, line, column=None):
         self.type = type
         self.value = value
         self.line = line
+        self.column = column  # 1-based, usado apenas em diagnósticos
     
     def __repr__(self):
         return f"Token(type='{self.type}', value='{self.value}', line={self.line})"
     
+
+# Tipos de token internados como inteiros pequenos (usados pelo TokenStream)
+TOKEN_TYPES = (
+    "IF", "ELSE", "WHILE", "BREAK", "CONTINUE", "CONST", "VARIABLE",
+    "INT", "BOOL", "TRUE", "FALSE", "FUNCTION", "RETURN", "PRINT",
+    "COLON", "EQUAL", "DIFFERENT", "GREATER_OR_EQUAL", "LESS_OR_EQUAL",
+    "PLUS", "MINUS", "MULTIPLY", "DIVIDE", "ASSIGN", "COMMA", "SEMICOLON",
+    "LPAREN", "RPAREN", "GREATER", "LESS", "LBRACE", "RBRACE",
+    "IDENTIFIER", "INTEGER", "NOT", "EOF",
+)
+TOKEN_KIND = {type: kind for kind, type in enumerate(TOKEN_TYPES)}
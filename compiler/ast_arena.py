@@ -0,0 +1,371 @@
+# ast_arena.py
+
+from array import array
+from typing import List, Optional
+from parser import (
+    Parser, ASTNode, Program, VarDecl, FuncDecl, Block, Assignment, IfStatement,
+    WhileStatement, ReturnStatement, BreakStatement, ContinueStatement,
+    PrintStatement, BinaryOp, UnaryOp, Literal, Identifier, FuncCall
+)
+
+NODE_CLASSES = (
+    Program, VarDecl, FuncDecl, Block, Assignment, IfStatement,
+    WhileStatement, ReturnStatement, BreakStatement, ContinueStatement,
+    PrintStatement, BinaryOp, UnaryOp, Literal, Identifier, FuncCall,
+)
+NODE_KIND = {cls: kind for kind, cls in enumerate(NODE_CLASSES)}
+
+OPERATORS = (
+    "PLUS", "MINUS", "MULTIPLY", "DIVIDE", "EQUAL", "DIFFERENT",
+    "GREATER", "GREATER_OR_EQUAL", "LESS", "LESS_OR_EQUAL", "NOT",
+)
+OPERATOR_CODE = {operator: code for code, operator in enumerate(OPERATORS)}
+TYPES = ("INT", "BOOL", "Unit")
+TYPE_CODE = {type: code for code, type in enumerate(TYPES)}
+
+NONE = -1
+
+# Intervalo de `data` (array "q")
+DATA_MIN = -(1 << 63)
+DATA_MAX = (1 << 63) - 1
+
+
+def child_nodes(node: ASTNode) -> list:
+    if isinstance(node, (Program, Block)):
+        return node.declarations
+    if isinstance(node, FuncCall):
+        return node.args
+    if isinstance(node, VarDecl):
+        return [node.initializer]
+    if isinstance(node, FuncDecl):
+        return [node.body]
+    if isinstance(node, (Assignment, ReturnStatement, PrintStatement)):
+        return [node.value]
+    if isinstance(node, IfStatement):
+        return [node.condition, node.then_branch, node.else_branch]
+    if isinstance(node, WhileStatement):
+        return [node.condition, node.body]
+    if isinstance(node, BinaryOp):
+        return [node.left, node.right]
+    if isinstance(node, UnaryOp):
+        return [node.operand]
+    return []
+
+
+class ASTArena:
+    # AST em estrutura de arrays: cada nó é um índice, e tipo do nó, linha,
+    # operador e filhos ficam em arrays tipados paralelos. Os campos usados
+    # por cada tipo de nó:
+    #
+    #   Program, Block     first/second = início/tamanho em `lists`
+    #   FuncCall           data = nome; first/second = argumentos em `lists`
+    #   VarDecl            data = nome; op = tipo; first = inicializador; second = is_const
+    #   FuncDecl           data = nome; op = tipo de retorno; first = corpo; second = índice em `params`
+    #   Assignment         data = nome; first = valor
+    #   IfStatement        first = condição; second = then; third = else (ou NONE)
+    #   WhileStatement     first = condição; second = corpo
+    #   Return/Print       first = valor
+    #   BinaryOp           op = operador; first/second = esquerda/direita
+    #   UnaryOp            op = operador; first = operando
+    #   Literal            data = valor; op = 1 se for Bool
+    #   Identifier         data = nome
+    #
+    # Nomes ficam internados em `names`; linha (ou coluna) 0 representa
+    # "sem linha". As anotações (símbolo, escopo e tipo) que a árvore de
+    # objetos já tiver são copiadas.
+    def __init__(self):
+        self.kinds = array("B")
+        self.lines = array("I")
+        self.columns = array("I")
+        self.ops = array("B")
+        self.first = array("i")
+        self.second = array("i")
+        self.third = array("i")
+        self.data = array("q")
+        self.lists = array("i")
+        self.names: List[str] = []
+        self.name_codes = {}
+        self.params: List[list] = []
+        # Anotações, uma posição por nó (None se o nó não tiver): listas
+        # custam 8 bytes por nó, menos que um dicionário com chaves int
+        self.symbols: list = []  # Symbol anotado pelo Parser ou pelo Resolver
+        self.scopes: list = []   # Scope (Program, FuncDecl e Block)
+        self.types: list = []    # Type calculado para a expressão
+        self.large_literals = {}  # índice do nó -> literal inteiro fora de int64
+        self.root = NONE
+
+    @classmethod
+    def from_program(cls, program: Program) -> "ASTArena":
+        arena = cls()
+        arena.root = arena.add(program)
+        return arena
+
+    @classmethod
+    def from_parser(cls, parser: Parser) -> "ASTArena":
+        # Como Parser.parse, mas cada declaração de nível superior vai para a
+        # arena assim que termina e seus objetos são descartados: o pico de
+        # memória é a arena mais uma declaração, não a árvore inteira de
+        # objetos mais a arena. Os nomes resolvidos pelo parser são mantidos.
+        arena = cls()
+        declarations = []
+        line = column = None
+        while not parser.is_at_end():
+            decl = parser.top_level_declaration()
+            if decl is not None:
+                if not declarations:
+                    line, column = decl.line, decl.column
+                declarations.append(arena.add(decl))
+        program = Program([], line=line, column=column)
+        program.scope = parser.symbols.root
+        arena.root = arena.store(program, declarations)
+        return arena
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def intern(self, name: str) -> int:
+        code = self.name_codes.get(name)
+        if code is None:
+            code = self.name_codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def add(self, root: ASTNode) -> int:
+        # Conversão em pós-ordem com pilha explícita: os filhos são gravados
+        # antes do pai, e listas de filhos ficam contíguas em `lists`.
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, ready = stack.pop()
+            if node is None:
+                results.append(NONE)
+                continue
+            children = child_nodes(node)
+            if not ready:
+                stack.append((node, True))
+                for child in reversed(children):
+                    stack.append((child, False))
+                continue
+            split = len(results) - len(children)
+            indices = results[split:]
+            del results[split:]
+            results.append(self.store(node, indices))
+        return results[0]
+
+    def store(self, node: ASTNode, children: List[int]) -> int:
+        op = first = second = third = NONE
+        data = 0
+        if isinstance(node, (Program, Block, FuncCall)):
+            first, second = len(self.lists), len(children)
+            self.lists.extend(children)
+            if isinstance(node, FuncCall):
+                data = self.intern(node.name)
+        elif isinstance(node, BinaryOp):
+            op = OPERATOR_CODE[node.operator]
+            first, second = children
+        elif isinstance(node, UnaryOp):
+            op = OPERATOR_CODE[node.operator]
+            first, = children
+        elif isinstance(node, Literal):
+            op = 1 if isinstance(node.value, bool) else 0
+            data = int(node.value)
+            if not DATA_MIN <= data <= DATA_MAX:
+                # Não cabe em `data` (é um erro da análise semântica, que
+                # precisa ver o valor para reportá-lo)
+                self.large_literals[len(self.kinds)] = data
+                data = 0
+        elif isinstance(node, Identifier):
+            data = self.intern(node.name)
+        elif isinstance(node, VarDecl):
+            data = self.intern(node.name)
+            op = TYPE_CODE[node.var_type]
+            first, = children
+            second = int(node.is_const)
+        elif isinstance(node, FuncDecl):
+            data = self.intern(node.name)
+            op = TYPE_CODE[node.return_type]
+            first, = children
+            second = len(self.params)
+            self.params.append(node.params)
+        elif isinstance(node, Assignment):
+            data = self.intern(node.name)
+            first, = children
+        elif isinstance(node, IfStatement):
+            first, second, third = children
+        elif isinstance(node, WhileStatement):
+            first, second = children
+        elif isinstance(node, (ReturnStatement, PrintStatement)):
+            first, = children
+
+        index = len(self.kinds)
+        self.kinds.append(NODE_KIND[type(node)])
+        self.lines.append(node.line or 0)
+        self.columns.append(node.column or 0)
+        self.ops.append(op if op != NONE else 0)
+        self.first.append(first)
+        self.second.append(second)
+        self.third.append(third)
+        self.data.append(data)
+        symbol = getattr(node, "symbol", None)
+        self.symbols.append(symbol)
+        if symbol is not None and symbol.node is node:
+            symbol.node = self.view(index)  # não prende a árvore de objetos
+        self.scopes.append(getattr(node, "scope", None))
+        self.types.append(getattr(node, "type", None))
+        return index
+
+    # API de visualização: cada nó é lido através de uma view leve que é uma
+    # subclasse da classe original da AST, então SemanticAnalyzer e
+    # CodeGenerator percorrem a arena como se fosse a árvore de objetos.
+    def view(self, index: int) -> Optional[ASTNode]:
+        if index == NONE:
+            return None
+        return VIEW_CLASSES[self.kinds[index]](self, index)
+
+    def program(self) -> Program:
+        return self.view(self.root)
+
+    def child_list(self, index: int) -> list:
+        start = self.first[index]
+        return [self.view(child) for child in self.lists[start:start + self.second[index]]]
+
+
+def view_init(self, arena: ASTArena, index: int):
+    self.arena = arena
+    self.index = index
+
+
+def view_line(self):
+    return self.arena.lines[self.index] or None
+
+
+def view_column(self):
+    return self.arena.columns[self.index] or None
+
+
+def view_field(array_name: str):
+    return property(lambda self: self.arena.view(getattr(self.arena, array_name)[self.index]))
+
+
+def view_name(self):
+    return self.arena.names[self.arena.data[self.index]]
+
+
+def view_children(self):
+    return self.arena.child_list(self.index)
+
+
+def set_view_children(self, nodes: list):
+    # Nova lista no fim de `lists` (ex.: a poda de código inalcançável)
+    arena, index = self.arena, self.index
+    arena.first[index] = len(arena.lists)
+    arena.second[index] = len(nodes)
+    arena.lists.extend(node.index for node in nodes)
+
+
+def view_literal(self):
+    arena, index = self.arena, self.index
+    value = arena.data[index]
+    if arena.ops[index]:
+        return bool(value)
+    return arena.large_literals.get(index, value) if value == 0 else value
+
+
+def view_annotation(table_name: str):
+    def get(self):
+        return getattr(self.arena, table_name)[self.index]
+
+    def set(self, value):
+        getattr(self.arena, table_name)[self.index] = value
+
+    return property(get, set)
+
+
+def make_view(base, **fields):
+    namespace = {"__slots__": ("arena", "index"), "__init__": view_init, "line": property(view_line),
+                 "column": property(view_column)}
+    for name, field in fields.items():
+        namespace[name] = field if isinstance(field, property) else property(field)
+    return type(f"{base.__name__}View", (base,), namespace)
+
+
+VIEW_CLASSES = (
+    make_view(Program, declarations=property(view_children, set_view_children), scope=view_annotation("scopes")),
+    make_view(
+        VarDecl, name=view_name, initializer=view_field("first"),
+        symbol=view_annotation("symbols"),
+        var_type=lambda self: TYPES[self.arena.ops[self.index]],
+        is_const=lambda self: bool(self.arena.second[self.index]),
+    ),
+    make_view(
+        FuncDecl, name=view_name, body=view_field("first"),
+        symbol=view_annotation("symbols"), scope=view_annotation("scopes"),
+        return_type=lambda self: TYPES[self.arena.ops[self.index]],
+        params=lambda self: self.arena.params[self.arena.second[self.index]],
+    ),
+    make_view(Block, declarations=property(view_children, set_view_children), scope=view_annotation("scopes")),
+    make_view(Assignment, name=view_name, value=view_field("first"), symbol=view_annotation("symbols")),
+    make_view(
+        IfStatement, condition=view_field("first"),
+        then_branch=view_field("second"), else_branch=view_field("third"),
+    ),
+    make_view(WhileStatement, condition=view_field("first"), body=view_field("second")),
+    make_view(ReturnStatement, value=view_field("first")),
+    make_view(BreakStatement),
+    make_view(ContinueStatement),
+    make_view(PrintStatement, value=view_field("first")),
+    make_view(
+        BinaryOp, left=view_field("first"), right=view_field("second"), type=view_annotation("types"),
+        operator=lambda self: OPERATORS[self.arena.ops[self.index]],
+    ),
+    make_view(
+        UnaryOp, operand=view_field("first"), type=view_annotation("types"),
+        operator=lambda self: OPERATORS[self.arena.ops[self.index]],
+    ),
+    make_view(Literal, value=view_literal, type=view_annotation("types")),
+    make_view(Identifier, name=view_name, symbol=view_annotation("symbols"), type=view_annotation("types")),
+    make_view(
+        FuncCall, name=view_name, args=view_children,
+        symbol=view_annotation("symbols"), type=view_annotation("types"),
+    ),
+)
+
+
+if __name__ == "__main__":
+    # Comparação de memória em um programa sintético grande
+    import tracemalloc
+    from lexer import Lexer
+
+    functions = []
+    for i in range(5000):
+        functions.append(
+            f"fun f{i}(a : Int, b : Int) : Int {{\n"
+            f"    val x : Int = (a + {i}) * (b - 2) / 3;\n"
+            f"    while (x > 0) {{\n"
+            f"        if (x == a + b) {{ x = x - 1; }} else {{ x = x - 2; }}\n"
+            f"    }}\n"
+            f"    print(-x + a * b);\n"
+            f"    return x;\n"
+            f"}}\n"
+        )
+    code = "".join(functions)
+
+    # Cada forma a partir do mesmo TokenStream (novo a cada medida): memória
+    # retida pela árvore (com a tabela de símbolos do parser) e pico durante
+    # a análise sintática
+    results = {}
+    for name, build in (("objetos", lambda parser: parser.parse()),
+                        ("arena", lambda parser: ASTArena.from_parser(parser))):
+        parser = Parser(Lexer(code).token_stream())
+        tracemalloc.start()
+        tree = build(parser)
+        results[name] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if name == "arena":
+            nodes = len(tree)
+        del tree, parser
+
+    print(f"nós: {nodes}")
+    for name, (retained, peak) in results.items():
+        print(f"AST de {name:<8} {retained / 1024:>7.0f} KiB retidos ({retained / nodes:.1f} bytes/nó), "
+              f"pico de {peak / 1024:.0f} KiB")
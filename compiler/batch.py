@@ -0,0 +1,224 @@
+# batch.py
+
+# Compila muitos arquivos .kt de uma vez, distribuindo o trabalho entre
+# processos. Uso: python batch.py ENTRADAS... [-o DIR] [-j N] [--chunk N] [-O]
+#
+# Cada entrada é um arquivo, um diretório (todos os .kt dentro dele, em
+# qualquer nível) ou um padrão glob ("submissoes/**/*.kt"). Para cada
+# arquivo são gravados o código intermediário (.ir) e os diagnósticos em
+# JSON (.json), ao lado do fonte ou em DIR, preservando os subdiretórios.
+# Ao final, um resumo agregado vai para a saída padrão; o código de saída é
+# 1 se algum arquivo teve erro.
+#
+# Com --cache DIR, arquivos já compilados (mesmo conteúdo, versão do
+# compilador e opções) vêm do cache em disco sem passar pelas fases.
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from code_generator import CodeGenerator
+from ir import format_module
+from constant_folding import fold_constants
+from inlining import optimize_calls
+from dead_code import prune_unreachable, eliminate_dead_code
+from loops import optimize_loops
+from liveness import allocate_temps
+from diagnostics import Diagnostics
+from cache import CompilationCache, CacheStats, DEFAULT_MAX_BYTES
+
+# Arquivos por tarefa enviada a um processo: tarefas grandes diluem o custo
+# de comunicação, tarefas pequenas equilibram melhor a carga no fim
+MAX_CHUNK = 64
+
+
+def expand_inputs(inputs: List[str]) -> List[str]:
+    # Arquivos .kt das entradas, sem repetição e na ordem em que aparecem
+    found: Dict[str, None] = {}
+    for entry in inputs:
+        if os.path.isdir(entry):
+            matches = sorted(glob.glob(os.path.join(glob.escape(entry), "**", "*.kt"), recursive=True))
+        elif glob.has_magic(entry):
+            matches = sorted(glob.glob(entry, recursive=True))
+        else:
+            matches = [entry]
+        for path in matches:
+            found.setdefault(os.path.normpath(path), None)
+    return list(found)
+
+
+def output_base(path: str, root: Optional[str], output_dir: Optional[str]) -> str:
+    # Caminho de saída sem extensão: ao lado do fonte ou, com -o, no mesmo
+    # caminho relativo dentro de output_dir
+    stem = os.path.splitext(path)[0]
+    if output_dir is None:
+        return stem
+    return os.path.join(output_dir, os.path.relpath(stem, root))
+
+
+def optimize(module):
+    # As mesmas passadas de main.py -O (sem os relatórios)
+    fold_constants(module)
+    optimize_calls(module)
+    fold_constants(module)
+    eliminate_dead_code(module)
+    optimize_loops(module)
+    allocate_temps(module)
+
+
+def compile_source(code: str, optimize_code: bool):
+    # Todas as fases. Devolve as saídas (o que o cache guarda) e os
+    # artefatos intermediários, para quem compila sem cache (o servidor).
+    diagnostics = Diagnostics()
+    tokens = Lexer(code, diagnostics).token_stream()
+    ast = Parser(tokens, diagnostics).parse()
+    SemanticAnalyzer(diagnostics).analyze(ast)
+    outputs = {"diagnostics": diagnostics, "ir": None, "instructions": 0}
+    artifacts = {"tokens": tokens, "ast": ast}
+    if diagnostics.has_errors():
+        return outputs, artifacts
+    prune_unreachable(ast, diagnostics)
+    module = CodeGenerator().generate(ast)
+    if optimize_code:
+        optimize(module)
+    outputs["instructions"] = module.instruction_count()
+    outputs["ir"] = format_module(module)
+    return outputs, artifacts
+
+
+def compile_file(path: str, base: str, optimize_code: bool, cache: Optional[CompilationCache] = None) -> dict:
+    # Compila um arquivo e grava as saídas. Nunca lança: qualquer falha vira
+    # o campo "failure" do resultado, para não derrubar o lote inteiro.
+    start = time.perf_counter()
+    result = {"file": path, "errors": 0, "warnings": 0, "instructions": 0, "failure": None, "cached": False}
+    try:
+        with open(path, 'r') as file:
+            code = file.read()
+        outputs = None
+        if cache is not None:
+            key = cache.key(code, {"optimize": optimize_code})
+            outputs = cache.get(key)
+            result["cached"] = outputs is not None
+        if outputs is None:
+            outputs, _ = compile_source(code, optimize_code)
+            if cache is not None:
+                cache.put(key, outputs)
+        diagnostics = outputs["diagnostics"]
+        directory = os.path.dirname(base)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(base + ".json", 'w') as file:
+            file.write(diagnostics.to_json(file=path) + "\n")
+        result["errors"] = len(diagnostics.errors)
+        result["warnings"] = len(diagnostics) - result["errors"]
+        if outputs["ir"] is not None:
+            result["instructions"] = outputs["instructions"]
+            with open(base + ".ir", 'w') as file:
+                file.write(outputs["ir"])
+    except Exception as error:  # inclusive RecursionError em programas muito aninhados
+        result["failure"] = f"{type(error).__name__}: {error}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def compile_chunk(task):
+    paths, bases, optimize_code, cache_dir, cache_bytes = task
+    cache = CompilationCache(cache_dir, cache_bytes) if cache_dir else None
+    results = [compile_file(path, base, optimize_code, cache) for path, base in zip(paths, bases)]
+    return results, cache.stats if cache is not None else None
+
+
+def chunk_size(files: int, jobs: int) -> int:
+    # Umas quatro tarefas por processo
+    return max(1, min(MAX_CHUNK, files // (jobs * 4)))
+
+
+def run_batch(paths: List[str], output_dir: Optional[str] = None, jobs: int = None, chunk: int = None,
+              optimize_code: bool = False, cache_dir: Optional[str] = None,
+              cache_stats: Optional[CacheStats] = None, cache_bytes: int = DEFAULT_MAX_BYTES) -> List[dict]:
+    # Resultados na ordem dos arquivos. Com um único processo (ou um único
+    # arquivo) tudo roda aqui mesmo, sem o custo de iniciar o pool. As
+    # estatísticas do cache de cada tarefa são somadas em cache_stats; cada
+    # tarefa mantém o cache abaixo de cache_bytes enquanto grava.
+    jobs = jobs or os.cpu_count() or 1
+    chunk = chunk or chunk_size(len(paths), jobs)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if output_dir else None
+    bases = [output_base(path, root, output_dir) for path in paths]
+    tasks = [(paths[index:index + chunk], bases[index:index + chunk], optimize_code, cache_dir, cache_bytes)
+             for index in range(0, len(paths), chunk)]
+    results = []
+
+    def collect(chunks):
+        for chunk_results, stats in chunks:
+            results.extend(chunk_results)
+            if stats is not None and cache_stats is not None:
+                cache_stats.merge(stats)
+
+    if jobs == 1 or len(tasks) <= 1:
+        collect(map(compile_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            collect(executor.map(compile_chunk, tasks))
+    return results
+
+
+def summarize(results: List[dict], elapsed: float, jobs: int) -> List[str]:
+    failed = [result for result in results if result["errors"] or result["failure"]]
+    lines = []
+    for result in failed:
+        reason = result["failure"] or f"{result['errors']} erro(s)"
+        lines.append(f"FALHOU {result['file']}: {reason}")
+    compiled = len(results) - len(failed)
+    cpu = sum(result["seconds"] for result in results)
+    lines.append(f"{len(results)} arquivos: {compiled} compilados, {len(failed)} com erro, "
+                 f"{sum(result['warnings'] for result in results)} avisos, "
+                 f"{sum(result['instructions'] for result in results)} instruções geradas.")
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    lines.append(f"Tempo: {elapsed:.2f} s com {jobs} processos ({rate:.1f} arquivos/s; "
+                 f"{cpu:.2f} s somando os arquivos).")
+    return lines
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compila arquivos .kt em lote, em paralelo.")
+    arg_parser.add_argument('entradas', nargs='+', help="arquivos, diretórios ou padrões glob")
+    arg_parser.add_argument('-o', '--output-dir', metavar='DIR',
+                            help="diretório das saídas (padrão: ao lado de cada fonte)")
+    arg_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                            help="processos (padrão: número de CPUs)")
+    arg_parser.add_argument('--chunk', type=int, help="arquivos por tarefa (padrão: automático)")
+    arg_parser.add_argument('-O', '--optimize', action='store_true', help="otimiza o código intermediário")
+    arg_parser.add_argument('--cache', metavar='DIR', help="cache de compilação em disco")
+    arg_parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), metavar='MB',
+                            help="tamanho máximo do cache (padrão: %(default)s MB)")
+    args = arg_parser.parse_args(argv)
+
+    paths = expand_inputs(args.entradas)
+    if not paths:
+        print("Nenhum arquivo .kt encontrado.", file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    stats = CacheStats()
+    cache_bytes = args.cache_size * 1024 * 1024
+    results = run_batch(paths, args.output_dir, args.jobs, args.chunk, args.optimize, args.cache, stats,
+                        cache_bytes)
+    if args.cache:
+        # Acerto final: as tarefas podam pelo que cada uma sabe do diretório
+        cache = CompilationCache(args.cache, cache_bytes)
+        cache.prune()
+        stats.merge(cache.stats)
+    for line in summarize(results, time.perf_counter() - start, args.jobs):
+        print(line)
+    if args.cache:
+        print(stats)
+    return 1 if any(result["errors"] or result["failure"] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# benchmark.py
+
+# Mede a vazão da máquina virtual em programas dominados por laços e
+# chamadas. Uso: python benchmark.py [--repeat N]
+#
+# Cada programa é compilado sem e com as otimizações de -O; a tabela mostra
+# o tempo de execução (o melhor de N), as instruções executadas e a vazão.
+# As duas últimas colunas são o tempo do mesmo programa no backend Python e
+# no executável gerado pelo backend C com cc -O2 (compilação não incluída;
+# o tempo inclui o início do processo). Sem compilador C, a coluna fica vazia.
+
+import argparse
+import io
+import os
+import subprocess
+import tempfile
+import time
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from code_generator import CodeGenerator
+from constant_folding import fold_constants
+from inlining import optimize_calls
+from loops import optimize_loops
+from dead_code import eliminate_dead_code
+from liveness import allocate_temps
+from bytecode import compile_module
+from vm import run
+import python_generator
+from python_generator import PythonGenerator
+from c_generator import CGenerator, CBackendError, compile_c, find_compiler
+
+PROGRAMS = {
+    "nested_loops": """
+val total : Int = 0;
+val i : Int = 0;
+while (i < 300) {
+    val j : Int = 0;
+    while (j < 300) {
+        total = total + i * j - (i / (j + 1));
+        j = j + 1;
+    }
+    i = i + 1;
+}
+print(total);
+""",
+    "collatz": """
+val n : Int = 1;
+val longest : Int = 0;
+while (n < 3000) {
+    val x : Int = n;
+    val steps : Int = 0;
+    while (x != 1) {
+        if (x / 2 * 2 == x) { x = x / 2; } else { x = 3 * x + 1; }
+        steps = steps + 1;
+    }
+    if (steps > longest) { longest = steps; }
+    n = n + 1;
+}
+print(longest);
+""",
+    "fib_recursive": """
+fun fib(n : Int) : Int {
+    if (n < 2) { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+print(fib(22));
+""",
+    "closure_loop": """
+val acc : Int = 0;
+fun step(k : Int) : Int {
+    acc = acc + k * 3 + 1;
+    return acc;
+}
+val i : Int = 0;
+while (i < 50000) {
+    step(i);
+    i = i + 1;
+}
+print(acc);
+""",
+    "loop_invariant": """
+val a : Int = 7;
+val b : Int = 13;
+a = a + b;
+val total : Int = 0;
+val i : Int = 0;
+while (i < 100000) {
+    total = total + a * b - (a + b) / 3 + i * 4;
+    i = i + 1;
+}
+print(total);
+""",
+}
+
+
+def analyze(code: str):
+    ast = Parser(Lexer(code).token_stream()).parse()
+    SemanticAnalyzer().analyze(ast)
+    return ast
+
+
+def build(code: str, optimize: bool):
+    ast = analyze(code)
+    module = CodeGenerator().generate(ast)
+    if optimize:
+        fold_constants(module)
+        optimize_calls(module)
+        fold_constants(module)
+        eliminate_dead_code(module)
+        optimize_loops(module)
+        allocate_temps(module)
+    return compile_module(module)
+
+
+def best_time(function, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(bytecode, repeat: int):
+    executed = run(bytecode, out=io.StringIO())
+    return best_time(lambda: run(bytecode, out=io.StringIO()), repeat), executed
+
+
+def c_time(code: str, directory: str, name: str, repeat: int):
+    executable = os.path.join(directory, name)
+    compile_c(CGenerator().generate(CodeGenerator().generate(analyze(code))), executable)
+    return best_time(lambda: subprocess.run([executable], stdout=subprocess.DEVNULL, check=True), repeat)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Vazão da máquina virtual em programas com laços.")
+    arg_parser.add_argument('--repeat', type=int, default=3, help="execuções por programa (vale a melhor)")
+    args = arg_parser.parse_args(argv)
+    try:
+        find_compiler()
+        has_cc = True
+    except CBackendError:
+        has_cc = False
+    print(f"{'programa':<16} {'-O':<4} {'tempo (s)':>10} {'instruções':>12} {'Minstr/s':>9} "
+          f"{'python (s)':>11} {'C (s)':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, code in PROGRAMS.items():
+            source = PythonGenerator().generate(analyze(code))
+            python_time = best_time(lambda: python_generator.run(source, io.StringIO()), args.repeat)
+            native = f"{c_time(code, directory, name, args.repeat):>8.3f}" if has_cc else f"{'-':>8}"
+            for optimize in (False, True):
+                elapsed, executed = measure(build(code, optimize), args.repeat)
+                print(f"{name:<16} {'sim' if optimize else 'não':<4} {elapsed:>10.3f} {executed:>12} "
+                      f"{executed / elapsed / 1e6:>9.2f} {python_time:>11.3f} {native}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+# bytecode.py
+
+from typing import Dict, List, Optional, Tuple
+import ir
+from ir import Module, Function, Temp, Var
+from operations import is_constant
+
+# Bytecode de registradores executado por vm.py. Cada instrução é uma tupla
+# (opcode, x, y, z) de inteiros. Os operandos são índices no quadro da
+# função em execução, uma lista com:
+#
+#   [0]                        quadro da função que envolve esta (ligação estática)
+#   [1 .. frame_size]          variáveis e parâmetros (1 + Symbol.slot)
+#   em seguida                 temporários, registradores auxiliares e constantes
+#
+# As constantes ficam no próprio quadro (o modelo do quadro já as contém),
+# então toda operação lê e escreve apenas registradores locais. Variáveis
+# globais e de funções externas são copiadas de/para um registrador auxiliar
+# por LOAD_*/STORE_*. Desvios usam o índice da instrução de destino.
+OPNAMES = (
+    "MOVE",           # r[x] = r[y]
+    "ADD",            # r[x] = r[y] + r[z]
+    "SUB",
+    "MUL",
+    "DIV",
+    "EQ",
+    "NE",
+    "LT",
+    "LE",
+    "GT",
+    "GE",
+    "NEG",            # r[x] = -r[y]
+    "NOT",
+    "JUMP",           # pc = x
+    "JUMP_IF_FALSE",  # if not r[x]: pc = y
+    "JUMP_IF_TRUE",
+    "LOAD_GLOBAL",    # r[x] = globais[y]
+    "STORE_GLOBAL",   # globais[x] = r[y]
+    "LOAD_OUTER",     # r[x] = quadro y níveis acima[z]
+    "STORE_OUTER",    # quadro x níveis acima[y] = r[z]
+    "CALL",           # r[x] = call funções[y] com call_sites[z] = (registradores dos argumentos, níveis da ligação)
+    "RETURN",         # return r[x]
+    "PRINT",          # print r[x]
+    "HALT",
+)
+(MOVE, ADD, SUB, MUL, DIV, EQ, NE, LT, LE, GT, GE, NEG, NOT, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE,
+ LOAD_GLOBAL, STORE_GLOBAL, LOAD_OUTER, STORE_OUTER, CALL, RETURN, PRINT, HALT) = range(len(OPNAMES))
+
+BINARY_OPCODES = {
+    "PLUS": ADD, "MINUS": SUB, "MULTIPLY": MUL, "DIVIDE": DIV,
+    "EQUAL": EQ, "DIFFERENT": NE, "LESS": LT, "LESS_OR_EQUAL": LE, "GREATER": GT, "GREATER_OR_EQUAL": GE,
+}
+UNARY_OPCODES = {"MINUS": NEG, "NOT": NOT}
+
+
+class CodeObject:
+    # Uma função compilada. `template` é o quadro inicial (constantes já nos
+    # seus registradores); `params` são os registradores dos parâmetros.
+    __slots__ = ("name", "code", "template", "params", "level")
+
+    def __init__(self, name: str, level: int):
+        self.name = name
+        self.code: List[Tuple[int, int, int, int]] = []
+        self.template: list = [None]
+        self.params: Tuple[int, ...] = ()
+        self.level = level
+
+
+class Bytecode:
+    def __init__(self):
+        self.main: Optional[CodeObject] = None
+        self.functions: List[CodeObject] = []
+        self.call_sites: List[Tuple[Tuple[int, ...], int]] = []
+
+    def instruction_count(self) -> int:
+        return len(self.main.code) + sum(len(function.code) for function in self.functions)
+
+
+class FunctionCompiler:
+    # Traduz uma Function do código intermediário para um CodeObject
+    def __init__(self, compiler: "BytecodeCompiler", function: Function, level: int, frame_size: int):
+        self.compiler = compiler
+        self.function = function
+        self.level = level
+        self.frame_size = frame_size
+        self.code_object = compiler.code_objects[function]
+        self.temps: Dict[Temp, int] = {}
+        self.constants: Dict[tuple, int] = {}
+        self.scratch: List[int] = []
+        self.registers = 1 + frame_size
+        self.code = self.code_object.code
+
+    def new_register(self) -> int:
+        self.registers += 1
+        return self.registers - 1
+
+    def temp(self, temp: Temp) -> int:
+        register = self.temps.get(temp)
+        if register is None:
+            register = self.temps[temp] = self.new_register()
+        return register
+
+    def constant(self, value) -> int:
+        # True e 1 são iguais como chaves de dicionário; o tipo as separa
+        key = (type(value), value)
+        register = self.constants.get(key)
+        if register is None:
+            register = self.constants[key] = self.new_register()
+        return register
+
+    def scratch_register(self, index: int) -> int:
+        while len(self.scratch) <= index:
+            self.scratch.append(self.new_register())
+        return self.scratch[index]
+
+    def owner_level(self, var: Var) -> int:
+        frame = var.symbol.frame
+        return 0 if frame is None else self.compiler.levels[frame]
+
+    def read(self, operand, scratch: int) -> int:
+        # Registrador com o valor do operando; variáveis de outros quadros
+        # são carregadas antes num registrador auxiliar
+        if is_constant(operand):
+            return self.constant(operand)
+        if type(operand) is Temp:
+            return self.temp(operand)
+        slot = 1 + operand.symbol.slot
+        level = self.owner_level(operand)
+        if level == self.level:
+            return slot
+        register = self.scratch_register(scratch)
+        if level == 0:
+            self.code.append((LOAD_GLOBAL, register, slot, 0))
+        else:
+            self.code.append((LOAD_OUTER, register, self.level - level, slot))
+        return register
+
+    def write(self, var, source: int):
+        if type(var) is Temp:
+            self.code.append((MOVE, self.temp(var), source, 0))
+            return
+        slot = 1 + var.symbol.slot
+        level = self.owner_level(var)
+        if level == self.level:
+            self.code.append((MOVE, slot, source, 0))
+        elif level == 0:
+            self.code.append((STORE_GLOBAL, slot, source, 0))
+        else:
+            self.code.append((STORE_OUTER, self.level - level, slot, source))
+
+    def compile(self):
+        code = self.code
+        labels = {}
+        fixups = []  # (índice da instrução, posição do operando de destino, rótulo)
+        for instruction in self.function.instructions:
+            op = instruction.op
+            if op == ir.COPY:
+                self.write(instruction.dest, self.read(instruction.a, 0))
+            elif op == ir.BINARY:
+                left = self.read(instruction.a, 0)
+                right = self.read(instruction.b, 1)
+                code.append((BINARY_OPCODES[instruction.operator], self.temp(instruction.dest), left, right))
+            elif op == ir.UNARY:
+                operand = self.read(instruction.a, 0)
+                code.append((UNARY_OPCODES[instruction.operator], self.temp(instruction.dest), operand, 0))
+            elif op == ir.CALL:
+                args = tuple(self.read(arg, index) for index, arg in enumerate(instruction.b))
+                callee = self.compiler.code_objects[instruction.a]
+                # A ligação estática da função chamada é o quadro, visível
+                # daqui, da função que a declara
+                site = (args, self.level - (callee.level - 1))
+                self.compiler.bytecode.call_sites.append(site)
+                code.append((CALL, self.temp(instruction.dest), self.compiler.index[instruction.a],
+                             len(self.compiler.bytecode.call_sites) - 1))
+            elif op == ir.PRINT:
+                code.append((PRINT, self.read(instruction.a, 0), 0, 0))
+            elif op == ir.RETURN:
+                code.append((RETURN, self.read(instruction.a, 0), 0, 0))
+            elif op == ir.LABEL:
+                labels[instruction.a] = len(code)
+            elif op == ir.JUMP:
+                fixups.append((len(code), 1, instruction.a))
+                code.append((JUMP, 0, 0, 0))
+            elif op == ir.BRANCH_TRUE or op == ir.BRANCH_FALSE:
+                condition = self.read(instruction.a, 0)
+                fixups.append((len(code), 2, instruction.b))
+                code.append((JUMP_IF_TRUE if op == ir.BRANCH_TRUE else JUMP_IF_FALSE, condition, 0, 0))
+            elif op == ir.FUNCTION:
+                self.compiler.compile_function(instruction.a, self.level + 1)
+        # Funções sem return explícito devolvem Unit; o nível superior para
+        if self.level == 0:
+            code.append((HALT, 0, 0, 0))
+        else:
+            code.append((RETURN, self.constant(None), 0, 0))
+        for index, position, label in fixups:
+            instruction = list(code[index])
+            instruction[position] = labels[label]
+            code[index] = tuple(instruction)
+
+        template = [None] * self.registers
+        for (_, value), register in self.constants.items():
+            template[register] = value
+        self.code_object.template = template
+        self.code_object.params = tuple(1 + param.symbol.slot for param in self.function.params)
+
+
+class BytecodeCompiler:
+    def __init__(self):
+        self.bytecode = Bytecode()
+        self.code_objects: Dict[Function, CodeObject] = {}
+        self.index: Dict[Function, int] = {}
+        self.levels = {}  # Symbol da função -> nível de aninhamento (0 = nível superior)
+
+    def compile(self, module: Module) -> Bytecode:
+        # Todas as funções recebem seu CodeObject antes da compilação, porque
+        # uma chamada pode aparecer antes da declaração (recursão)
+        for function in module.functions:
+            self.index[function] = len(self.bytecode.functions)
+            self.code_objects[function] = CodeObject(function.name, 0)
+            self.bytecode.functions.append(self.code_objects[function])
+        self.code_objects[module.main] = self.bytecode.main = CodeObject("<main>", 0)
+        self.compile_function(module.main, 0, global_frame_size(module))
+        return self.bytecode
+
+    def compile_function(self, function: Function, level: int, frame_size: int = None):
+        self.code_objects[function].level = level
+        if function.symbol is not None:
+            self.levels[function.symbol] = level
+            frame_size = function.symbol.frame_size
+        FunctionCompiler(self, function, level, frame_size).compile()
+
+
+def global_frame_size(module: Module) -> int:
+    # Maior slot global usado (o código intermediário não guarda o tamanho
+    # do quadro global)
+    size = 0
+    for function in module.all_functions():
+        for instruction in function.instructions:
+            for operand in (instruction.dest, instruction.a, instruction.b):
+                if type(operand) is Var and operand.symbol.frame is None:
+                    size = max(size, operand.symbol.slot + 1)
+            if instruction.op == ir.CALL:
+                for operand in instruction.b:
+                    if type(operand) is Var and operand.symbol.frame is None:
+                        size = max(size, operand.symbol.slot + 1)
+    return size
+
+
+def compile_module(module: Module) -> Bytecode:
+    return BytecodeCompiler().compile(module)
+
+
+def disassemble(bytecode: Bytecode) -> str:
+    lines = []
+    for code_object in [bytecode.main] + bytecode.functions:
+        lines.append(f"{code_object.name}:")
+        for index, (op, x, y, z) in enumerate(code_object.code):
+            lines.append(f"  {index:4} {OPNAMES[op]:<14} {x} {y} {z}")
+    return "\n".join(lines) + "\n"
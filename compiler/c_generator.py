@@ -0,0 +1,383 @@
+# c_generator.py
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Set, TextIO
+import ir
+from ir import Module, Function, Temp, Var
+from operations import is_constant
+from type_system import Type, INT, BOOL, UNIT
+
+# Backend C: traduz o código intermediário (já com a ordem de avaliação
+# fixada pelo CodeGenerator, que o C deixaria indefinida) para um programa C
+# com int32_t e bool. Int dá a volta em overflow (a aritmética é feita em
+# uint32_t) e a divisão trunca em direção a zero, como em Kotlin.
+#
+# Variáveis globais viram variáveis estáticas; as de uma função são locais
+# do C, exceto as usadas por funções aninhadas, que ficam num struct de
+# quadro no próprio quadro da função. Uma função aninhada recebe um ponteiro
+# para o quadro da função que a declara (ligação estática), e cada quadro
+# aponta para o da função externa a ele.
+#
+# Uma função Unit com `return valor` devolve, como na máquina virtual, o
+# valor desse return (e Unit se terminar sem ele): no C ela devolve um
+# k_value, o valor com a etiqueta do seu tipo, que o print examina.
+
+PRELUDE = """\
+#include <inttypes.h>
+#include <stdbool.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+static int32_t k_div(int32_t a, int32_t b) {
+    if (b == 0) {
+        fflush(stdout);
+        puts("Erro de execução: Divisão por zero.");
+        exit(1);
+    }
+    if (b == -1)
+        return (int32_t)(0u - (uint32_t)a);
+    return a / b;
+}
+
+static void k_print_int(int32_t value) { printf("%" PRId32 "\\n", value); }
+static void k_print_bool(bool value) { puts(value ? "true" : "false"); }
+
+typedef struct { int8_t kind; int32_t value; } k_value; /* kind: 0 Unit, 1 Int, 2 Bool */
+
+static void k_print_value(k_value v) {
+    if (v.kind == 1)
+        k_print_int(v.value);
+    else if (v.kind == 2)
+        k_print_bool(v.value);
+    else
+        puts("kotlin.Unit");
+}
+"""
+
+# Resultado de uma função Unit com `return valor` (tipo só deste backend)
+VALUE = Type("k_value")
+VALUE_KIND = {UNIT: 0, INT: 1, BOOL: 2}
+
+C_TYPES = {INT: "int32_t", BOOL: "bool", UNIT: "void", VALUE: "k_value"}
+
+ARITHMETIC = {"PLUS": "+", "MINUS": "-", "MULTIPLY": "*"}
+COMPARISON = {
+    "EQUAL": "==", "DIFFERENT": "!=", "LESS": "<", "LESS_OR_EQUAL": "<=",
+    "GREATER": ">", "GREATER_OR_EQUAL": ">=",
+}
+
+
+class CBackendError(Exception):
+    pass
+
+
+class CGenerator:
+    # Gera o código C de um Module produzido pelo CodeGenerator. O tipo de
+    # cada temporário vem das suas definições, que precisam concordar (o
+    # módulo não pode ter passado por liveness.allocate_temps, que junta
+    # temporários de tipos diferentes no mesmo slot).
+    def __init__(self):
+        self.lines: List[str] = []
+        self.names: Dict[object, str] = {}  # Symbol/Function/Label -> nome no C
+        self.levels: Dict[object, int] = {}  # Symbol da função -> nível de aninhamento
+        self.captured: Set[object] = set()  # Symbols lidos/escritos por funções aninhadas
+        self.has_frame: Set[object] = set()  # Symbols de funções com struct de quadro
+        self.valued: Set[object] = set()  # Symbols de funções Unit com `return valor`
+        self.function: Optional[Function] = None
+        self.level = 0
+        self.temp_types: Dict[Temp, Type] = {}
+
+    def name(self, key, base: str) -> str:
+        name = self.names.get(key)
+        if name is None:
+            name = self.names[key] = f"{base}_{len(self.names)}"
+        return name
+
+    def emit(self, line: str):
+        self.lines.append(line)
+
+    def generate(self, module: Module) -> str:
+        self.analyze(module)
+        self.lines = [PRELUDE]
+        for var in self.global_vars(module):
+            self.emit(f"static {C_TYPES[var.symbol.type]} {self.var_name(var)};")
+        functions = module.functions
+        for function in functions:
+            if function.symbol in self.has_frame:
+                self.frame_struct(function, module)
+        for function in functions:
+            self.emit(self.signature(function) + ";")
+        for function in functions:
+            self.function_body(function)
+        self.function_body(module.main)
+        return "\n".join(self.lines) + "\n"
+
+    # Análise: níveis, variáveis capturadas e funções com quadro
+
+    def analyze(self, module: Module):
+        pending = [(module.main, 0)]
+        while pending:
+            function, level = pending.pop()
+            if function.symbol is not None:
+                self.levels[function.symbol] = level
+            for instruction in function.instructions:
+                if instruction.op == ir.FUNCTION:
+                    pending.append((instruction.a, level + 1))
+        for function in module.functions:
+            if function.symbol.frame is not None:
+                self.has_frame.add(function.symbol.frame)
+            if function.symbol.return_type is UNIT and \
+                    any(instruction.op == ir.RETURN for instruction in function.instructions):
+                self.valued.add(function.symbol)
+        for function in module.all_functions():
+            for var in self.vars_used(function):
+                if var.symbol.frame is not None and var.symbol.frame is not function.symbol:
+                    self.captured.add(var.symbol)
+
+    @staticmethod
+    def vars_used(function: Function):
+        for instruction in function.instructions:
+            if type(instruction.dest) is Var:
+                yield instruction.dest
+            for operand in ir.operands_read(instruction):
+                if type(operand) is Var:
+                    yield operand
+
+    def global_vars(self, module: Module) -> List[Var]:
+        seen = {}
+        for function in module.all_functions():
+            for var in self.vars_used(function):
+                if var.symbol.frame is None:
+                    seen.setdefault(var.symbol, var)
+        return list(seen.values())
+
+    def frame_struct(self, function: Function, module: Module):
+        fields = []
+        if self.levels[function.symbol] >= 2:
+            fields.append(f"    struct {self.frame_type(function.symbol.frame)} *link;")
+        for var in {var.symbol: var for f in module.all_functions() for var in self.vars_used(f)}.values():
+            if var.symbol.frame is function.symbol and var.symbol in self.captured:
+                fields.append(f"    {C_TYPES[var.symbol.type]} {self.var_name(var)};")
+        if not fields:
+            fields.append("    char unused;")
+        self.emit(f"struct {self.frame_type(function.symbol)} {{")
+        self.lines.extend(fields)
+        self.emit("};")
+
+    def frame_type(self, symbol) -> str:
+        return f"frame_{self.name(symbol, symbol.name)}"
+
+    def result_type(self, symbol) -> Type:
+        return VALUE if symbol in self.valued else symbol.return_type
+
+    def var_name(self, var: Var) -> str:
+        return self.name(var.symbol, f"v_{var.symbol.name}")
+
+    def signature(self, function: Function) -> str:
+        params = []
+        if function.symbol.frame is not None:
+            params.append(f"struct {self.frame_type(function.symbol.frame)} *link")
+        for param in function.params:
+            params.append(f"{C_TYPES[param.symbol.type]} p_{self.var_name(param)}")
+        return (f"static {C_TYPES[self.result_type(function.symbol)]} {self.name(function.symbol, function.name)}"
+                f"({', '.join(params) or 'void'})")
+
+    # Corpo das funções
+
+    def function_body(self, function: Function):
+        self.function = function
+        self.level = self.levels[function.symbol] if function.symbol is not None else 0
+        self.temp_types = self.infer_temp_types(function)
+        if function.symbol is None:
+            self.emit("int main(void) {")
+        else:
+            self.emit(self.signature(function) + " {")
+        if function.symbol in self.has_frame:
+            self.emit(f"    struct {self.frame_type(function.symbol)} frame;")
+            if self.level >= 2:
+                self.emit("    frame.link = link;")
+        locals_ = {}  # no nível superior, todas as variáveis são globais
+        for var in function.params + list(self.vars_used(function)):
+            if function.symbol is not None and var.symbol.frame is function.symbol \
+                    and var.symbol not in self.captured:
+                locals_.setdefault(var.symbol, var)
+        for symbol, var in locals_.items():
+            self.emit(f"    {C_TYPES[symbol.type]} {self.var_name(var)};")
+        for temp, temp_type in self.temp_types.items():
+            if temp_type is not UNIT:
+                self.emit(f"    {C_TYPES[temp_type]} t{temp.index};")
+        for param in function.params:
+            self.emit(f"    {self.access(param)} = p_{self.var_name(param)};")
+        for instruction in function.instructions:
+            self.instruction(instruction)
+        if function.symbol is None:
+            self.emit("    return 0;")
+        elif function.symbol in self.valued:
+            self.emit("    return (k_value){0, 0};")
+        elif function.symbol.return_type is not UNIT:
+            self.emit("    return 0;")
+        self.emit("}")
+        self.emit("")
+
+    def infer_temp_types(self, function: Function) -> Dict[Temp, Type]:
+        types: Dict[Temp, Type] = {}
+        for instruction in function.instructions:
+            dest = instruction.dest
+            if type(dest) is not Temp:
+                continue
+            op = instruction.op
+            if op == ir.BINARY:
+                temp_type = BOOL if instruction.operator in COMPARISON else INT
+            elif op == ir.UNARY:
+                temp_type = BOOL if instruction.operator == "NOT" else INT
+            elif op == ir.CALL:
+                temp_type = self.result_type(instruction.a.symbol)
+            else:
+                temp_type = self.operand_type(instruction.a, types)
+            # Um temporário com mais de uma atribuição (o acumulador da
+            # redução de força) precisa de um único tipo
+            if types.setdefault(dest, temp_type) is not temp_type:
+                raise CBackendError("O backend C precisa de temporários com um único tipo.")
+        return types
+
+    @staticmethod
+    def operand_type(operand, types: Dict[Temp, Type]) -> Type:
+        if is_constant(operand):
+            return BOOL if type(operand) is bool else INT
+        if type(operand) is Temp:
+            return types[operand]
+        return operand.symbol.type
+
+    def access(self, var: Var) -> str:
+        symbol = var.symbol
+        name = self.var_name(var)
+        if symbol.frame is None:
+            return name
+        if symbol.frame is self.function.symbol:
+            return f"frame.{name}" if symbol in self.captured else name
+        hops = self.level - self.levels[symbol.frame]
+        return "link" + "->link" * (hops - 1) + f"->{name}"
+
+    def value(self, operand) -> str:
+        if operand is True:
+            return "true"
+        if operand is False:
+            return "false"
+        if is_constant(operand):
+            # INT_MIN não é um literal válido em C
+            return f"(-{-operand - 1} - 1)" if operand < -2147483647 else str(operand)
+        if type(operand) is Temp:
+            return f"t{operand.index}"
+        return self.access(operand)
+
+    def label(self, label) -> str:
+        return self.name(label, "L")
+
+    def static_link(self, callee: Function) -> Optional[str]:
+        if callee.symbol.frame is None:
+            return None
+        hops = self.level - (self.levels[callee.symbol] - 1)
+        if hops == 0:
+            return "&frame"
+        return "link" + "->link" * (hops - 1)
+
+    def instruction(self, instruction):
+        op = instruction.op
+        if op == ir.COPY:
+            dest = instruction.dest
+            target = f"t{dest.index}" if type(dest) is Temp else self.access(dest)
+            if type(dest) is Temp and self.temp_types[dest] is UNIT:
+                return
+            self.emit(f"    {target} = {self.value(instruction.a)};")
+        elif op == ir.BINARY:
+            left, right = self.value(instruction.a), self.value(instruction.b)
+            operator = instruction.operator
+            if operator in ARITHMETIC:
+                expression = f"(int32_t)((uint32_t){left} {ARITHMETIC[operator]} (uint32_t){right})"
+            elif operator == "DIVIDE":
+                expression = f"k_div({left}, {right})"
+            else:
+                expression = f"{left} {COMPARISON[operator]} {right}"
+            self.emit(f"    t{instruction.dest.index} = {expression};")
+        elif op == ir.UNARY:
+            operand = self.value(instruction.a)
+            if instruction.operator == "NOT":
+                self.emit(f"    t{instruction.dest.index} = !{operand};")
+            else:
+                self.emit(f"    t{instruction.dest.index} = (int32_t)(0u - (uint32_t){operand});")
+        elif op == ir.CALL:
+            callee = instruction.a
+            args = [self.value(arg) for arg in instruction.b]
+            link = self.static_link(callee)
+            if link is not None:
+                args.insert(0, link)
+            call = f"{self.name(callee.symbol, callee.name)}({', '.join(args)})"
+            if self.temp_types[instruction.dest] is UNIT:
+                self.emit(f"    {call};")
+            else:
+                self.emit(f"    t{instruction.dest.index} = {call};")
+        elif op == ir.PRINT:
+            value_type = self.operand_type(instruction.a, self.temp_types)
+            if value_type is INT:
+                self.emit(f"    k_print_int({self.value(instruction.a)});")
+            elif value_type is BOOL:
+                self.emit(f"    k_print_bool({self.value(instruction.a)});")
+            elif value_type is VALUE:
+                self.emit(f"    k_print_value({self.value(instruction.a)});")
+            else:
+                self.emit('    puts("kotlin.Unit");')
+        elif op == ir.RETURN:
+            if self.function.symbol in self.valued:
+                value_type = self.operand_type(instruction.a, self.temp_types)
+                if value_type is VALUE:
+                    self.emit(f"    return {self.value(instruction.a)};")
+                elif value_type is UNIT:
+                    self.emit("    return (k_value){0, 0};")
+                else:
+                    self.emit(f"    return (k_value){{{VALUE_KIND[value_type]}, {self.value(instruction.a)}}};")
+            elif self.function.symbol.return_type is UNIT:
+                self.emit("    return;")
+            else:
+                self.emit(f"    return {self.value(instruction.a)};")
+        elif op == ir.LABEL:
+            self.emit(f"{self.label(instruction.a)}: ;")
+        elif op == ir.JUMP:
+            self.emit(f"    goto {self.label(instruction.a)};")
+        elif op == ir.BRANCH_TRUE:
+            self.emit(f"    if ({self.value(instruction.a)}) goto {self.label(instruction.b)};")
+        elif op == ir.BRANCH_FALSE:
+            self.emit(f"    if (!{self.value(instruction.a)}) goto {self.label(instruction.b)};")
+        # FUNCTION: as funções aninhadas são geradas à parte
+
+
+def find_compiler() -> str:
+    compiler = shutil.which(os.environ.get("CC", "cc"))
+    if compiler is None:
+        raise CBackendError("Compilador C não encontrado (defina a variável CC).")
+    return compiler
+
+
+def compile_c(source: str, executable: str):
+    # Compila com cc -O2; o código C fica ao lado do executável
+    c_path = executable + ".c"
+    with open(c_path, "w") as file:
+        file.write(source)
+    result = subprocess.run([find_compiler(), "-O2", "-o", executable, c_path],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise CBackendError(f"Falha ao compilar o código C:\n{result.stderr}")
+
+
+def run_c(source: str, out: Optional[TextIO] = None) -> int:
+    # Compila num diretório temporário e executa; devolve o código de saída
+    with tempfile.TemporaryDirectory() as directory:
+        executable = os.path.join(directory, "programa")
+        compile_c(source, executable)
+        result = subprocess.run([executable], capture_output=True, text=True)
+        (out or sys.stdout).write(result.stdout)
+        return result.returncode
@@ -0,0 +1,188 @@
+# cache.py
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from typing import Optional
+
+# Cache persistente de compilação, endereçado pelo conteúdo: a chave é o
+# hash do código-fonte, da versão do compilador e das opções, de modo que
+# uma entrada nunca fica desatualizada, apenas deixa de ser usada. Cada
+# entrada é um arquivo em DIR/ab/abcdef... com o pickle das saídas da
+# compilação. A escrita vai para um arquivo temporário no mesmo diretório e
+# é publicada com os.replace, então processos concorrentes veem a entrada
+# inteira ou nenhuma. O tamanho total é limitado removendo as entradas
+# usadas há mais tempo (mtime, atualizado a cada acerto): cada processo
+# conhece o tamanho do diretório desde a sua última varredura mais o que ele
+# mesmo gravou, e poda quando essa soma passa do limite. Com vários
+# processos gravando ao mesmo tempo, o diretório pode passar do limite no
+# máximo pelo que os outros gravaram desde a última varredura de cada um.
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Ao passar do limite, remove até ficar nesta fração dele (evita podar a
+# cada escrita)
+PRUNE_TARGET = 0.9
+SUFFIX = ".pkl"
+# Temporários mais velhos que isto são restos de processos interrompidos
+STALE_TEMPORARY_SECONDS = 3600
+
+_version = None
+
+
+def compiler_version() -> str:
+    # Hash do código do próprio compilador: qualquer mudança nele invalida
+    # o cache inteiro
+    global _version
+    if _version is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".py"):
+                with open(os.path.join(directory, name), 'rb') as file:
+                    digest.update(name.encode() + b"\0" + file.read())
+        _version = digest.hexdigest()
+    return _version
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "writes", "evictions", "errors")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0  # entradas corrompidas ou escritas que falharam
+
+    def merge(self, other: "CacheStats"):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __str__(self):
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        return (f"Cache: {self.hits} acertos, {self.misses} faltas ({rate:.1f}% de acerto), "
+                f"{self.writes} gravações, {self.evictions} removidas.")
+
+
+class CompilationCache:
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self.known_size: Optional[int] = None  # tamanho na última varredura + gravações
+
+    @staticmethod
+    def key(source: str, options: dict) -> str:
+        digest = hashlib.sha256()
+        digest.update(compiler_version().encode())
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + SUFFIX)
+
+    def get(self, key: str) -> Optional[dict]:
+        # Saídas da entrada, ou None numa falta
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                outputs = pickle.load(file)
+        except FileNotFoundError:
+            self.stats.misses += 1
+            return None
+        except Exception:
+            # Entrada ilegível (ex.: de uma versão antiga do Python): conta
+            # como falta e é descartada
+            self.stats.misses += 1
+            self.stats.errors += 1
+            self.remove(path)
+            return None
+        try:
+            os.utime(path)  # usada agora: vai para o fim da fila de remoção
+        except OSError:
+            pass
+        self.stats.hits += 1
+        return outputs
+
+    def put(self, key: str, outputs: dict) -> bool:
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            data = pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL)
+            descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, 'wb') as file:
+                    file.write(data)
+                os.replace(temporary, path)
+            except BaseException:
+                self.remove(temporary)
+                raise
+        except (OSError, RecursionError, pickle.PicklingError):
+            # Sem cache para este arquivo (disco cheio, AST profunda demais
+            # para o pickle...): a compilação em si não é afetada
+            self.stats.errors += 1
+            return False
+        self.stats.writes += 1
+        if self.known_size is None:
+            self.known_size = self.size()
+        else:
+            self.known_size += len(data)
+        if self.known_size > self.max_bytes:
+            self.prune()
+        return True
+
+    @staticmethod
+    def remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def entries(self):
+        # (mtime, tamanho, caminho) de cada entrada; arquivos que somem no
+        # meio da varredura (outro processo podando) são ignorados, e
+        # temporários abandonados são apagados
+        now = time.time()
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(SUFFIX):
+                    yield info.st_mtime, info.st_size, path
+                elif name.endswith(".tmp") and now - info.st_mtime > STALE_TEMPORARY_SECONDS:
+                    self.remove(path)
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def prune(self) -> int:
+        # Remove as entradas menos usadas recentemente enquanto o total
+        # passar do limite. Devolve quantas foram removidas.
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        self.known_size = total
+        if total <= self.max_bytes:
+            return 0
+        target = self.max_bytes * PRUNE_TARGET
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            self.remove(path)
+            total -= size
+            removed += 1
+        self.known_size = total
+        self.stats.evictions += removed
+        return removed
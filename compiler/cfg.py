@@ -0,0 +1,521 @@
+# cfg.py
+
+from typing import Dict, Iterable, List, Optional, Set, TextIO
+import sys
+from ir import (
+    Module, Function, Instruction, Temp, Var, Label, format_instruction, operands_read,
+    READS_A, READS_B, COPY, CALL, RETURN, LABEL, JUMP, BRANCH_TRUE, BRANCH_FALSE,
+)
+
+# Grafo de fluxo de controle de uma função do código intermediário: cada
+# bloco básico é uma sequência de instruções que só começa por um rótulo (ou
+# logo após um desvio) e só termina num desvio, return ou antes do próximo
+# rótulo. A ordem dos blocos é a do código, de modo que um bloco que não
+# termina num desvio continua no seguinte.
+
+class Phi:
+    # dest = phi(operando vindo de cada predecessor)
+    __slots__ = ("dest", "operands")
+
+    def __init__(self, dest: Var):
+        self.dest = dest
+        self.operands: Dict["BasicBlock", object] = {}
+
+
+class BasicBlock:
+    __slots__ = ("index", "instructions", "successors", "predecessors", "phis")
+
+    def __init__(self, index: int, instructions: List[Instruction]):
+        self.index = index
+        self.instructions = instructions
+        self.successors: List["BasicBlock"] = []
+        self.predecessors: List["BasicBlock"] = []
+        self.phis: List[Phi] = []
+
+    @property
+    def label(self) -> Optional[Label]:
+        if self.instructions and self.instructions[0].op == LABEL:
+            return self.instructions[0].a
+        return None
+
+    @property
+    def name(self) -> str:
+        label = self.label
+        return label.name if label is not None else f"B{self.index}"
+
+    def terminator(self) -> Optional[Instruction]:
+        if self.instructions and self.instructions[-1].op in (JUMP, BRANCH_TRUE, BRANCH_FALSE, RETURN):
+            return self.instructions[-1]
+        return None
+
+    def __repr__(self):
+        return f"BasicBlock({self.name})"
+
+
+class ControlFlowGraph:
+    def __init__(self, function: Function, blocks: List[BasicBlock]):
+        self.function = function
+        self.blocks = blocks
+        self.versions: Dict[Var, Var] = {}  # versão SSA -> variável original
+
+    @property
+    def entry(self) -> BasicBlock:
+        return self.blocks[0]
+
+    def instructions(self) -> List[Instruction]:
+        # Código linear na ordem dos blocos (phis precisam ter sido
+        # eliminados por from_ssa)
+        result = []
+        for block in self.blocks:
+            result.extend(block.instructions)
+        return result
+
+
+def build_cfg(function: Function) -> ControlFlowGraph:
+    # Divide as instruções em blocos básicos e liga as arestas. Blocos
+    # inalcançáveis a partir da entrada são descartados.
+    blocks: List[BasicBlock] = []
+    current: List[Instruction] = []
+    for instruction in function.instructions:
+        if instruction.op == LABEL and current:
+            blocks.append(BasicBlock(len(blocks), current))
+            current = []
+        current.append(instruction)
+        if instruction.op in (JUMP, BRANCH_TRUE, BRANCH_FALSE, RETURN):
+            blocks.append(BasicBlock(len(blocks), current))
+            current = []
+    if current or not blocks:
+        blocks.append(BasicBlock(len(blocks), current))
+
+    by_label = {block.label: block for block in blocks if block.label is not None}
+    for index, block in enumerate(blocks):
+        following = blocks[index + 1] if index + 1 < len(blocks) else None
+        last = block.terminator()
+        if last is None:
+            targets = [following] if following is not None else []
+        elif last.op == JUMP:
+            targets = [by_label[last.a]]
+        elif last.op == RETURN:
+            targets = []
+        else:
+            targets = [following, by_label[last.b]] if following is not None else [by_label[last.b]]
+        for target in targets:
+            if target not in block.successors:
+                block.successors.append(target)
+
+    reachable = set()
+    pending = [blocks[0]]
+    while pending:
+        block = pending.pop()
+        if block in reachable:
+            continue
+        reachable.add(block)
+        pending.extend(block.successors)
+    blocks = [block for block in blocks if block in reachable]
+    for index, block in enumerate(blocks):
+        block.index = index
+        for successor in block.successors:
+            successor.predecessors.append(block)
+    return ControlFlowGraph(function, blocks)
+
+
+# Dominadores (algoritmo iterativo de Cooper, Harvey e Kennedy)
+
+def reverse_postorder(cfg: ControlFlowGraph) -> List[BasicBlock]:
+    order = []
+    visited = {cfg.entry}
+    stack = [(cfg.entry, iter(cfg.entry.successors))]
+    while stack:
+        block, successors = stack[-1]
+        for successor in successors:
+            if successor not in visited:
+                visited.add(successor)
+                stack.append((successor, iter(successor.successors)))
+                break
+        else:
+            stack.pop()
+            order.append(block)
+    order.reverse()
+    return order
+
+
+def dominators(cfg: ControlFlowGraph) -> Dict[BasicBlock, BasicBlock]:
+    # Dominador imediato de cada bloco (a entrada domina a si mesma)
+    order = reverse_postorder(cfg)
+    position = {block: index for index, block in enumerate(order)}
+    idom = {cfg.entry: cfg.entry}
+
+    def intersect(a, b):
+        while a is not b:
+            while position[a] > position[b]:
+                a = idom[a]
+            while position[b] > position[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for block in order[1:]:
+            new = None
+            for predecessor in block.predecessors:
+                if predecessor in idom:
+                    new = predecessor if new is None else intersect(predecessor, new)
+            if idom.get(block) is not new:
+                idom[block] = new
+                changed = True
+    return idom
+
+
+def dominates(idom: Dict[BasicBlock, BasicBlock], a: BasicBlock, b: BasicBlock) -> bool:
+    while True:
+        if b is a:
+            return True
+        parent = idom[b]
+        if parent is b:
+            return False
+        b = parent
+
+
+def dominance_frontiers(cfg: ControlFlowGraph, idom) -> Dict[BasicBlock, Set[BasicBlock]]:
+    frontiers = {block: set() for block in cfg.blocks}
+    for block in cfg.blocks:
+        if len(block.predecessors) < 2:
+            continue
+        for predecessor in block.predecessors:
+            runner = predecessor
+            while runner is not idom[block]:
+                frontiers[runner].add(block)
+                runner = idom[runner]
+    return frontiers
+
+
+def back_edges(cfg: ControlFlowGraph, idom) -> List[tuple]:
+    # Arestas (origem, cabeçalho) que fecham um laço: o destino domina a origem
+    return [(block, successor) for block in cfg.blocks for successor in block.successors
+            if dominates(idom, successor, block)]
+
+
+# SSA
+
+def promotable_symbols(module: Module, function: Function) -> Set[object]:
+    # Variáveis que só esta função lê ou escreve: as locais (e, no nível
+    # superior, as globais) que nenhuma outra função usa. As demais podem
+    # mudar numa chamada e ficam fora da SSA.
+    owner = function.symbol
+    used_elsewhere = set()
+    owned = set()
+    for other in module.all_functions():
+        for var in variables(other):
+            if var.symbol.frame is owner:
+                if other is function:
+                    owned.add(var.symbol)
+                else:
+                    used_elsewhere.add(var.symbol)
+    return owned - used_elsewhere
+
+
+def variables(function: Function) -> Iterable[Var]:
+    for param in function.params:
+        yield param
+    for instruction in function.instructions:
+        if type(instruction.dest) is Var:
+            yield instruction.dest
+        for operand in operands_read(instruction):
+            if type(operand) is Var:
+                yield operand
+
+
+def rename_operands(instruction: Instruction, rename):
+    op = instruction.op
+    if op == CALL:
+        instruction.b = [rename(arg) for arg in instruction.b]
+        return
+    if op in READS_A:
+        instruction.a = rename(instruction.a)
+    if op in READS_B:
+        instruction.b = rename(instruction.b)
+
+
+def to_ssa(cfg: ControlFlowGraph, promotable: Set[object]):
+    # Forma SSA (Cytron et al.): phis nas fronteiras de dominância dos blocos
+    # que atribuem cada variável, apenas para variáveis lidas em algum bloco
+    # antes de serem escritas nele ("semi-pruned"); depois, renomeação em
+    # pré-ordem na árvore de dominadores. Cada versão é um Var novo com o
+    # mesmo Symbol; cfg.versions guarda a original. A versão inicial de uma
+    # variável (parâmetro ou ainda não atribuída) é o próprio Var original.
+    idom = dominators(cfg)
+    frontiers = dominance_frontiers(cfg, idom)
+
+    originals: Dict[object, Var] = {}
+    definitions: Dict[object, List[BasicBlock]] = {}
+    global_names = set()
+    for block in cfg.blocks:
+        written = set()
+        for instruction in block.instructions:
+            for operand in operands_read(instruction):
+                if type(operand) is Var and operand.symbol in promotable:
+                    originals.setdefault(operand.symbol, operand)
+                    if operand.symbol not in written:
+                        global_names.add(operand.symbol)
+            dest = instruction.dest
+            if type(dest) is Var and dest.symbol in promotable:
+                originals.setdefault(dest.symbol, dest)
+                written.add(dest.symbol)
+                blocks = definitions.setdefault(dest.symbol, [])
+                if not blocks or blocks[-1] is not block:
+                    blocks.append(block)
+    for param in cfg.function.params:
+        originals.setdefault(param.symbol, param)
+
+    phi_vars: Dict[Phi, object] = {}
+    for symbol, blocks in definitions.items():
+        if symbol not in global_names:
+            continue
+        has_phi = set()
+        pending = list(blocks)
+        while pending:
+            block = pending.pop()
+            for frontier in frontiers[block]:
+                if frontier not in has_phi:
+                    has_phi.add(frontier)
+                    phi = Phi(originals[symbol])
+                    frontier.phis.append(phi)
+                    phi_vars[phi] = symbol
+                    pending.append(frontier)
+
+    children: Dict[BasicBlock, List[BasicBlock]] = {block: [] for block in cfg.blocks}
+    for block, parent in idom.items():
+        if block is not parent:
+            children[parent].append(block)
+
+    counters: Dict[object, int] = {}
+    stacks: Dict[object, List[Var]] = {symbol: [var] for symbol, var in originals.items()}
+
+    def new_version(symbol) -> Var:
+        counters[symbol] = counters.get(symbol, 0) + 1
+        original = originals[symbol]
+        version = Var(f"{original.name}.{counters[symbol]}", symbol)
+        cfg.versions[version] = original
+        stacks[symbol].append(version)
+        return version
+
+    def current(operand):
+        if type(operand) is Var and operand.symbol in promotable:
+            return stacks[operand.symbol][-1]
+        return operand
+
+    # Pré-ordem iterativa; cada entrada da pilha de trabalho registra quantas
+    # versões o bloco empilhou, para desempilhá-las na volta
+    work = [(cfg.entry, None)]
+    while work:
+        block, pushed = work.pop()
+        if pushed is not None:
+            for symbol in pushed:
+                stacks[symbol].pop()
+            continue
+        pushed = []
+        for phi in block.phis:
+            symbol = phi_vars[phi]
+            phi.dest = new_version(symbol)
+            pushed.append(symbol)
+        for instruction in block.instructions:
+            rename_operands(instruction, current)
+            dest = instruction.dest
+            if type(dest) is Var and dest.symbol in promotable:
+                instruction.dest = new_version(dest.symbol)
+                pushed.append(dest.symbol)
+        for successor in block.successors:
+            for phi in successor.phis:
+                phi.operands[block] = stacks[phi_vars[phi]][-1]
+        work.append((block, pushed))
+        for child in reversed(children[block]):
+            work.append((child, None))
+
+
+def from_ssa(cfg: ControlFlowGraph):
+    # Volta da SSA: cada phi vira cópias no fim dos predecessores (arestas
+    # críticas ganham um bloco próprio) e as versões voltam a ser a variável
+    # original. Supõe SSA convencional: as transformações feitas sobre a SSA
+    # não podem deixar duas versões da mesma variável vivas ao mesmo tempo.
+    original = lambda operand: cfg.versions.get(operand, operand) if type(operand) is Var else operand
+    split_counter = 0
+    temps = [operand.index for block in cfg.blocks for instruction in block.instructions
+             for operand in [instruction.dest] + operands_read(instruction) if type(operand) is Temp]
+    next_temp = [max(temps, default=-1) + 1]
+
+    def new_temp() -> Temp:
+        next_temp[0] += 1
+        return Temp(next_temp[0] - 1)
+
+    for block in list(cfg.blocks):
+        if not block.phis:
+            continue
+        for predecessor in list(block.predecessors):
+            copies = []
+            for phi in block.phis:
+                source = original(phi.operands.get(predecessor, phi.dest))
+                dest = original(phi.dest)
+                if source is not dest:
+                    copies.append((dest, source))
+            if not copies:
+                continue
+            target = predecessor
+            if len(predecessor.successors) > 1:
+                split_counter += 1
+                target = split_edge(cfg, predecessor, block, split_counter)
+            insert_copies(target, sequentialize(copies, new_temp))
+        block.phis = []
+    for block in cfg.blocks:
+        for instruction in block.instructions:
+            if type(instruction.dest) is Var:
+                instruction.dest = original(instruction.dest)
+            rename_operands(instruction, original)
+    cfg.versions = {}
+
+
+def split_edge(cfg: ControlFlowGraph, source: BasicBlock, target: BasicBlock, counter: int) -> BasicBlock:
+    # Novo bloco na aresta source -> target, que termina com um goto para
+    # target. Se a aresta era a continuação sem desvio, o bloco novo fica
+    # logo depois de source; senão o desvio de source passa a apontar para
+    # ele, e ele vai para depois de um bloco que não continua no seguinte.
+    label = Label(f"{target.name}_split_{counter}")
+    target_label = target.label
+    if target_label is None:
+        target_label = Label(f"{target.name}_{counter}")
+        target.instructions.insert(0, Instruction(LABEL, a=target_label))
+    block = BasicBlock(0, [Instruction(LABEL, a=label), Instruction(JUMP, a=target_label)])
+    last = source.terminator()
+    if last is not None and last.op in (BRANCH_TRUE, BRANCH_FALSE) and last.b is target_label \
+            and cfg.blocks.index(target) != cfg.blocks.index(source) + 1:
+        last.b = label
+        cfg.blocks.insert(detached_position(cfg, counter), block)
+    else:
+        cfg.blocks.insert(cfg.blocks.index(source) + 1, block)
+    source.successors[source.successors.index(target)] = block
+    target.predecessors[target.predecessors.index(source)] = block
+    block.predecessors.append(source)
+    block.successors.append(target)
+    for index, each in enumerate(cfg.blocks):
+        each.index = index
+    return block
+
+
+def detached_position(cfg: ControlFlowGraph, counter: int) -> int:
+    # Posição em que um bloco novo não é alcançado por continuação
+    for index in range(len(cfg.blocks) - 1, -1, -1):
+        last = cfg.blocks[index].terminator()
+        if last is not None and last.op in (JUMP, RETURN):
+            return index + 1
+    # O código termina sem desvio: o fim ganha um goto para um rótulo final
+    # e o bloco novo fica entre os dois
+    end = Label(f"end_{counter}")
+    jump = BasicBlock(0, [Instruction(JUMP, a=end)])
+    exit_block = BasicBlock(0, [Instruction(LABEL, a=end)])
+    cfg.blocks[-1].successors.append(jump)
+    jump.predecessors.append(cfg.blocks[-1])
+    jump.successors.append(exit_block)
+    exit_block.predecessors.append(jump)
+    cfg.blocks.extend((jump, exit_block))
+    return len(cfg.blocks) - 1
+
+
+def sequentialize(copies: List[tuple], new_temp) -> List[tuple]:
+    # As cópias de um conjunto de phis acontecem em paralelo; em sequência,
+    # um destino só pode ser escrito depois de lido pelas outras cópias.
+    # Ciclos (ex.: troca de duas variáveis) passam por um temporário.
+    pending = list(copies)
+    result = []
+    while pending:
+        sources = {source for _, source in pending}
+        ready = [copy for copy in pending if copy[0] not in sources]
+        if ready:
+            for copy in ready:
+                pending.remove(copy)
+                result.append(copy)
+            continue
+        dest, source = pending[0]
+        temp = new_temp()
+        result.append((temp, source))
+        pending[0] = (dest, temp)
+    return result
+
+
+def insert_copies(block: BasicBlock, copies: List[tuple]):
+    instructions = [Instruction(COPY, dest, source) for dest, source in copies]
+    position = len(block.instructions) - (1 if block.terminator() is not None else 0)
+    block.instructions[position:position] = instructions
+
+
+# Exportação em DOT
+
+def escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("<", "\\<").replace(">", "\\>") \
+        .replace("{", "\\{").replace("}", "\\}").replace("|", "\\|")
+
+
+def cfg_to_dot(cfg: ControlFlowGraph, lines: List[str], prefix: str):
+    # Um cluster por função; arestas de volta (laços) em vermelho e os
+    # cabeçalhos de laço destacados
+    idom = dominators(cfg)
+    loops = back_edges(cfg, idom)
+    headers = {header for _, header in loops}
+    lines.append(f'  subgraph "cluster_{prefix}" {{')
+    lines.append(f'    label="{escape(str(cfg.function))}";')
+    for block in cfg.blocks:
+        body = [block.name + ":"]
+        for phi in block.phis:
+            operands = ", ".join(f"{predecessor.name}: {operand}" for predecessor, operand in phi.operands.items())
+            body.append(f"{phi.dest} = phi({operands})")
+        body.extend(format_instruction(instruction) for instruction in block.instructions
+                    if instruction.op != LABEL)
+        style = ', style=filled, fillcolor="#ffe0e0"' if block in headers else ""
+        label = "\\l".join(escape(line) for line in body) + "\\l"
+        lines.append(f'    "{prefix}_{block.index}" [shape=record, label="{{{label}}}"{style}];')
+    for block in cfg.blocks:
+        for successor in block.successors:
+            style = " [color=red, penwidth=2]" if (block, successor) in loops else ""
+            lines.append(f'    "{prefix}_{block.index}" -> "{prefix}_{successor.index}"{style};')
+    lines.append("  }")
+
+
+def copy_function(function: Function) -> Function:
+    # Mesma função com instruções novas: build_cfg reaproveita as
+    # instruções, e to_ssa as renomeia no lugar
+    copy = Function(function.name, function.params, function.return_type, function.symbol)
+    copy.instructions = [Instruction(instruction.op, instruction.dest, instruction.a,
+                                     list(instruction.b) if instruction.op == CALL else instruction.b,
+                                     instruction.operator)
+                         for instruction in function.instructions]
+    return copy
+
+
+def ssa_round_trip(module: Module, function: Function, transform=None):
+    # Passa a função pela SSA e de volta, com transform(cfg) aplicado sobre
+    # a forma SSA, se dado: o comportamento deve ser o mesmo (ver
+    # ssa_check.py)
+    cfg = build_cfg(function)
+    to_ssa(cfg, promotable_symbols(module, function))
+    if transform is not None:
+        transform(cfg)
+    from_ssa(cfg)
+    function.instructions[:] = cfg.instructions()
+
+
+def module_to_dot(module: Module, ssa: bool = False) -> str:
+    # Com ssa, o grafo é montado sobre uma cópia de cada função: o módulo
+    # exportado continua intacto para as fases seguintes
+    lines = ["digraph cfg {", '  node [fontname="monospace"];']
+    for index, function in enumerate(module.all_functions()):
+        if ssa:
+            cfg = build_cfg(copy_function(function))
+            to_ssa(cfg, promotable_symbols(module, function))
+        else:
+            cfg = build_cfg(function)
+        cfg_to_dot(cfg, lines, f"f{index}")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def write_dot(module: Module, out: TextIO = None, ssa: bool = False):
+    (out or sys.stdout).write(module_to_dot(module, ssa))
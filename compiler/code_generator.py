@@ -1,79 +1,151 @@
 from parser import Program, VarDecl, FuncDecl, Block, Assignment, IfStatement, WhileStatement, ReturnStatement, BreakStatement, ContinueStatement, PrintStatement, Identifier, Literal, BinaryOp, UnaryOp, FuncCall
+from ir import (
+    Module, Function, Instruction, Temp, Var, Label,
+    COPY, BINARY, UNARY, CALL, PRINT, RETURN, LABEL, JUMP, BRANCH_FALSE, FUNCTION,
+)
 
 class CodeGenerator:
+    # Gera o código de três endereços (ver ir.py) de uma AST já analisada.
+    # generate() devolve o Module; ir.write_module() o escreve no formato
+    # textual.
     def __init__(self):
-        self.instructions = []
+        self.instructions = []  # lista da função sendo gerada
         self.temp_counter = 0
+        self.label_counter = 0
+        self.visitors = {}  # classe do nó -> método visit_* já resolvido
+        self.module = None
+        self.variables = {}  # Symbol -> Var
+        self.functions = {}  # Symbol da função -> Function
+        self.loops = []  # (rótulo do teste, rótulo de saída) dos laços abertos
+        self.calls = 0  # chamadas emitidas até agora
 
     def new_temp(self):
         self.temp_counter += 1
-        return f"t{self.temp_counter}"
+        return Temp(self.temp_counter)
 
-    def generate(self, node):
+    def new_label(self, base):
+        self.label_counter += 1
+        return Label(f"{base}_{self.label_counter}")
+
+    def emit(self, op, dest=None, a=None, b=None, operator=None):
+        self.instructions.append(Instruction(op, dest, a, b, operator))
+
+    def var(self, symbol):
+        var = self.variables.get(symbol)
+        if var is None:
+            var = self.variables[symbol] = Var(symbol.name, symbol)
+        return var
+
+    def generate(self, node) -> Module:
+        self.module = Module()
+        self.instructions = self.module.main.instructions
         self.visit(node)
+        return self.module
 
     def visit(self, node):
-        method_name = f"visit_{type(node).__name__}"
-        visitor = getattr(self, method_name, self.generic_visit)
+        visitor = self.visitors.get(type(node))
+        if visitor is None:
+            visitor = self.resolve_visitor(type(node))
         return visitor(node)
 
+    def resolve_visitor(self, node_class):
+        # Procura visit_<Classe> ao longo da hierarquia, para que subclasses
+        # dos nós (ex.: as views de ast_arena) usem o mesmo visitante.
+        visitor = self.generic_visit
+        for cls in node_class.__mro__:
+            method = getattr(self, f"visit_{cls.__name__}", None)
+            if method is not None:
+                visitor = method
+                break
+        self.visitors[node_class] = visitor
+        return visitor
+
     def generic_visit(self, node):
         raise Exception(f'No visit_{type(node).__name__} method')
 
     def visit_Program(self, node: Program):
-        print("Iniciando geração de código intermediário...\n")
         for declaration in node.declarations:
             self.visit(declaration)
 
-    # Exemplo básico de geração intermediária
     def visit_VarDecl(self, node: VarDecl):
         initializer = self.visit(node.initializer)
-        print(f"{node.name} = {initializer}")
+        self.emit(COPY, self.var(node.symbol), initializer)
 
     def visit_Assignment(self, node: Assignment):
         value = self.visit(node.value)
-        print(f"{node.name} = {value}")
+        self.emit(COPY, self.var(node.symbol), value)
 
     def visit_Literal(self, node: Literal):
-        return str(node.value)
-
+        return node.value
 
     def visit_Identifier(self, node: Identifier):
-        return node.name
+        return self.var(node.symbol)
+
+    def snapshot(self, operands, mark, calls):
+        # Uma chamada emitida depois de `mark` pode alterar as variáveis lidas
+        # pelos operandos anteriores; o valor delas é copiado antes, porque
+        # os operandos são avaliados da esquerda para a direita.
+        if self.calls == calls:
+            return operands
+        copies = []
+        result = []
+        for operand in operands:
+            if type(operand) is Var:
+                temp = self.new_temp()
+                copies.append(Instruction(COPY, temp, operand))
+                operand = temp
+            result.append(operand)
+        self.instructions[mark:mark] = copies
+        return result
 
     def visit_BinaryOp(self, node: BinaryOp):
         left = self.visit(node.left)
+        mark, calls = len(self.instructions), self.calls
         right = self.visit(node.right)
+        [left] = self.snapshot([left], mark, calls)
         temp = self.new_temp()
-        print(f"{temp} = {left} {node.operator} {right}")
+        self.emit(BINARY, temp, left, right, node.operator)
         return temp
 
     def visit_UnaryOp(self, node: UnaryOp):
         operand = self.visit(node.operand)
         temp = self.new_temp()
-        print(f"{temp} = {node.operator}{operand}")
+        self.emit(UNARY, temp, operand, operator=node.operator)
         return temp
 
     def visit_PrintStatement(self, node: PrintStatement):
         value = self.visit(node.value)
-        print(f"print {value}")
-
-    def visit_Identifier(self, node: Identifier):
-        return node.name
+        self.emit(PRINT, a=value)
 
     def visit_FuncCall(self, node: FuncCall):
-        args = [self.visit(arg) for arg in node.args]
+        args = []
+        for arg in node.args:
+            mark, calls = len(self.instructions), self.calls
+            value = self.visit(arg)
+            args = self.snapshot(args, mark, calls)
+            args.append(value)
         temp = self.new_temp()
-        args_str = ', '.join(args)
-        print(f"{temp} = call {node.name}({args_str})")
+        self.emit(CALL, temp, self.function(node.symbol), args)
+        self.calls += 1
         return temp
 
+    def function(self, symbol) -> Function:
+        # Uma chamada recursiva encontra a função antes do fim da sua geração
+        function = self.functions.get(symbol)
+        if function is None:
+            function = self.functions[symbol] = Function(symbol.name, symbol=symbol)
+        return function
+
     def visit_FuncDecl(self, node: FuncDecl):
-    # Desempacota (nome, tipo, linha) e utiliza apenas nome e tipo
-        params_str = ', '.join([f"{name}: {type_}" for name, type_, _ in node.params])
-        print(f"function {node.name}({params_str}) : {node.return_type}")
+        function = self.function(node.symbol)
+        function.return_type = node.return_type
+        function.params = [self.var(node.scope.symbols[name]) for name, _, _ in node.params]
+        self.module.functions.append(function)
+        self.emit(FUNCTION, a=function)
+        outer, loops = self.instructions, self.loops
+        self.instructions, self.loops = function.instructions, []
         self.visit(node.body)
-        print(f"end function {node.name}")
+        self.instructions, self.loops = outer, loops
 
     def visit_Block(self, node: Block):
         for decl in node.declarations:
@@ -81,36 +153,34 @@ class CodeGenerator:
 
     def visit_IfStatement(self, node: IfStatement):
         condition = self.visit(node.condition)
-        print(f"if {condition} goto then_label")
-        if node.else_branch:
-            print(f"goto else_label")
-        print("then_label:")
+        end_label = self.new_label("end_if_label")
+        else_label = self.new_label("else_label") if node.else_branch else end_label
+        self.emit(BRANCH_FALSE, a=condition, b=else_label)
         self.visit(node.then_branch)
         if node.else_branch:
-            print("else_label:")
+            self.emit(JUMP, a=end_label)
+            self.emit(LABEL, a=else_label)
             self.visit(node.else_branch)
+        self.emit(LABEL, a=end_label)
 
     def visit_WhileStatement(self, node: WhileStatement):
-        print("while_label:")
+        start_label = self.new_label("while_label")
+        end_label = self.new_label("end_while_label")
+        self.emit(LABEL, a=start_label)
         condition = self.visit(node.condition)
-        print(f"if not {condition} goto end_while_label")
+        self.emit(BRANCH_FALSE, a=condition, b=end_label)
+        self.loops.append((start_label, end_label))
         self.visit(node.body)
-        print("goto while_label")
-        print("end_while_label")
+        self.loops.pop()
+        self.emit(JUMP, a=start_label)
+        self.emit(LABEL, a=end_label)
 
     def visit_ReturnStatement(self, node: ReturnStatement):
         value = self.visit(node.value)
-        print(f"return {value}")
+        self.emit(RETURN, a=value)
 
     def visit_BreakStatement(self, node: BreakStatement):
-        print("break")
+        self.emit(JUMP, a=self.loops[-1][1])
 
     def visit_ContinueStatement(self, node: ContinueStatement):
-        print(f"continue")
-
-    def visit_PrintStatement(self, node: PrintStatement):
-        value = self.visit(node.value)
-        print(f"print {value}")
-
-    def visit_Identifier(self, node: Identifier):
-        return node.name
+        self.emit(JUMP, a=self.loops[-1][0])
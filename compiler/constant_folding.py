@@ -0,0 +1,91 @@
+# constant_folding.py
+
+from typing import Dict
+from ir import (
+    Module, Instruction, Var, READS_A, READS_B,
+    COPY, BINARY, UNARY, CALL, JUMP, BRANCH_TRUE, BRANCH_FALSE,
+)
+from operations import BINARY_OPERATIONS, UNARY_OPERATIONS, is_constant
+
+
+def single_assignment_vars(module: Module) -> Dict[Var, int]:
+    # Quantas vezes cada variável é escrita em todo o módulo (uma função
+    # aninhada pode atribuir a uma variável de fora). Parâmetros também são
+    # escritos pela chamada, então nunca contam como atribuição única.
+    writes: Dict[Var, int] = {}
+    for function in module.all_functions():
+        for param in function.params:
+            writes[param] = 2
+        for instruction in function.instructions:
+            if instruction.op == COPY:
+                writes[instruction.dest] = writes.get(instruction.dest, 0) + 1
+    return writes
+
+
+def fold_constants(module: Module) -> int:
+    # Dobra expressões constantes e propaga os valores de temporários e de
+    # variáveis (val ou const) atribuídas uma única vez com uma constante;
+    # desvios com condição constante viram um goto ou desaparecem. Devolve o
+    # número de instruções removidas.
+    #
+    # Temporários e variáveis de atribuição única têm o mesmo valor em todos
+    # os pontos em que podem ser lidos, então a propagação não depende do
+    # fluxo de controle. Como uma leitura pode aparecer antes (no texto) da
+    # atribuição que a alimenta, as passadas se repetem até não haver mudança.
+    writes = single_assignment_vars(module)
+    constants = {}
+    before = module.instruction_count()
+    changed = True
+    while changed:
+        changed = False
+        for function in module.all_functions():
+            kept = []
+            for instruction in function.instructions:
+                substitute(instruction, constants)
+                if fold(instruction, constants, writes):
+                    changed = True
+                    continue
+                kept.append(instruction)
+            function.instructions[:] = kept
+    return before - module.instruction_count()
+
+
+def substitute(instruction: Instruction, constants: dict):
+    op = instruction.op
+    if op in READS_A and not is_constant(instruction.a):
+        instruction.a = constants.get(instruction.a, instruction.a)
+    if op in READS_B and not is_constant(instruction.b):
+        instruction.b = constants.get(instruction.b, instruction.b)
+    if op == CALL:
+        instruction.b = [arg if is_constant(arg) else constants.get(arg, arg) for arg in instruction.b]
+
+
+def fold(instruction: Instruction, constants: dict, writes: Dict[Var, int]) -> bool:
+    # Devolve True se a instrução deve ser removida
+    op = instruction.op
+    if op == BINARY:
+        if not (is_constant(instruction.a) and is_constant(instruction.b)):
+            return False
+        try:
+            constants[instruction.dest] = BINARY_OPERATIONS[instruction.operator](instruction.a, instruction.b)
+        except ZeroDivisionError:
+            return False  # fica para o erro em tempo de execução
+        return True
+    if op == UNARY:
+        if not is_constant(instruction.a):
+            return False
+        constants[instruction.dest] = UNARY_OPERATIONS[instruction.operator](instruction.a)
+        return True
+    if op == COPY:
+        if is_constant(instruction.a) and writes.get(instruction.dest) == 1:
+            constants[instruction.dest] = instruction.a
+            return True
+        return False
+    if op == BRANCH_TRUE or op == BRANCH_FALSE:
+        if not is_constant(instruction.a):
+            return False
+        if bool(instruction.a) == (op == BRANCH_TRUE):
+            instruction.op, instruction.a, instruction.b = JUMP, instruction.b, None
+            return False
+        return True
+    return False
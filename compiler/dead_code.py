@@ -0,0 +1,166 @@
+# dead_code.py
+
+from collections import Counter
+from typing import Optional
+from diagnostics import Diagnostics
+from parser import (
+    ASTNode, Program, FuncDecl, Block, IfStatement, WhileStatement,
+    ReturnStatement, BreakStatement, ContinueStatement,
+)
+from ir import (
+    Module, Function, operands_read,
+    COPY, BINARY, UNARY, RETURN, LABEL, JUMP, BRANCH_TRUE, BRANCH_FALSE, FUNCTION,
+)
+from operations import is_constant
+
+# AST: comandos depois de um return, break ou continue (ou de um if cujos
+# dois ramos terminam assim) nunca executam. A poda roda depois da análise
+# semântica, para que erros em código inalcançável continuem reportados.
+
+def terminates(node: ASTNode) -> bool:
+    if isinstance(node, (ReturnStatement, BreakStatement, ContinueStatement)):
+        return True
+    if isinstance(node, IfStatement):
+        return node.else_branch is not None and terminates(node.then_branch) and terminates(node.else_branch)
+    if isinstance(node, Block):
+        return any(terminates(decl) for decl in node.declarations)
+    return False
+
+
+def prune_unreachable(node: ASTNode, diagnostics: Optional[Diagnostics] = None) -> int:
+    # Remove os comandos inalcançáveis dos blocos (e avisa sobre cada trecho
+    # removido, se houver um coletor). Devolve quantos comandos foram removidos.
+    removed = 0
+    if isinstance(node, (Program, Block)):
+        declarations = node.declarations
+        for index, decl in enumerate(declarations):
+            removed += prune_unreachable(decl, diagnostics)
+            if terminates(decl) and index + 1 < len(declarations):
+                dead = declarations[index + 1:]
+                if diagnostics is not None:
+                    diagnostics.warning("semantic", "Código inalcançável.", dead[0].line, dead[0].column)
+                node.declarations = declarations[:index + 1]  # atribuída: vale também para a ASTArena
+                removed += len(dead)
+                break
+    elif isinstance(node, FuncDecl):
+        removed += prune_unreachable(node.body, diagnostics)
+    elif isinstance(node, IfStatement):
+        removed += prune_unreachable(node.then_branch, diagnostics)
+        if node.else_branch is not None:
+            removed += prune_unreachable(node.else_branch, diagnostics)
+    elif isinstance(node, WhileStatement):
+        removed += prune_unreachable(node.body, diagnostics)
+    return removed
+
+
+# Código intermediário: instruções que nenhum caminho alcança (ex.: o corpo
+# de um while cuja condição virou falsa no constant folding), desvios para a
+# instrução seguinte, rótulos sem desvio e temporários/variáveis que nunca
+# são lidos.
+
+def eliminate_dead_code(module: Module) -> int:
+    # Devolve o número de instruções removidas
+    before = module.instruction_count()
+    defined = set()
+    pending = [module.main]
+    while pending:
+        function = pending.pop()
+        remove_unreachable(function)
+        remove_redundant_jumps(function)
+        for instruction in function.instructions:
+            if instruction.op == FUNCTION:
+                defined.add(instruction.a)
+                pending.append(instruction.a)
+    # Funções declaradas em trechos inalcançáveis também saem do módulo
+    module.functions = [function for function in module.functions if function in defined]
+    remove_unused(module)
+    return before - module.instruction_count()
+
+
+def remove_unreachable(function: Function):
+    instructions = function.instructions
+    labels = {instruction.a: index for index, instruction in enumerate(instructions) if instruction.op == LABEL}
+    reached = bytearray(len(instructions))
+    pending = [0] if instructions else []
+    while pending:
+        index = pending.pop()
+        while index < len(instructions) and not reached[index]:
+            reached[index] = 1
+            instruction = instructions[index]
+            op = instruction.op
+            if op == JUMP:
+                index = labels[instruction.a]
+                continue
+            if op == RETURN:
+                break
+            if op == BRANCH_TRUE or op == BRANCH_FALSE:
+                pending.append(labels[instruction.b])
+            index += 1
+    instructions[:] = [instruction for index, instruction in enumerate(instructions) if reached[index]]
+
+
+def remove_redundant_jumps(function: Function):
+    # Um desvio para o rótulo logo a seguir não faz nada (a condição é um
+    # operando, sem efeitos colaterais); depois, rótulos sem desvio saem.
+    kept = []
+    for instruction in function.instructions:
+        if instruction.op == LABEL:
+            while kept and jump_target(kept[-1]) is instruction.a:
+                kept.pop()
+        kept.append(instruction)
+    targets = {jump_target(instruction) for instruction in kept}
+    function.instructions[:] = [
+        instruction for instruction in kept if instruction.op != LABEL or instruction.a in targets
+    ]
+
+
+def jump_target(instruction):
+    if instruction.op == JUMP:
+        return instruction.a
+    if instruction.op == BRANCH_TRUE or instruction.op == BRANCH_FALSE:
+        return instruction.b
+    return None
+
+
+def removable(instruction, uses: Counter) -> bool:
+    # Instruções sem efeito colateral cujo resultado ninguém lê. Uma divisão
+    # só é removível se o divisor for uma constante diferente de zero.
+    op = instruction.op
+    if op == COPY:
+        return uses[instruction.dest] == 0
+    if op == UNARY:
+        return uses[instruction.dest] == 0
+    if op == BINARY:
+        if instruction.operator == "DIVIDE" and not (is_constant(instruction.b) and instruction.b != 0):
+            return False
+        return uses[instruction.dest] == 0
+    return False
+
+
+def remove_unused(module: Module):
+    # As leituras são contadas no módulo todo (funções aninhadas leem
+    # variáveis de fora). Percorrer cada função de trás para frente remove
+    # cadeias inteiras de temporários em uma passada; a repetição cobre
+    # variáveis lidas apenas por instruções removidas em outra função.
+    functions = [module.main] + module.functions
+    uses = Counter()
+    for function in functions:
+        for instruction in function.instructions:
+            for operand in operands_read(instruction):
+                if not is_constant(operand):
+                    uses[operand] += 1
+    changed = True
+    while changed:
+        changed = False
+        for function in functions:
+            kept = []
+            for instruction in reversed(function.instructions):
+                if removable(instruction, uses):
+                    for operand in operands_read(instruction):
+                        if not is_constant(operand):
+                            uses[operand] -= 1
+                    changed = True
+                    continue
+                kept.append(instruction)
+            kept.reverse()
+            function.instructions[:] = kept
@@ -0,0 +1,73 @@
+# diagnostics.py
+
+import json
+from typing import Iterator, List, Optional
+
+class Diagnostic:
+    __slots__ = ("phase", "severity", "message", "line", "column")
+
+    def __init__(self, phase: str, severity: str, message: str, line: Optional[int] = None,
+                 column: Optional[int] = None):
+        self.phase = phase        # "lexer", "parser" ou "semantic"
+        self.severity = severity  # "error" ou "warning"
+        self.message = message
+        self.line = line
+        self.column = column
+
+    def to_dict(self) -> dict:
+        return {
+            "phase": self.phase,
+            "severity": self.severity,
+            "line": self.line,
+            "column": self.column,
+            "message": self.message,
+        }
+
+    def __str__(self):
+        position = f"Linha {self.line}" if self.line is not None else "Linha ?"
+        if self.column is not None:
+            position += f", coluna {self.column}"
+        label = "Erro" if self.severity == "error" else "Aviso"
+        return f"[{position}] {label}: {self.message}"
+
+
+class Diagnostics:
+    # Coletor compartilhado por Lexer, Parser e SemanticAnalyzer: cada fase
+    # registra o problema e continua, e todos são reportados de uma vez ao
+    # final da compilação.
+    def __init__(self):
+        self.items: List[Diagnostic] = []
+
+    def report(self, phase: str, severity: str, message: str, line: Optional[int] = None,
+               column: Optional[int] = None) -> Diagnostic:
+        diagnostic = Diagnostic(phase, severity, message, line, column)
+        self.items.append(diagnostic)
+        return diagnostic
+
+    def error(self, phase: str, message: str, line: Optional[int] = None, column: Optional[int] = None):
+        return self.report(phase, "error", message, line, column)
+
+    def warning(self, phase: str, message: str, line: Optional[int] = None, column: Optional[int] = None):
+        return self.report(phase, "warning", message, line, column)
+
+    @property
+    def errors(self) -> List[Diagnostic]:
+        return [item for item in self.items if item.severity == "error"]
+
+    def has_errors(self) -> bool:
+        return any(item.severity == "error" for item in self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[Diagnostic]:
+        return iter(self.items)
+
+    def to_json(self, **extra) -> str:
+        # Ordenados por posição; a ordem de registro desempata (sort estável)
+        items = sorted(self.items, key=lambda item: (item.line or 0, item.column or 0))
+        return json.dumps(
+            dict(extra, errors=sum(item.severity == "error" for item in items),
+                 diagnostics=[item.to_dict() for item in items]),
+            ensure_ascii=False,
+        )
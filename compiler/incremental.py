@@ -0,0 +1,273 @@
+# incremental.py
+
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import List, Optional
+from lexer import scan, LexerError
+from parser import ASTNode, Program, Parser, ParserError, FuncDecl
+from semantic_analyzer import SemanticAnalyzer, SemanticError
+from symbols import Symbol
+
+
+def token_line(token):
+    return token.line
+
+
+def entry_start(entry):
+    return entry.start
+
+
+class Entry:
+    # Uma declaração de nível superior: o intervalo [start, end) que ela ocupa
+    # na lista de tokens, o nó gerado (None se houve erro), os símbolos que
+    # ela declarou no escopo global e quantos slots globais existem ao fim dela.
+    # line_offset são as linhas inseridas (ou removidas, se negativo) acima
+    # dela desde que seus tokens, nós e erros foram numerados; ver settle().
+    def __init__(self, start: int, end: int, node: Optional[ASTNode], declared: list, errors: list,
+                 global_slots: int = 0):
+        self.start = start
+        self.end = end
+        self.node = node
+        self.declared = declared
+        self.global_slots = global_slots
+        self.errors = errors
+        self.checked = False
+        self.semantic_error: Optional[SemanticError] = None
+        self.line_offset = 0
+
+
+class IncrementalCompiler:
+    # Mantém tokens e declarações de nível superior entre edições. Uma edição
+    # re-tokeniza apenas as linhas alteradas e reanalisa apenas as declarações
+    # que as contêm; as demais subárvores são reaproveitadas. Se a edição muda
+    # os nomes declarados por essas declarações, as seguintes também são
+    # reanalisadas, pois podem depender deles.
+    #
+    # Quando o número de linhas muda, as declarações seguintes só acumulam a
+    # diferença em line_offset: os seus tokens, nós e erros são renumerados
+    # quando alguém os lê (settle), e não a cada edição. O parser as lê ao
+    # passar do fim da região editada, check() as que reanalisa ou que têm
+    # erro, `errors` as que têm erro e `program` todas.
+    def __init__(self, code: str):
+        self.lines = code.split("\n")
+        self.tokens = None
+        self.entries: List[Entry] = []
+        self.reparsed_tokens = 0  # tokens reanalisados na última atualização
+        self.rebuild()
+
+    def source(self) -> str:
+        return "\n".join(self.lines)
+
+    def rebuild(self):
+        self.tokens = None  # continua None se a tokenização falhar
+        tokens = list(scan(self.source()))
+        self.tokens = tokens
+        self.entries, _ = self.parse_region(0, len(tokens), [], 0)
+        self.reparsed_tokens = len(tokens)
+
+    def edit(self, start_line: int, end_line: int, text: str):
+        # Substitui as linhas start_line..end_line (1-based, inclusivas) por
+        # text. end_line = start_line - 1 insere antes de start_line. A árvore
+        # atualizada fica em `program`.
+        new_lines = text.split("\n")
+        self.lines[start_line - 1:end_line] = new_lines
+        if self.tokens is None:
+            self.rebuild()
+            return
+
+        try:
+            new_tokens = list(scan(text, start_line))
+        except LexerError:
+            self.tokens = None  # força uma reconstrução completa na próxima edição
+            raise
+        delta = len(new_lines) - (end_line - start_line + 1)
+
+        tokens = self.tokens
+        entries = self.entries
+        lo = self.locate(start_line, bisect_left)
+        hi = self.locate(end_line, bisect_right)
+
+        # Declarações que contêm os tokens editados, mais a anterior: o parser
+        # olha um token à frente (ex.: um 'else' inserido logo após um 'if').
+        first = max(bisect_right(entries, lo, key=entry_start) - 2, 0)
+        last = bisect_left(entries, hi, key=entry_start)
+        region_start = entries[first].start if entries else lo
+        region_end = max(hi, entries[last - 1].end if last > 0 else hi)
+        for entry in islice(entries, first, last):
+            self.settle(entry)  # os tokens da região voltam a ser lidos pelo parser
+
+        tokens[lo:hi] = new_tokens
+        shift = len(new_tokens) - (hi - lo)
+        region_end += shift
+        if delta:
+            for index in range(lo + len(new_tokens), region_end):
+                tokens[index].line += delta
+        for entry in islice(entries, last, None):
+            entry.start += shift
+            entry.end += shift
+            entry.line_offset += delta
+
+        declared = []
+        for entry in islice(entries, first):
+            declared += entry.declared
+        global_slots = entries[first - 1].global_slots if first > 0 else 0
+        new_entries, stop = self.parse_region(region_start, region_end, declared, global_slots, entries, first, last)
+        self.reparsed_tokens = (entries[stop].start if stop < len(entries) else len(tokens)) - region_start
+        entries[first:stop] = new_entries
+
+    def locate(self, line: int, search) -> int:
+        # Como search(tokens, line, key=token_line) (bisect_left ou
+        # bisect_right), mas com as linhas já deslocadas de cada declaração:
+        # a busca é feita na única declaração em que a resposta pode cair.
+        # Declarações nunca são vazias (o parser sempre consome um token).
+        tokens = self.tokens
+        first_line = lambda entry: tokens[entry.start].line + entry.line_offset
+        if search is bisect_left:
+            index = bisect_left(self.entries, line, key=first_line) - 1
+        else:
+            index = bisect_right(self.entries, line, key=first_line) - 1
+        if index < 0:
+            return 0
+        entry = self.entries[index]
+        return search(tokens, line - entry.line_offset, entry.start, entry.end, key=token_line)
+
+    def settle(self, entry: Entry):
+        # Aplica o line_offset pendente aos tokens, ao nó e aos erros da
+        # declaração. Os erros do parser apontam para tokens da lista, exceto
+        # o EOF, que o TokenBuffer cria à parte (um só para vários erros).
+        delta = entry.line_offset
+        if not delta:
+            return
+        entry.line_offset = 0
+        tokens = self.tokens
+        for index in range(entry.start, entry.end):
+            tokens[index].line += delta
+        if entry.node is not None:
+            shift_lines(entry.node, delta)
+        eof = {id(error.token): error.token for error in entry.errors
+               if error.token is not None and error.token.type == "EOF"}
+        for token in eof.values():
+            token.line += delta
+        if entry.semantic_error is not None and entry.semantic_error.line is not None:
+            entry.semantic_error.line += delta
+
+    def region_tokens(self, start: int, old: List[Entry], last: int):
+        # Tokens a partir de start para o parser; as declarações antigas a
+        # partir de old[last] são acertadas (settle) quando o parser chega a
+        # elas, o que só acontece se a análise passar do fim da região.
+        tokens = self.tokens
+        pending = last
+        for index in range(start, len(tokens)):
+            while pending < len(old) and old[pending].start <= index:
+                self.settle(old[pending])
+                pending += 1
+            yield tokens[index]
+
+    def parse_region(self, start: int, end: int, declared: List[Symbol], global_slots: int,
+                     old: List[Entry] = (), first: int = 0, last: int = 0):
+        # Analisa a partir de start até passar de end e encontrar o início de
+        # uma declaração antiga (de old[last:]) com a mesma interface global
+        # e a mesma quantidade de slots globais; dali em diante as declarações
+        # antigas são reaproveitadas. O escopo global começa com os símbolos
+        # das declarações anteriores, então os slots seguem a mesma numeração
+        # de uma análise completa.
+        parser = Parser(self.region_tokens(start, old, last))
+        table = parser.symbols
+        for symbol in declared:
+            table.bind(symbol)
+        table.global_frame_size = global_slots
+        scope = table.root.symbols
+        entries = []
+        old_signature = []
+        new_signature = []
+        next_old = first
+        while not parser.is_at_end():
+            position = start + parser.tokens.current
+            stop = bisect_left(old, position, lo=last, key=entry_start) if position >= end else len(old)
+            if stop < len(old) and old[stop].start == position:
+                old_signature += signature(old[next_old:stop])
+                next_old = stop
+                if old_signature == new_signature and old[stop - 1].global_slots == table.global_frame_size:
+                    return entries, stop
+            declared = len(scope)
+            errors = len(parser.errors)
+            node = parser.top_level_declaration()
+            declared = list(islice(reversed(scope.values()), len(scope) - declared))[::-1]
+            entry = Entry(position, start + parser.tokens.current, node, declared, parser.errors[errors:],
+                          table.global_frame_size)
+            new_signature += signature([entry])
+            entries.append(entry)
+        return entries, len(old)
+
+    @property
+    def program(self) -> Program:
+        for entry in self.entries:
+            self.settle(entry)
+        declarations = [entry.node for entry in self.entries if entry.node is not None]
+        return Program(declarations, line=declarations[0].line if declarations else None,
+                       column=declarations[0].column if declarations else None)
+
+    @property
+    def errors(self) -> List[ParserError]:
+        result = []
+        for entry in self.entries:
+            if entry.errors:
+                self.settle(entry)
+                result += entry.errors
+        return result
+
+    def check(self) -> List[SemanticError]:
+        # Reexecuta a análise semântica apenas nas declarações alteradas. Os
+        # nomes já foram resolvidos pelo Parser ao reanalisá-las.
+        analyzer = SemanticAnalyzer()
+        for entry in self.entries:
+            node = entry.node
+            if node is None or entry.checked:
+                if entry.semantic_error is not None:
+                    self.settle(entry)
+                continue
+            self.settle(entry)
+            try:
+                analyzer.analyze(node)
+                entry.semantic_error = None
+            except SemanticError as e:
+                entry.semantic_error = e
+            entry.checked = True
+        return [entry.semantic_error for entry in self.entries if entry.semantic_error is not None]
+
+
+def signature(entries: List[Entry]) -> list:
+    # Nomes declarados e seus tipos, sem as linhas dos parâmetros
+    result = []
+    for entry in entries:
+        for symbol in entry.declared:
+            params = symbol.params
+            if params is not None:
+                params = [(param_name, param_type) for param_name, param_type, _ in params]
+            result.append((symbol.name, symbol.type, symbol.is_const, symbol.is_function, params, symbol.return_type))
+    return result
+
+
+def node_fields(node: ASTNode):
+    for cls in type(node).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            yield getattr(node, name)
+
+
+def shift_lines(node: ASTNode, delta: int):
+    # Desloca as linhas de uma subárvore reaproveitada após inserção ou
+    # remoção de linhas acima dela.
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.line is not None:
+            current.line += delta
+        for value in node_fields(current):
+            if isinstance(value, ASTNode):
+                stack.append(value)
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ASTNode):
+                        stack.append(item)
+        if isinstance(current, FuncDecl):
+            current.params = [(name, type, line + delta) for name, type, line in current.params]
@@ -0,0 +1,224 @@
+# inlining.py
+
+from typing import Dict, List, Set
+from ir import (
+    Module, Function, Instruction, Temp, Var, operands_read,
+    COPY, BINARY, UNARY, CALL, PRINT, RETURN, LABEL, JUMP, BRANCH_TRUE, BRANCH_FALSE, FUNCTION,
+)
+from operations import BINARY_OPERATIONS, UNARY_OPERATIONS, is_constant
+
+# Otimização entre funções: chamadas de funções puras com argumentos
+# constantes são avaliadas em tempo de compilação, e funções pequenas sem
+# desvios são copiadas para o ponto da chamada. Roda depois do constant
+# folding (que deixa os argumentos constantes à vista) e antes de uma nova
+# passada dele (que propaga os resultados).
+
+# Instruções executadas numa avaliação em tempo de compilação e profundidade
+# máxima de chamadas; passando disso (ex.: recursão infinita), a chamada fica
+# para a execução
+EVALUATION_BUDGET = 10_000
+EVALUATION_DEPTH = 64
+
+# Tamanho máximo (em instruções) de uma função copiada para o chamador e
+# número de rodadas: o código copiado pode ter chamadas, copiadas na rodada
+# seguinte
+INLINE_SIZE = 16
+INLINE_ROUNDS = 3
+
+
+class NotConstant(Exception):
+    # A avaliação em tempo de compilação não pode continuar
+    pass
+
+
+def is_local(var: Var, function: Function) -> bool:
+    return var.symbol.frame is function.symbol
+
+
+def pure_functions(module: Module) -> Set[Function]:
+    # Funções sem print, sem atribuição a variáveis de fora e que só chamam
+    # funções puras (ponto fixo: começa supondo todas puras)
+    pure = set(module.functions)
+    changed = True
+    while changed:
+        changed = False
+        for function in list(pure):
+            for instruction in function.instructions:
+                op = instruction.op
+                if op == PRINT or (op == CALL and instruction.a not in pure) or \
+                        (type(instruction.dest) is Var and not is_local(instruction.dest, function)):
+                    pure.discard(function)
+                    changed = True
+                    break
+    return pure
+
+
+class Evaluator:
+    # Interpreta o código intermediário de funções puras. Leituras de
+    # variáveis de fora, print, desvios para o fim sem return e excesso de
+    # orçamento interrompem a avaliação com NotConstant.
+    def __init__(self, pure: Set[Function]):
+        self.pure = pure
+        self.budget = EVALUATION_BUDGET
+        self.labels: Dict[Function, Dict[object, int]] = {}
+
+    def call(self, function: Function, args: list, depth: int = 0):
+        if function not in self.pure or depth >= EVALUATION_DEPTH:
+            raise NotConstant()
+        labels = self.labels.get(function)
+        if labels is None:
+            labels = self.labels[function] = {
+                instruction.a: index for index, instruction in enumerate(function.instructions)
+                if instruction.op == LABEL
+            }
+        values = dict(zip(function.params, args))
+
+        def value(operand):
+            if is_constant(operand):
+                return operand
+            if operand in values:
+                return values[operand]
+            raise NotConstant()  # variável de fora (ou ainda sem valor)
+
+        instructions = function.instructions
+        pc = 0
+        while pc < len(instructions):
+            self.budget -= 1
+            if self.budget < 0:
+                raise NotConstant()
+            instruction = instructions[pc]
+            pc += 1
+            op = instruction.op
+            if op == COPY:
+                values[instruction.dest] = value(instruction.a)
+            elif op == BINARY:
+                try:
+                    values[instruction.dest] = BINARY_OPERATIONS[instruction.operator](
+                        value(instruction.a), value(instruction.b))
+                except ZeroDivisionError:
+                    raise NotConstant()  # fica para o erro em tempo de execução
+            elif op == UNARY:
+                values[instruction.dest] = UNARY_OPERATIONS[instruction.operator](value(instruction.a))
+            elif op == CALL:
+                values[instruction.dest] = self.call(
+                    instruction.a, [value(arg) for arg in instruction.b], depth + 1)
+            elif op == RETURN:
+                return value(instruction.a)
+            elif op == JUMP:
+                pc = labels[instruction.a]
+            elif op == BRANCH_TRUE or op == BRANCH_FALSE:
+                if bool(value(instruction.a)) == (op == BRANCH_TRUE):
+                    pc = labels[instruction.b]
+            elif op != LABEL and op != FUNCTION:
+                raise NotConstant()
+        raise NotConstant()  # função Unit: não há valor para propagar
+
+
+def evaluate_calls(module: Module, pure: Set[Function]) -> int:
+    # Troca `t = call f(constantes)` por `t = valor`. Devolve quantas
+    # chamadas foram avaliadas.
+    evaluated = 0
+    for function in module.all_functions():
+        for instruction in function.instructions:
+            if instruction.op != CALL or not all(is_constant(arg) for arg in instruction.b):
+                continue
+            try:
+                result = Evaluator(pure).call(instruction.a, instruction.b)
+            except NotConstant:
+                continue
+            instruction.op, instruction.a, instruction.b = COPY, result, None
+            evaluated += 1
+    return evaluated
+
+
+def inlinable(function: Function) -> bool:
+    # Código linear curto, não recursivo, que termina no único return. Sem
+    # funções aninhadas, nenhuma variável de fora lida pelo corpo deixa de
+    # ser visível no chamador (quem vê a função vê tudo o que ela vê).
+    instructions = function.instructions
+    if not instructions or len(instructions) > INLINE_SIZE or instructions[-1].op != RETURN:
+        return False
+    return all(instruction.op in (COPY, BINARY, UNARY, PRINT)
+               or (instruction.op == CALL and instruction.a is not function)
+               for instruction in instructions[:-1])
+
+
+def inline_call(caller: Function, call: Instruction, next_temp: List[int]) -> List[Instruction]:
+    # Corpo da função chamada, com parâmetros e variáveis locais trocados
+    # por temporários novos do chamador. Cada escrita cria um temporário
+    # novo, de modo que temporários continuam com uma única atribuição.
+    callee = call.a
+    renamed: Dict[object, object] = {}
+
+    def new_temp() -> Temp:
+        next_temp[0] += 1
+        return Temp(next_temp[0] - 1)
+
+    def read(operand):
+        return renamed.get(operand, operand) if type(operand) in (Temp, Var) else operand
+
+    body = []
+    for param, arg in zip(callee.params, call.b):
+        if type(arg) is Var:
+            # Copia: o corpo pode alterar a variável passada (se for de fora)
+            renamed[param] = new_temp()
+            body.append(Instruction(COPY, renamed[param], arg))
+        else:
+            renamed[param] = arg
+    for instruction in callee.instructions:
+        op = instruction.op
+        if op == RETURN:
+            value = read(instruction.a)
+            if body and body[-1].dest is value and type(value) is Temp:
+                body[-1].dest = call.dest  # o valor é calculado direto no destino
+            else:
+                body.append(Instruction(COPY, call.dest, value))
+            break
+        copy = Instruction(op, instruction.dest, instruction.a, instruction.b, instruction.operator)
+        if op == CALL:
+            copy.b = [read(arg) for arg in instruction.b]
+        else:
+            copy.a = read(instruction.a)
+            copy.b = read(instruction.b)
+        dest = instruction.dest
+        if type(dest) is Temp or (type(dest) is Var and is_local(dest, callee)):
+            copy.dest = renamed[dest] = new_temp()
+        body.append(copy)
+    return body
+
+
+def inline_calls(module: Module) -> int:
+    # Copia para o chamador as chamadas de funções pequenas e lineares.
+    # Devolve quantas chamadas foram substituídas.
+    inlined = 0
+    for _ in range(INLINE_ROUNDS):
+        candidates = {function for function in module.functions if inlinable(function)}
+        changed = 0
+        for caller in module.all_functions():
+            if not any(instruction.op == CALL and instruction.a in candidates
+                       for instruction in caller.instructions):
+                continue
+            next_temp = [max((operand.index for instruction in caller.instructions
+                              for operand in [instruction.dest] + operands_read(instruction)
+                              if type(operand) is Temp), default=-1) + 1]
+            instructions = []
+            for instruction in caller.instructions:
+                if instruction.op == CALL and instruction.a in candidates:
+                    instructions.extend(inline_call(caller, instruction, next_temp))
+                    changed += 1
+                else:
+                    instructions.append(instruction)
+            caller.instructions[:] = instructions
+        inlined += changed
+        if not changed:
+            break
+    return inlined
+
+
+def optimize_calls(module: Module) -> Dict[str, int]:
+    # Avalia o que for constante e copia o que for pequeno; a avaliação vem
+    # primeiro, já que uma chamada avaliada não precisa ser copiada
+    pure = pure_functions(module)
+    evaluated = evaluate_calls(module, pure)
+    inlined = inline_calls(module)
+    return {"pure": len(pure), "evaluated": evaluated, "inlined": inlined}
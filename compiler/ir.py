@@ -0,0 +1,170 @@
+# ir.py
+
+import sys
+from typing import List, Optional, TextIO
+
+# Código intermediário de três endereços. Cada instrução é um registro
+# compacto com um opcode inteiro e até três operandos; operandos são
+# constantes (int/bool do Python), temporários (Temp), variáveis (Var) ou,
+# nas instruções de desvio, rótulos (Label).
+OPCODES = (
+    "COPY",          # dest = a
+    "BINARY",        # dest = a <operator> b
+    "UNARY",         # dest = <operator>a
+    "CALL",          # dest = call a(b...)       a: Function, b: lista de operandos
+    "PRINT",         # print a
+    "RETURN",        # return a
+    "LABEL",         # a:
+    "JUMP",          # goto a
+    "BRANCH_TRUE",   # if a goto b
+    "BRANCH_FALSE",  # if not a goto b
+    "FUNCTION",      # definição da função a neste ponto do código
+)
+(COPY, BINARY, UNARY, CALL, PRINT, RETURN, LABEL, JUMP,
+ BRANCH_TRUE, BRANCH_FALSE, FUNCTION) = range(len(OPCODES))
+
+
+# Instruções cujos operandos a e/ou b são lidos (a lista de argumentos de
+# CALL é tratada à parte)
+READS_A = frozenset((COPY, BINARY, UNARY, PRINT, RETURN, BRANCH_TRUE, BRANCH_FALSE))
+READS_B = frozenset((BINARY,))
+
+
+def operands_read(instruction) -> list:
+    op = instruction.op
+    if op == CALL:
+        return instruction.b
+    if op in READS_B:
+        return [instruction.a, instruction.b]
+    if op in READS_A:
+        return [instruction.a]
+    return []
+
+
+class Temp:
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+    def __str__(self):
+        return f"t{self.index}"
+
+    __repr__ = __str__
+
+
+class Var:
+    # Uma variável (ou parâmetro) do programa; há um único Var por Symbol
+    __slots__ = ("name", "symbol")
+
+    def __init__(self, name: str, symbol=None):
+        self.name = name
+        self.symbol = symbol
+
+    def __str__(self):
+        return self.name
+
+    __repr__ = __str__
+
+
+class Label:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    __repr__ = __str__
+
+
+class Instruction:
+    __slots__ = ("op", "dest", "a", "b", "operator")
+
+    def __init__(self, op: int, dest=None, a=None, b=None, operator: Optional[str] = None):
+        self.op = op
+        self.dest = dest
+        self.a = a
+        self.b = b
+        self.operator = operator
+
+    def __repr__(self):
+        return f"Instruction({OPCODES[self.op]}, {format_instruction(self)!r})"
+
+
+class Function:
+    # Lista de instruções de uma função. O código de nível superior fica em
+    # uma Function sem nome (Module.main).
+    __slots__ = ("name", "params", "return_type", "instructions", "symbol", "temp_slots")
+
+    def __init__(self, name: Optional[str], params: List[Var] = (), return_type: str = "Unit", symbol=None):
+        self.name = name
+        self.params = list(params)
+        self.return_type = return_type
+        self.instructions: List[Instruction] = []
+        self.symbol = symbol
+        self.temp_slots = None  # preenchido por liveness.allocate_temps
+
+    def __str__(self):
+        return self.name or "<main>"
+
+
+class Module:
+    def __init__(self):
+        self.main = Function(None)
+        self.functions: List[Function] = []  # na ordem de declaração, inclusive aninhadas
+
+    def all_functions(self) -> List[Function]:
+        return [self.main] + self.functions
+
+    def instruction_count(self) -> int:
+        return sum(len(function.instructions) for function in self.all_functions())
+
+
+# Formato textual de cada opcode, indexado pelo próprio opcode
+FORMATS = (
+    lambda i: f"{i.dest} = {i.a}",
+    lambda i: f"{i.dest} = {i.a} {i.operator} {i.b}",
+    lambda i: f"{i.dest} = {i.operator}{i.a}",
+    lambda i: f"{i.dest} = call {i.a}({', '.join(map(str, i.b))})",
+    lambda i: f"print {i.a}",
+    lambda i: f"return {i.a}",
+    lambda i: f"{i.a}:",
+    lambda i: f"goto {i.a}",
+    lambda i: f"if {i.a} goto {i.b}",
+    lambda i: f"if not {i.a} goto {i.b}",
+    lambda i: f"function {i.a}",
+)
+
+
+def format_instruction(instruction: Instruction) -> str:
+    return FORMATS[instruction.op](instruction)
+
+
+def format_lines(function: Function, lines: List[str]):
+    # Funções aninhadas são escritas no ponto em que foram declaradas
+    formats = FORMATS
+    append = lines.append
+    for instruction in function.instructions:
+        op = instruction.op
+        if op != FUNCTION:
+            append(formats[op](instruction))
+        else:
+            nested = instruction.a
+            params = ", ".join(f"{param}: {param.symbol.type}" for param in nested.params)
+            lines.append(f"function {nested.name}({params}) : {nested.return_type}")
+            format_lines(nested, lines)
+            lines.append(f"end function {nested.name}")
+
+
+def format_module(module: Module) -> str:
+    lines = ["Iniciando geração de código intermediário...\n"]
+    format_lines(module.main, lines)
+    lines.append("")
+    return "\n".join(lines)
+
+
+def write_module(module: Module, out: TextIO = None):
+    # Monta o texto inteiro e o escreve de uma vez
+    (out or sys.stdout).write(format_module(module))
@@ -1,30 +1,34 @@
 import re
-from typing import List, Tuple
-from Token import Token
+from typing import Iterator, List, Optional, Tuple
+from Token import Token, TOKEN_KIND
+from diagnostics import Diagnostics
+from token_stream import TokenStream
 
-tokens = [
-    # reserved tokens
-    (r"\bif\b", "IF"),
-    (r"\belse\b", "ELSE"),
+# palavras reservadas: resolvidas por tabela a partir dos identificadores
+keywords = {
+    "if": "IF",
+    "else": "ELSE",
 
-    (r"\bwhile\b", "WHILE"),
-    (r"\bbreak\b", "BREAK"),
-    (r"\bcontinue\b", "CONTINUE"),
+    "while": "WHILE",
+    "break": "BREAK",
+    "continue": "CONTINUE",
 
-    (r"\bconst\b", "CONST"),
-    (r"\bval\b", "VARIABLE"),
+    "const": "CONST",
+    "val": "VARIABLE",
 
-    (r"\bInt\b", "INT"),
-    (r"\bBool\b", "BOOL"),
+    "Int": "INT",
+    "Bool": "BOOL",
 
-    (r"\btrue\b", "TRUE"),
-    (r"\bfalse\b", "FALSE"),
+    "true": "TRUE",
+    "false": "FALSE",
 
-    (r"\bfun\b", "FUNCTION"),
-    (r"\breturn\b", "RETURN"),
+    "fun": "FUNCTION",
+    "return": "RETURN",
 
-    (r"\bprint\b", "PRINT"),
+    "print": "PRINT",
+}
 
+tokens = [
     # symbols
     (r":", "COLON"),
     (r"==", "EQUAL"),
@@ -49,6 +53,17 @@ tokens = [
     (r"\b[0-9]+\b", "INTEGER"),
 ]
 
+# Toda a tabela compilada uma única vez em uma alternância com grupos nomeados.
+# Espaços e quebras de linha também são grupos, para que a varredura avance
+# apenas por deslocamento, sem recortar a string.
+master_pattern = re.compile(
+    "|".join(
+        [r"(?P<NEWLINE>\n)", r"(?P<SKIP>[^\S\n]+)"]
+        + [f"(?P<{type}>{rule})" for rule, type in tokens]
+    )
+)
+
+
 class LexerError(Exception):
     def __init__(self, message: str, line: int, column: int):
         self.message = message
@@ -57,41 +72,120 @@ class LexerError(Exception):
         super().__init__(f"{message} (linha {line}, coluna {column})")
 
 
+def unexpected(code: str, position: int, line_number: int, line_start: int,
+               diagnostics: Optional[Diagnostics]):
+    # Sem coletor, o primeiro caractere inválido interrompe a varredura; com
+    # ele, o erro é registrado e o caractere ignorado.
+    error = LexerError(f"Erro, token inesperado: '{code[position]}'", line_number, position - line_start + 1)
+    if diagnostics is None:
+        raise error
+    diagnostics.error("lexer", error.message, error.line, error.column)
+
+
+def scan(code: str, line_number: int = 1, diagnostics: Optional[Diagnostics] = None) -> Iterator[Token]:
+    match = master_pattern.match
+    position = 0
+    end = len(code)
+    line_start = 0  # deslocamento do início da linha atual
+    while position < end:
+        found = match(code, position)
+        if found is None:
+            unexpected(code, position, line_number, line_start, diagnostics)
+            position += 1
+            continue
+        type = found.lastgroup
+        start = position
+        position = found.end()
+        if type == "SKIP":
+            continue
+        if type == "NEWLINE":
+            line_number += 1
+            line_start = position
+            continue
+        value = found.group()
+        if type == "IDENTIFIER":
+            type = keywords.get(value, type)
+        yield Token(type, value, line_number, start - line_start + 1)
+
+
+keyword_kinds = {value: TOKEN_KIND[type] for value, type in keywords.items()}
+group_kinds = {type: TOKEN_KIND[type] for _, type in tokens}
+
+
+def scan_to_stream(code: str, diagnostics: Optional[Diagnostics] = None) -> TokenStream:
+    # Mesma varredura de scan(), mas gravando apenas tipo, posições e linha
+    # em um TokenStream, sem criar objetos Token.
+    stream = TokenStream(code)
+    append = stream.append
+    line_starts = stream.line_starts
+    match = master_pattern.match
+    identifier = TOKEN_KIND["IDENTIFIER"]
+    position = 0
+    end = len(code)
+    line_number = 1
+    while position < end:
+        found = match(code, position)
+        if found is None:
+            unexpected(code, position, line_number, line_starts[-1], diagnostics)
+            position += 1
+            continue
+        type = found.lastgroup
+        start = position
+        position = found.end()
+        if type == "SKIP":
+            continue
+        if type == "NEWLINE":
+            line_number += 1
+            line_starts.append(position)
+            continue
+        kind = group_kinds[type]
+        if kind == identifier:
+            kind = keyword_kinds.get(code[start:position], kind)
+        append(kind, start, position, line_number)
+    stream.finish()
+    return stream
+
+
+def stream_file(path: str, chunk_size: int = 1 << 16, diagnostics: Optional[Diagnostics] = None) -> Iterator[Token]:
+    # Lê o arquivo em blocos e gera os tokens sob demanda. Nenhum token
+    # atravessa uma quebra de linha, então cada bloco é cortado no último '\n'
+    # e o restante segue para o próximo; a memória fica limitada ao tamanho do
+    # bloco mais a maior linha do arquivo.
+    line_number = 1
+    pending = ""
+    with open(path, "r") as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            text = pending + chunk
+            cut = text.rfind("\n") + 1
+            pending = text[cut:]
+            if cut:
+                yield from scan(text[:cut], line_number, diagnostics)
+                line_number += text.count("\n", 0, cut)
+    if pending:
+        yield from scan(pending, line_number, diagnostics)
+
+
 class Lexer:
-    def __init__(self, code: str):
+    def __init__(self, code: str, diagnostics: Optional[Diagnostics] = None):
         self.code = code
         self.list_tokens: list[Token] = []
         self.rules: List[Tuple[str, str]] = tokens
+        self.diagnostics = diagnostics
     
     def tokenize(self):
-        lines = self.code.split("\n")
-        for i, line in enumerate(lines):
-            
-            self.tokenize_line(line, i +1)
-            
-    
+        self.list_tokens.extend(scan(self.code, diagnostics=self.diagnostics))
+
+    def token_stream(self) -> TokenStream:
+        return scan_to_stream(self.code, self.diagnostics)
+
+    def stream(self) -> Iterator[Token]:
+        return scan(self.code, diagnostics=self.diagnostics)
+
     def tokenize_line(self, line: str, line_number: int):
-        line_tokens = []
-        line = line.strip()
-        position = 0
-
-        while line:
-            find = False
-            for rule, type in self.rules:
-                match = re.match(rule, line)
-                if match:
-                    find = True
-                    value = match.group(0)
-                    line_tokens.append(Token(type, value, line_number))
-                    position += len(value)
-                    line = line[len(value):].strip()
-                    break
-
-            if not find:
-                column = position + 1
-                raise LexerError(f"Erro, token inesperado: '{line[0]}'", line_number + 1, column)
-
-        self.list_tokens.extend(line_tokens)
+        self.list_tokens.extend(list(scan(line, line_number, self.diagnostics)))
 
     def print_tokens(self):
         for token in self.list_tokens:
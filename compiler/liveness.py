@@ -0,0 +1,130 @@
+# liveness.py
+
+import heapq
+from typing import Dict, List, Set, Tuple
+from ir import (
+    Module, Function, Temp, operands_read,
+    RETURN, LABEL, JUMP, BRANCH_TRUE, BRANCH_FALSE,
+)
+
+
+def successors(function: Function) -> List[Tuple[int, ...]]:
+    # Índices das instruções que podem executar logo depois de cada instrução
+    instructions = function.instructions
+    labels = {instruction.a: index for index, instruction in enumerate(instructions) if instruction.op == LABEL}
+    result = []
+    for index, instruction in enumerate(instructions):
+        op = instruction.op
+        if op == JUMP:
+            result.append((labels[instruction.a],))
+        elif op == RETURN:
+            result.append(())
+        elif op == BRANCH_TRUE or op == BRANCH_FALSE:
+            result.append((index + 1, labels[instruction.b]))
+        else:
+            result.append((index + 1,))
+    return result
+
+
+def live_temps(function: Function) -> List[Set[Temp]]:
+    # Temporários vivos na saída de cada instrução. Análise para trás,
+    # repetida até o ponto fixo por causa dos laços. Variáveis não entram:
+    # ficam no quadro da função e podem ser lidas por funções aninhadas.
+    instructions = function.instructions
+    count = len(instructions)
+    following = successors(function)
+    uses = []
+    for instruction in instructions:
+        uses.append([operand for operand in operands_read(instruction) if type(operand) is Temp])
+    live_in: List[Set[Temp]] = [set() for _ in range(count)]
+    live_out: List[Set[Temp]] = [set() for _ in range(count)]
+    changed = True
+    while changed:
+        changed = False
+        for index in range(count - 1, -1, -1):
+            out = set()
+            for successor in following[index]:
+                if successor < count:
+                    out |= live_in[successor]
+            dest = instructions[index].dest
+            live = out - {dest} if type(dest) is Temp else set(out)
+            live.update(uses[index])
+            if live != live_in[index] or out != live_out[index]:
+                live_in[index], live_out[index] = live, out
+                changed = True
+    return live_out
+
+
+def live_intervals(function: Function, live_out: List[Set[Temp]]) -> Dict[Temp, List[int]]:
+    # [início, fim] de cada temporário: da primeira à última instrução em que
+    # ele é escrito, lido ou está vivo. Um temporário escrito e nunca lido
+    # (ex.: o resultado de uma chamada usada como comando) ocupa só a
+    # instrução que o escreve.
+    intervals: Dict[Temp, List[int]] = {}
+
+    def touch(temp, index):
+        interval = intervals.get(temp)
+        if interval is None:
+            intervals[temp] = [index, index]
+        else:
+            interval[0] = min(interval[0], index)
+            interval[1] = max(interval[1], index)
+
+    for index, instruction in enumerate(function.instructions):
+        if type(instruction.dest) is Temp:
+            touch(instruction.dest, index)
+        for operand in operands_read(instruction):
+            if type(operand) is Temp:
+                touch(operand, index)
+        for temp in live_out[index]:
+            touch(temp, index)
+    return intervals
+
+
+def allocate_temps(module: Module) -> Dict[Function, Tuple[int, int]]:
+    # Varredura linear: cada temporário recebe o menor slot livre no início
+    # do seu intervalo, e o slot volta para a reserva depois do fim. Uma
+    # instrução lê os operandos antes de escrever o destino, então um
+    # intervalo que termina onde outro começa pode ceder o slot a ele.
+    #
+    # Os operandos são reescritos com um Temp por slot (numerados a partir
+    # de 0 em cada função) e Function.temp_slots guarda quantos há. Devolve,
+    # por função, (temporários antes da alocação, pico de temporários vivos).
+    report = {}
+    for function in module.all_functions():
+        live_out = live_temps(function)
+        intervals = live_intervals(function, live_out)
+        peak = 0
+        for index, instruction in enumerate(function.instructions):
+            live = len(live_out[index])
+            if type(instruction.dest) is Temp and instruction.dest not in live_out[index]:
+                live += 1
+            peak = max(peak, live)
+
+        slots: List[Temp] = []
+        free: List[int] = []  # heap de slots livres
+        active: List[Tuple[int, int]] = []  # heap de (fim, slot)
+        assigned: Dict[Temp, Temp] = {}
+        for temp, (start, end) in sorted(intervals.items(), key=lambda item: item[1][0]):
+            while active and active[0][0] <= start:
+                heapq.heappush(free, heapq.heappop(active)[1])
+            if free:
+                slot = heapq.heappop(free)
+            else:
+                slot = len(slots)
+                slots.append(Temp(slot))
+            heapq.heappush(active, (end, slot))
+            assigned[temp] = slots[slot]
+
+        for instruction in function.instructions:
+            if type(instruction.dest) is Temp:
+                instruction.dest = assigned[instruction.dest]
+            if type(instruction.a) is Temp:
+                instruction.a = assigned[instruction.a]
+            if type(instruction.b) is Temp:
+                instruction.b = assigned[instruction.b]
+            elif type(instruction.b) is list:
+                instruction.b = [assigned[arg] if type(arg) is Temp else arg for arg in instruction.b]
+        function.temp_slots = len(slots)
+        report[function] = (len(intervals), peak)
+    return report
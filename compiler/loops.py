@@ -0,0 +1,277 @@
+# loops.py
+
+from typing import Dict, List, Optional, Set
+from ir import (
+    Module, Function, Instruction, Temp, Var, Label, operands_read,
+    COPY, BINARY, UNARY, CALL, LABEL, JUMP, BRANCH_TRUE, BRANCH_FALSE,
+)
+from operations import is_constant, wrap_int
+from cfg import (
+    ControlFlowGraph, BasicBlock, build_cfg, dominators, back_edges, promotable_symbols, rename_operands,
+)
+
+# Otimizações de laço sobre o grafo de fluxo de controle: cada laço natural
+# (um while do programa) ganha um pré-cabeçalho, para onde vão os cálculos
+# que não mudam entre as voltas, e multiplicações por uma variável de
+# indução viram uma soma acumulada. Os laços mais internos são tratados
+# primeiro, para que o que sai deles possa sair também do laço de fora.
+
+
+class Loop:
+    __slots__ = ("header", "blocks")
+
+    def __init__(self, header: BasicBlock, blocks: Set[BasicBlock]):
+        self.header = header
+        self.blocks = blocks
+
+
+class LoopReport:
+    # Instruções do laço (pré-cabeçalho fora) antes e depois das otimizações
+    __slots__ = ("function", "header", "before", "after", "hoisted", "reduced")
+
+    def __init__(self, function: Function, header: str, before: int):
+        self.function = function
+        self.header = header
+        self.before = before
+        self.after = before
+        self.hoisted = 0
+        self.reduced = 0
+
+    def __str__(self):
+        return (f"Laço {self.header} em {self.function}: {self.before} -> {self.after} instruções "
+                f"({self.hoisted} invariantes movidas, {self.reduced} multiplicações reduzidas).")
+
+
+def natural_loops(cfg: ControlFlowGraph) -> List[Loop]:
+    # Um laço por cabeçalho (as arestas de volta de um mesmo while, como as
+    # de um continue, se juntam), do mais interno para o mais externo
+    idom = dominators(cfg)
+    bodies: Dict[BasicBlock, Set[BasicBlock]] = {}
+    for source, header in back_edges(cfg, idom):
+        body = bodies.setdefault(header, {header})
+        pending = [source]
+        while pending:
+            block = pending.pop()
+            if block not in body:
+                body.add(block)
+                pending.extend(block.predecessors)
+    loops = [Loop(header, blocks) for header, blocks in bodies.items()]
+    loops.sort(key=lambda loop: len(loop.blocks))
+    return loops
+
+
+def loop_instructions(cfg: ControlFlowGraph, loop: Loop) -> List[Instruction]:
+    return [instruction for block in cfg.blocks if block in loop.blocks for instruction in block.instructions]
+
+
+def add_preheader(cfg: ControlFlowGraph, loop: Loop) -> Optional[BasicBlock]:
+    # Bloco novo logo antes do cabeçalho, por onde passam todas as entradas
+    # no laço. Se o bloco anterior ao cabeçalho for do próprio laço e
+    # continuar nele sem desvio, o laço fica como está.
+    header = loop.header
+    position = cfg.blocks.index(header)
+    if position > 0:
+        previous = cfg.blocks[position - 1]
+        if previous in loop.blocks and header in previous.successors:
+            last = previous.terminator()
+            if last is None or last.op != JUMP:
+                return None
+    label = Label(f"{header.name}_pre")
+    preheader = BasicBlock(0, [Instruction(LABEL, a=label)])
+    for predecessor in header.predecessors:
+        if predecessor in loop.blocks:
+            continue
+        last = predecessor.terminator()
+        if last is not None and last.op == JUMP and last.a is header.label:
+            last.a = label
+        elif last is not None and last.op in (BRANCH_TRUE, BRANCH_FALSE) and last.b is header.label:
+            last.b = label
+    cfg.blocks.insert(position, preheader)
+    return preheader
+
+
+class LoopOptimizer:
+    def __init__(self, module: Module):
+        self.module = module
+        self.reports: List[LoopReport] = []
+
+    def optimize(self) -> List[LoopReport]:
+        for function in self.module.all_functions():
+            self.optimize_function(function)
+        return self.reports
+
+    def optimize_function(self, function: Function):
+        # Cada transformação muda os blocos: o grafo é reconstruído antes de
+        # cada laço, e os já tratados são reconhecidos pelo rótulo
+        promotable = promotable_symbols(self.module, function)
+        done = set()
+        while True:
+            cfg = build_cfg(function)
+            loop = next((loop for loop in natural_loops(cfg) if loop.header.label not in done), None)
+            if loop is None:
+                return
+            done.add(loop.header.label)
+            report = LoopReport(function, loop.header.name, len(loop_instructions(cfg, loop)))
+            preheader = add_preheader(cfg, loop)
+            if preheader is not None:
+                report.hoisted = self.hoist_invariants(cfg, loop, preheader, promotable)
+                report.reduced = self.reduce_strength(cfg, loop, preheader, promotable)
+                report.after = len(loop_instructions(cfg, loop))
+                function.instructions[:] = cfg.instructions()
+            self.reports.append(report)
+
+    def hoist_invariants(self, cfg, loop: Loop, preheader: BasicBlock, promotable) -> int:
+        # Move para o pré-cabeçalho as instruções que escrevem um temporário
+        # a partir de operandos que não mudam no laço. Variáveis lidas só
+        # contam como invariantes se nenhuma instrução do laço as escreve e,
+        # havendo chamadas no laço, se nenhuma outra função as enxerga. Uma
+        # divisão só sai do laço se o divisor for uma constante diferente de
+        # zero (no pré-cabeçalho ela executaria mesmo sem nenhuma volta).
+        instructions = loop_instructions(cfg, loop)
+        written = {instruction.dest for instruction in instructions if instruction.dest is not None}
+        has_calls = any(instruction.op == CALL for instruction in instructions)
+        invariant_temps = set()
+
+        def invariant(operand) -> bool:
+            if is_constant(operand):
+                return True
+            if type(operand) is Temp:
+                return operand not in written or operand in invariant_temps
+            return operand not in written and (not has_calls or operand.symbol in promotable)
+
+        hoisted = []
+        changed = True
+        while changed:
+            changed = False
+            for block in cfg.blocks:
+                if block not in loop.blocks:
+                    continue
+                kept = []
+                for instruction in block.instructions:
+                    op = instruction.op
+                    if op in (COPY, BINARY, UNARY) and type(instruction.dest) is Temp \
+                            and all(invariant(operand) for operand in operands_read(instruction)) \
+                            and not (op == BINARY and instruction.operator == "DIVIDE"
+                                     and not (is_constant(instruction.b) and instruction.b != 0)):
+                        invariant_temps.add(instruction.dest)
+                        hoisted.append(instruction)
+                        changed = True
+                        continue
+                    kept.append(instruction)
+                block.instructions[:] = kept
+        preheader.instructions.extend(hoisted)
+        return len(hoisted)
+
+    def reduce_strength(self, cfg, loop: Loop, preheader: BasicBlock, promotable) -> int:
+        # Variável de indução: uma variável local escrita uma única vez no
+        # laço, com `t = v + c` (ou v - c) e `v = t`. Cada `t2 = v * k` com k
+        # invariante passa a ler um acumulador s que vale v * k em todo o
+        # laço: a multiplicação de cada volta vira uma soma. Os acumuladores
+        # entram em definitions assim que são criados: quem lê um deles (como
+        # `s * v`, vindo de v * k * v) não é invariante.
+        instructions = loop_instructions(cfg, loop)
+        definitions: Dict[object, List[Instruction]] = {}
+        for instruction in instructions:
+            if instruction.dest is not None:
+                definitions.setdefault(instruction.dest, []).append(instruction)
+        has_calls = any(instruction.op == CALL for instruction in instructions)
+
+        def invariant(operand) -> bool:
+            if is_constant(operand):
+                return type(operand) is int
+            if type(operand) is Temp:
+                return operand not in definitions
+            return operand not in definitions and (not has_calls or operand.symbol in promotable)
+
+        steps: Dict[Var, tuple] = {}  # variável de indução -> (atualização, operador, passo)
+        for dest, defs in definitions.items():
+            if type(dest) is not Var or dest.symbol not in promotable or len(defs) != 1 or defs[0].op != COPY:
+                continue
+            update = definitions.get(defs[0].a)
+            if not update or len(update) != 1 or update[0].op != BINARY:
+                continue
+            increment = update[0]
+            if increment.operator == "PLUS" and increment.b is dest and type(increment.a) is int:
+                steps[dest] = (defs[0], "PLUS", increment.a)
+            elif increment.operator in ("PLUS", "MINUS") and increment.a is dest and type(increment.b) is int:
+                steps[dest] = (defs[0], increment.operator, increment.b)
+
+        reduced: Dict[tuple, Temp] = {}  # (v, k) -> s
+        count = 0
+        for block in cfg.blocks:
+            if block not in loop.blocks:
+                continue
+            for instruction in list(block.instructions):
+                if instruction.op != BINARY or instruction.operator != "MULTIPLY":
+                    continue
+                a, b = instruction.a, instruction.b
+                if a in steps and invariant(b):
+                    key = (a, b)
+                elif b in steps and invariant(a):
+                    key = (b, a)
+                else:
+                    continue
+                accumulator = reduced.get(key)
+                if accumulator is None:
+                    [accumulator] = self.new_temps(cfg, 1)
+                    update = self.maintain(cfg, preheader, accumulator, key, steps[key[0]], set(reduced.values()))
+                    reduced[key] = accumulator
+                    definitions[accumulator] = [update]
+                self.replace_product(cfg, block, instruction, accumulator, steps[key[0]][0])
+                count += 1
+        return count
+
+    @staticmethod
+    def replace_product(cfg, block: BasicBlock, product: Instruction, accumulator: Temp, update: Instruction):
+        # As leituras do produto no mesmo bloco, antes de uma nova
+        # atualização da variável de indução, passam a ler o acumulador; se
+        # não sobrar nenhuma, o produto desaparece, senão vira uma cópia
+        position = block.instructions.index(product)
+        dest = product.dest
+        for instruction in block.instructions[position + 1:]:
+            if instruction is update:
+                break
+            rename_operands(instruction, lambda operand: accumulator if operand is dest else operand)
+        if any(dest in operands_read(instruction) for other in cfg.blocks for instruction in other.instructions):
+            product.op, product.a, product.b, product.operator = COPY, accumulator, None, None
+        else:
+            del block.instructions[position]
+
+    def maintain(self, cfg, preheader: BasicBlock, accumulator: Temp, key: tuple, step: tuple,
+                 accumulators: Set[Temp]) -> Instruction:
+        # s = v * k no pré-cabeçalho; s = s + c * k depois de cada v = v + c,
+        # e depois das atualizações dos acumuladores já criados (na ordem em
+        # que foram criados). O acumulador é o único temporário com mais de
+        # uma atribuição: ele nunca recebe uma constante, então o constant
+        # folding não o toca.
+        variable, factor = key
+        update, operator, increment = step
+        preheader.instructions.append(Instruction(BINARY, accumulator, variable, factor, "MULTIPLY"))
+        if is_constant(factor):
+            delta = wrap_int(factor * increment)
+        elif increment == 1:
+            delta = factor
+        else:
+            [delta] = self.new_temps(cfg, 1)
+            preheader.instructions.append(Instruction(BINARY, delta, factor, increment, "MULTIPLY"))
+        instruction = Instruction(BINARY, accumulator, accumulator, delta, operator)
+        for block in cfg.blocks:
+            if update in block.instructions:
+                position = block.instructions.index(update) + 1
+                while position < len(block.instructions) and block.instructions[position].dest in accumulators:
+                    position += 1
+                block.instructions.insert(position, instruction)
+                break
+        return instruction
+
+    @staticmethod
+    def new_temps(cfg, count: int) -> List[Temp]:
+        # Índices novos, depois do maior usado na função
+        used = [operand.index for block in cfg.blocks for instruction in block.instructions
+                for operand in [instruction.dest] + operands_read(instruction) if type(operand) is Temp]
+        first = max(used, default=-1) + 1
+        return [Temp(first + offset) for offset in range(count)]
+
+
+def optimize_loops(module: Module) -> List[LoopReport]:
+    return LoopOptimizer(module).optimize()
@@ -1,34 +1,207 @@
-from lexer import Lexer, LexerError
+import argparse
+import sys
+from lexer import Lexer, LexerError, stream_file
 from parser import Parser, ParserError
 from semantic_analyzer import SemanticAnalyzer, SemanticError
 from code_generator import CodeGenerator
+from ir import write_module
+from constant_folding import fold_constants
+from inlining import optimize_calls
+from loops import optimize_loops
+from dead_code import prune_unreachable, eliminate_dead_code
+from liveness import allocate_temps
+from cfg import write_dot
+from bytecode import compile_module
+from vm import VMError, DEFAULT_BUDGET, run
+import python_generator
+from python_generator import PythonGenerator
+from c_generator import CGenerator, CBackendError, compile_c, run_c
+from diagnostics import Diagnostics
+from stats import CompilationStats, DISABLED, PHASES, ast_node_counts
+from ast_arena import ASTArena
 
-def main():
+def report_diagnostics(path: str) -> int:
+    # Executa todas as fases com um único coletor e imprime todos os
+    # diagnósticos de uma vez, em JSON. O código de saída é 1 se houve erro.
+    with open(path, 'r') as file:
+        code = file.read()
+    diagnostics = Diagnostics()
+    tokens = Lexer(code, diagnostics).token_stream()
+    ast = Parser(tokens, diagnostics).parse()
+    SemanticAnalyzer(diagnostics).analyze(ast)
+    prune_unreachable(ast, diagnostics)
+    print(diagnostics.to_json(file=path))
+    return 1 if diagnostics.has_errors() else 0
+
+def write_stats(stats: CompilationStats, args):
+    # As fases que chegaram a rodar (a compilação pode ter parado num erro)
+    stats.stop()
+    if args.profile_output and stats.profiler is not None:
+        stats.profiler.dump_stats(args.profile_output)
+    report = stats.to_json(file=args.arquivo, optimize=args.optimize, backend=args.backend)
+    if args.stats_file:
+        with open(args.stats_file, 'w') as file:
+            file.write(report + "\n")
+    else:
+        print(report, file=sys.stderr)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Compilador da linguagem simplificada.")
+    arg_parser.add_argument('arquivo', nargs='?', default='./teste.kt', help="arquivo fonte (padrão: ./teste.kt)")
+    arg_parser.add_argument('--json', action='store_true',
+                            help="reporta todos os diagnósticos de uma vez, em JSON, sem gerar código")
+    arg_parser.add_argument('-O', '--optimize', action='store_true',
+                            help="otimiza o código intermediário (o relatório vai para stderr)")
+    arg_parser.add_argument('--run', action='store_true',
+                            help="executa o programa na máquina virtual em vez de imprimir tokens e código")
+    arg_parser.add_argument('--backend', choices=('vm', 'python', 'c'), default='vm',
+                            help="vm: código intermediário e máquina virtual; python: traduz para Python; "
+                                 "c: traduz para C e compila com cc -O2 (sem --run/-o, imprime o código gerado)")
+    arg_parser.add_argument('-o', '--output', metavar='EXECUTAVEL',
+                            help="com --backend c, grava o executável compilado neste caminho")
+    arg_parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                            help=f"limite de instruções executadas com --run (padrão: {DEFAULT_BUDGET})")
+    arg_parser.add_argument('--dot', metavar='ARQUIVO',
+                            help="grava o grafo de fluxo de controle de cada função em formato DOT "
+                                 "(laços destacados)")
+    arg_parser.add_argument('--ssa', action='store_true', help="com --dot, mostra o grafo em forma SSA")
+    arg_parser.add_argument('--stream', action='store_true',
+                            help="lê o arquivo em blocos e entrega os tokens ao parser sob demanda, sem guardar o "
+                                 "código nem os tokens (não lista os tokens; com --stats, a tokenização entra no "
+                                 "tempo do parser)")
+    arg_parser.add_argument('--arena', action='store_true',
+                            help="constrói a AST direto em arrays (ASTArena), com menos memória em programas "
+                                 "grandes")
+    arg_parser.add_argument('--stats', action='store_true',
+                            help="mede tempo e pico de memória (tracemalloc) de cada fase e conta tokens, nós da "
+                                 "AST, escopos e temporários; o JSON vai para stderr")
+    arg_parser.add_argument('--stats-file', metavar='ARQUIVO', help="com --stats, grava o JSON neste arquivo")
+    arg_parser.add_argument('--profile', choices=PHASES, metavar='FASE',
+                            help=f"com --stats, executa a fase sob o cProfile ({', '.join(PHASES)}); "
+                                 "as funções mais caras entram no JSON")
+    arg_parser.add_argument('--profile-output', metavar='ARQUIVO',
+                            help="com --profile, grava o perfil completo (formato do pstats)")
+    args = arg_parser.parse_args(argv)
+    if args.json:
+        return report_diagnostics(args.arquivo)
+
+    stats = DISABLED
+    if args.stats or args.stats_file or args.profile:
+        stats = CompilationStats(profile_phase=args.profile)
+        stats.start()
     try:
-        # Lê o código do arquivo
-        with open('./teste.kt', 'r') as file:
-            code = file.read()
-
-        # Executa o lexer
-        lexer = Lexer(code)
-        lexer.tokenize()
-        tokens = lexer.list_tokens
-        
-        print("Tokens gerados pelo lexer:")
-        for token in tokens:
-            print(token)
+        if args.stream:
+            # Os tokens são gerados à medida que o parser os consome
+            tokens = stream_file(args.arquivo)
+        else:
+            # Lê o código do arquivo
+            with open(args.arquivo, 'r') as file:
+                code = file.read()
+
+            # Executa o lexer
+            with stats.phase("lexer"):
+                lexer = Lexer(code)
+                tokens = lexer.token_stream()
+            if stats.enabled:
+                stats.count("tokens", len(tokens))
+
+            if not (args.run or args.output):
+                print("Tokens gerados pelo lexer:")
+                for token in tokens:
+                    print(token)
 
         # Inicializa o parser com os tokens
-        parser = Parser(tokens)
-        ast = parser.parse()
+        with stats.phase("parser"):
+            parser = Parser(tokens)
+            ast = ASTArena.from_parser(parser).program() if args.arena else parser.parse()
+        if stats.enabled:
+            if args.stream:
+                stats.count("tokens", parser.tokens.current)
+            nodes = ast_node_counts(ast)
+            stats.count("ast_nodes", sum(nodes.values()))
+            stats.count("ast_nodes_by_class", nodes)
+            stats.count("scopes_entered", parser.symbols.scopes_entered)
+            stats.count("symbol_lookups", parser.symbols.lookups)
 
         # Executa a análise semântica
-        semantic_analyzer = SemanticAnalyzer()
-        semantic_analyzer.analyze(ast)
+        with stats.phase("semantic"):
+            semantic_analyzer = SemanticAnalyzer()
+            semantic_analyzer.analyze(ast)
+
+        # Remove os comandos inalcançáveis antes de gerar o código
+        if args.optimize:
+            warnings = Diagnostics()
+            with stats.phase("optimize"):
+                removed = prune_unreachable(ast, warnings)
+            for warning in warnings:
+                print(warning, file=sys.stderr)
+            print(f"Código inalcançável: {removed} comandos removidos.", file=sys.stderr)
+
+        if args.backend == 'python':
+            with stats.phase("backend"):
+                source = PythonGenerator().generate(ast)
+            if args.run:
+                with stats.phase("run"):
+                    python_generator.run(source)
+            else:
+                print(source, end="")
+            return 0
 
         # Se a análise semântica passou, gera o código
-        generator = CodeGenerator()
-        generator.generate(ast)
+        with stats.phase("codegen"):
+            generator = CodeGenerator()
+            module = generator.generate(ast)
+        if stats.enabled:
+            stats.count("temps", generator.temp_counter)
+            stats.count("labels", generator.label_counter)
+            stats.count("calls", generator.calls)
+            stats.count("instructions", module.instruction_count())
+        if args.optimize:
+            with stats.phase("optimize"):
+                removed = fold_constants(module)
+                calls = optimize_calls(module)
+            print(f"Chamadas: {calls['pure']} funções puras, {calls['evaluated']} avaliadas em tempo "
+                  f"de compilação, {calls['inlined']} expandidas no chamador.", file=sys.stderr)
+            with stats.phase("optimize"):
+                removed += fold_constants(module)
+            print(f"Constant folding: {removed} instruções removidas.", file=sys.stderr)
+            with stats.phase("optimize"):
+                removed = eliminate_dead_code(module)
+            print(f"Código morto: {removed} instruções removidas.", file=sys.stderr)
+            with stats.phase("optimize"):
+                reports = optimize_loops(module)
+            for report in reports:
+                print(report, file=sys.stderr)
+        if args.dot:
+            with open(args.dot, 'w') as file:
+                write_dot(module, file, args.ssa)
+        if args.optimize:
+            # O compilador C faz a própria alocação de registradores
+            if args.backend != 'c':
+                with stats.phase("optimize"):
+                    allocation = allocate_temps(module)
+                for function, (temps, peak) in allocation.items():
+                    print(f"Temporários em {function}: {temps} -> {function.temp_slots} slots "
+                          f"(pico de {peak} vivos).", file=sys.stderr)
+        if stats.enabled and args.optimize:
+            stats.count("instructions_optimized", module.instruction_count())
+        if args.backend == 'c':
+            with stats.phase("backend"):
+                source = CGenerator().generate(module)
+                if args.output:
+                    compile_c(source, args.output)
+            if args.run:
+                with stats.phase("run"):
+                    return run_c(source)
+            if not args.output:
+                print(source, end="")
+        elif args.run:
+            with stats.phase("backend"):
+                bytecode = compile_module(module)
+            with stats.phase("run"):
+                run(bytecode, args.budget)
+        else:
+            write_module(module)
         
     except LexerError as le:
         print(f"Erro léxico: {le}")
@@ -36,6 +209,16 @@ def main():
         print(f"Erro de análise sintática: {pe}")
     except SemanticError as se:
         print(f"Erro semântico: {se}")
+    except VMError as ve:
+        print(f"Erro de execução: {ve}")
+        return 1
+    except CBackendError as ce:
+        print(f"Erro no backend C: {ce}")
+        return 1
+    finally:
+        if stats.enabled:
+            write_stats(stats, args)
+    return 0
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
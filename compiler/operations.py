@@ -0,0 +1,43 @@
+# operations.py
+
+# Semântica dos operadores da linguagem, compartilhada pelas otimizações (que
+# avaliam expressões constantes em tempo de compilação) e pelos backends.
+# Int é um inteiro de 32 bits com sinal, como em Kotlin: o resultado das
+# operações aritméticas dá a volta em overflow, e a divisão trunca em
+# direção a zero (divisão por zero lança ZeroDivisionError).
+
+INT_MIN = -(1 << 31)
+INT_MAX = (1 << 31) - 1
+
+
+def wrap_int(value: int) -> int:
+    return (value + (1 << 31)) % (1 << 32) - (1 << 31)
+
+
+def divide(left: int, right: int) -> int:
+    quotient = abs(left) // abs(right)
+    return wrap_int(quotient if (left < 0) == (right < 0) else -quotient)
+
+
+BINARY_OPERATIONS = {
+    "PLUS": lambda left, right: wrap_int(left + right),
+    "MINUS": lambda left, right: wrap_int(left - right),
+    "MULTIPLY": lambda left, right: wrap_int(left * right),
+    "DIVIDE": divide,
+    "EQUAL": lambda left, right: left == right,
+    "DIFFERENT": lambda left, right: left != right,
+    "GREATER": lambda left, right: left > right,
+    "GREATER_OR_EQUAL": lambda left, right: left >= right,
+    "LESS": lambda left, right: left < right,
+    "LESS_OR_EQUAL": lambda left, right: left <= right,
+}
+
+UNARY_OPERATIONS = {
+    "MINUS": lambda operand: wrap_int(-operand),
+    "NOT": lambda operand: not operand,
+}
+
+
+def is_constant(operand) -> bool:
+    # Constantes do código intermediário são os próprios valores do Python
+    return isinstance(operand, (bool, int))
@@ -1,7 +1,11 @@
 # parser.py
 
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from lexer import Token
+from token_stream import TokenBuffer, TokenStream, kind_set
+from Token import TOKEN_KIND, TOKEN_TYPES
+from symbols import SymbolTable
+from diagnostics import Diagnostics
 
 class ParserError(Exception):
     def __init__(self, message, token: Optional[Token] = None):
@@ -10,129 +14,249 @@ class ParserError(Exception):
         super().__init__(self.__str__())
 
     def __str__(self):
+        if self.token and self.token.type == "EOF":
+            return f"[Linha {self.token.line}] Erro: {self.message} (fim do arquivo)"
         if self.token:
             return f"[Linha {self.token.line}] Erro: {self.message} (Token atual: {self.token.value})"
         return f"Erro: {self.message}"
 
 # Nó base da AST com informação de posição
 class ASTNode:
-    def __init__(self, line=None):
+    __slots__ = ("line", "column")
+
+    def __init__(self, line=None, column=None):
         self.line = line
+        self.column = column  # 1-based, do mesmo token que dá a linha
 
 class Program(ASTNode):
-    def __init__(self, declarations: List[ASTNode], line=None):
-        super().__init__(line)
+    __slots__ = ("declarations", "scope")
+
+    def __init__(self, declarations: List[ASTNode], line=None, column=None):
+        super().__init__(line, column)
         self.declarations = declarations
+        self.scope = None  # raiz da árvore de escopos
 
 class VarDecl(ASTNode):
-    def __init__(self, is_const: bool, name: str, var_type: str, initializer: ASTNode, line=None):
-        super().__init__(line)
+    __slots__ = ("is_const", "name", "var_type", "initializer", "symbol")
+
+    def __init__(self, is_const: bool, name: str, var_type: str, initializer: ASTNode, line=None, column=None):
+        super().__init__(line, column)
         self.is_const = is_const
         self.name = name
         self.var_type = var_type
         self.initializer = initializer
+        self.symbol = None  # preenchido na resolução de nomes
 
 class FuncDecl(ASTNode):
-    def __init__(self, name: str, params: List[tuple], return_type: str = "Unit", body: ASTNode = None, line=None):
-        super().__init__(line)
+    __slots__ = ("name", "params", "return_type", "body", "symbol", "scope")
+
+    def __init__(self, name: str, params: List[tuple], return_type: str = "Unit", body: ASTNode = None, line=None, column=None):
+        super().__init__(line, column)
         self.name = name
         self.params = params  # Lista de tuplas (nome, tipo, linha)
         self.return_type = return_type
         self.body = body
+        self.symbol = None  # preenchido na resolução de nomes
+        self.scope = None  # escopo dos parâmetros
 
 class Block(ASTNode):
-    def __init__(self, declarations: List[ASTNode], line=None):
-        super().__init__(line)
+    __slots__ = ("declarations", "scope")
+
+    def __init__(self, declarations: List[ASTNode], line=None, column=None):
+        super().__init__(line, column)
         self.declarations = declarations
+        self.scope = None
 
 class Assignment(ASTNode):
-    def __init__(self, name: str, value: ASTNode, line=None):
-        super().__init__(line)
+    __slots__ = ("name", "value", "symbol")
+
+    def __init__(self, name: str, value: ASTNode, line=None, column=None):
+        super().__init__(line, column)
         self.name = name
         self.value = value
+        self.symbol = None  # preenchido na resolução de nomes
 
 class IfStatement(ASTNode):
-    def __init__(self, condition: ASTNode, then_branch: ASTNode, else_branch: Optional[ASTNode], line=None):
-        super().__init__(line)
+    __slots__ = ("condition", "then_branch", "else_branch")
+
+    def __init__(self, condition: ASTNode, then_branch: ASTNode, else_branch: Optional[ASTNode], line=None, column=None):
+        super().__init__(line, column)
         self.condition = condition
         self.then_branch = then_branch
         self.else_branch = else_branch
 
 class WhileStatement(ASTNode):
-    def __init__(self, condition: ASTNode, body: ASTNode, line=None):
-        super().__init__(line)
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition: ASTNode, body: ASTNode, line=None, column=None):
+        super().__init__(line, column)
         self.condition = condition
         self.body = body
 
 class ReturnStatement(ASTNode):
-    def __init__(self, value: ASTNode, line=None):
-        super().__init__(line)
+    __slots__ = ("value",)
+
+    def __init__(self, value: ASTNode, line=None, column=None):
+        super().__init__(line, column)
         self.value = value
 
 class BreakStatement(ASTNode):
-    def __init__(self, line=None):
-        super().__init__(line)
+    __slots__ = ()
+
+    def __init__(self, line=None, column=None):
+        super().__init__(line, column)
 
 class ContinueStatement(ASTNode):
-    def __init__(self, line=None):
-        super().__init__(line)
+    __slots__ = ()
+
+    def __init__(self, line=None, column=None):
+        super().__init__(line, column)
 
 class PrintStatement(ASTNode):
-    def __init__(self, value: ASTNode, line=None):
-        super().__init__(line)
+    __slots__ = ("value",)
+
+    def __init__(self, value: ASTNode, line=None, column=None):
+        super().__init__(line, column)
         self.value = value
 
 class Expression(ASTNode):
-    pass
+    __slots__ = ("type",)
+
+    def __init__(self, line=None, column=None):
+        super().__init__(line, column)
+        self.type = None  # Type calculado pelo SemanticAnalyzer
 
 class BinaryOp(Expression):
-    def __init__(self, left: Expression, operator: str, right: Expression, line=None):
-        super().__init__(line)
+    __slots__ = ("left", "operator", "right")
+
+    def __init__(self, left: Expression, operator: str, right: Expression, line=None, column=None):
+        super().__init__(line, column)
         self.left = left
         self.operator = operator
         self.right = right
 
 class UnaryOp(Expression):
-    def __init__(self, operator: str, operand: Expression, line=None):
-        super().__init__(line)
+    __slots__ = ("operator", "operand")
+
+    def __init__(self, operator: str, operand: Expression, line=None, column=None):
+        super().__init__(line, column)
         self.operator = operator
         self.operand = operand
 
 class Literal(Expression):
-    def __init__(self, value, line=None):
-        super().__init__(line)
+    __slots__ = ("value",)
+
+    def __init__(self, value, line=None, column=None):
+        super().__init__(line, column)
         self.value = value
 
 class Identifier(Expression):
-    def __init__(self, name: str, line=None):
-        super().__init__(line)
+    __slots__ = ("name", "symbol")
+
+    def __init__(self, name: str, line=None, column=None):
+        super().__init__(line, column)
         self.name = name
+        self.symbol = None  # preenchido na resolução de nomes
 
 class FuncCall(Expression):
-    def __init__(self, name: str, args: List[Expression], line=None):
-        super().__init__(line)
+    __slots__ = ("name", "args", "symbol")
+
+    def __init__(self, name: str, args: List[Expression], line=None, column=None):
+        super().__init__(line, column)
         self.name = name
         self.args = args
+        self.symbol = None  # preenchido na resolução de nomes
+
+# Tabela de precedência dos operadores, indexada pelo tipo do token
+BINARY_PRECEDENCE = {
+    TOKEN_KIND["EQUAL"]: 1,
+    TOKEN_KIND["DIFFERENT"]: 1,
+    TOKEN_KIND["GREATER"]: 2,
+    TOKEN_KIND["GREATER_OR_EQUAL"]: 2,
+    TOKEN_KIND["LESS"]: 2,
+    TOKEN_KIND["LESS_OR_EQUAL"]: 2,
+    TOKEN_KIND["PLUS"]: 3,
+    TOKEN_KIND["MINUS"]: 3,
+    TOKEN_KIND["MULTIPLY"]: 4,
+    TOKEN_KIND["DIVIDE"]: 4,
+}
+UNARY_OPERATORS = {TOKEN_KIND["MINUS"], TOKEN_KIND["NOT"]}
+UNARY_PRECEDENCE = 5
+
+INTEGER = TOKEN_KIND["INTEGER"]
+TRUE = TOKEN_KIND["TRUE"]
+FALSE = TOKEN_KIND["FALSE"]
+IDENTIFIER = TOKEN_KIND["IDENTIFIER"]
+LPAREN = TOKEN_KIND["LPAREN"]
+
+# Tipos aceitos por match(), convertidos uma única vez
+VARIABLE_SET = kind_set("VARIABLE")
+CONST_SET = kind_set("CONST")
+FUNCTION_SET = kind_set("FUNCTION")
+COMMA_SET = kind_set("COMMA")
+COLON_SET = kind_set("COLON")
+IF_SET = kind_set("IF")
+WHILE_SET = kind_set("WHILE")
+RETURN_SET = kind_set("RETURN")
+BREAK_SET = kind_set("BREAK")
+CONTINUE_SET = kind_set("CONTINUE")
+PRINT_SET = kind_set("PRINT")
+ELSE_SET = kind_set("ELSE")
+LPAREN_SET = kind_set("LPAREN")
+TYPE_SET = kind_set("INT", "BOOL")
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: Iterable[Token], diagnostics: Optional[Diagnostics] = None):
+        # Aceita um TokenStream, uma lista ou um gerador de tokens (ex.:
+        # lexer.stream_file); o parser só precisa de um token de lookahead.
+        if not isinstance(tokens, (TokenBuffer, TokenStream)):
+            tokens = TokenBuffer(tokens)
         self.tokens = tokens
-        self.current = 0
-        self.scope_stack = [{}]
+        # Os nomes são resolvidos durante o parsing: cada nó que declara ou
+        # usa um nome recebe o seu Symbol, e o Program recebe a árvore de
+        # escopos. O SemanticAnalyzer consome essas anotações sem refazer a
+        # busca.
+        self.symbols = SymbolTable()
         self.loop_depth = 0  # Controla aninhamento de loops
         self.in_function = False  # Indica se estamos dentro de uma função
+        self.errors: List[ParserError] = []
+        self.diagnostics = diagnostics  # sem coletor, os erros são impressos
 
     def parse(self) -> Program:
         declarations = []
         while not self.is_at_end():
-            try:
-                decl = self.declaration()
-                if decl is not None:
-                    declarations.append(decl)
-            except ParserError as e:
-                print(e)
-                self.synchronize()
-        return Program(declarations, line=declarations[0].line if declarations else None)
+            decl = self.top_level_declaration()
+            if decl is not None:
+                declarations.append(decl)
+        program = Program(declarations, line=declarations[0].line if declarations else None,
+                          column=declarations[0].column if declarations else None)
+        program.scope = self.symbols.root
+        return program
+
+    def top_level_declaration(self) -> Optional[ASTNode]:
+        # Uma declaração de nível superior com recuperação de erro. Se ela falhar
+        # no meio, o estado de escopo, laço e função volta ao nível superior.
+        scope = self.symbols.scope
+        try:
+            return self.declaration()
+        except ParserError as e:
+            self.report(e)
+            self.symbols.unwind(scope)
+            self.loop_depth = 0
+            self.in_function = False
+            self.synchronize()
+            return None
+
+    def report(self, error: ParserError):
+        self.errors.append(error)
+        if self.diagnostics is None:
+            print(error)
+            return
+        token = error.token
+        if token is None:
+            self.diagnostics.error("parser", error.message)
+        else:
+            self.diagnostics.error("parser", error.message, token.line, token.column)
 
     def synchronize(self):
         # Avança tokens até encontrar um ponto de sincronização: ';' ou '}'
@@ -140,38 +264,32 @@ class Parser:
         while not self.is_at_end():
             if self.previous().type == "SEMICOLON":
                 return
-            if self.peek() and self.peek().type == "RBRACE":
+            if self.check("RBRACE"):
                 return
             self.advance()
 
-    def enter_scope(self):
-        self.scope_stack.append({})
-    def exit_scope(self):
-        self.scope_stack.pop()
-    def add_to_scope(self, name, var_type=None, is_const=False, is_function=False, params=None, return_type=None):
-        current_scope = self.scope_stack[-1]
-        if name in current_scope:
+    def check_redeclaration(self, name):
+        if self.symbols.is_declared(name):
             raise ParserError(f"Identificador '{name}' já declarado no escopo atual.", self.peek())
-        current_scope[name] = {
-            "type": var_type,
-            "is_const": is_const,
-            "is_function": is_function,
-            "params": params,
-            "return_type": return_type,
-        }
-
-    def lookup_in_scope(self, name):
-        for scope in reversed(self.scope_stack):
-            if name in scope:
-                return scope[name]
-        raise ParserError(f"Identificador '{name}' não declarado.", self.peek())
+
+    def lookup(self, name, is_function, token):
+        # Variáveis e funções dividem o escopo, mas cada uso procura apenas
+        # pelo seu tipo de símbolo; o outro só serve para escolher a mensagem.
+        symbol = self.symbols.lookup(name, is_function)
+        if symbol is not None:
+            return symbol
+        if self.symbols.lookup(name, not is_function) is None:
+            raise ParserError(f"Identificador '{name}' não declarado.", self.peek())
+        if is_function:
+            raise ParserError(f"'{name}' não é uma função.", token)
+        raise ParserError(f"'{name}' é uma função e não pode ser usado como variável.", token)
 
     def declaration(self) -> Optional[ASTNode]:
-        if self.match("VARIABLE"):  # 'val'
+        if self.match(VARIABLE_SET):  # 'val'
             return self.var_decl(is_const=False)
-        if self.match("CONST"):  # 'const'
+        if self.match(CONST_SET):  # 'const'
             return self.var_decl(is_const=True)
-        if self.match("FUNCTION"):  # 'fun'
+        if self.match(FUNCTION_SET):  # 'fun'
             return self.func_decl()
         return self.statement()
 
@@ -180,12 +298,20 @@ class Parser:
         self.consume("COLON", "Esperado ':' após o nome da variável.")
         var_type = self.consume_type()
         self.consume("ASSIGN", "Esperado '=' na declaração da variável.")
-        initializer = self.expression()
-        self.consume("SEMICOLON", "Esperado ';' após a declaração da variável.")
-        
-        self.add_to_scope(name_token.value, var_type, is_const)
+        try:
+            initializer = self.expression()
+            self.consume("SEMICOLON", "Esperado ';' após a declaração da variável.")
+        except ParserError:
+            # Com nome e tipo conhecidos, a variável é declarada mesmo assim,
+            # para que os usos seguintes não gerem erros em cascata.
+            if not self.symbols.is_declared(name_token.value):
+                self.symbols.declare_variable(name_token.value, var_type, is_const)
+            raise
         
-        return VarDecl(is_const, name_token.value, var_type, initializer, line=name_token.line)
+        self.check_redeclaration(name_token.value)
+        node = VarDecl(is_const, name_token.value, var_type, initializer, line=name_token.line, column=name_token.column)
+        node.symbol = self.symbols.declare_variable(name_token.value, var_type, is_const, node)
+        return node
 
     def func_decl(self) -> FuncDecl:
         name_token = self.consume("IDENTIFIER", "Esperado nome da função.")
@@ -194,27 +320,33 @@ class Parser:
         params = []
         if not self.check("RPAREN"):
             params.append(self.parameter())
-            while self.match("COMMA"):
+            while self.match(COMMA_SET):
                 params.append(self.parameter())
         self.consume("RPAREN", "Esperado ')' após parâmetros da função.")
         
-        if self.match("COLON"):
+        if self.match(COLON_SET):
             return_type = self.consume_type()
         else:
             return_type = "Unit"
         
-        self.add_to_scope(name_token.value, is_function=True, params=params, return_type=return_type)
+        self.check_redeclaration(name_token.value)
+        node = FuncDecl(name_token.value, params, return_type, line=name_token.line, column=name_token.column)
+        node.symbol = self.symbols.function_symbol(name_token.value, params, return_type, node)
+        self.symbols.bind(node.symbol)
         
-        self.enter_scope()
+        node.scope = self.symbols.enter_scope(node.symbol)
         for param_name, param_type, _ in params:
-            self.add_to_scope(param_name, var_type=param_type)
+            self.check_redeclaration(param_name)
+            self.symbols.declare_variable(param_name, param_type)
         
-        prev_in_function = self.in_function
+        prev_in_function, prev_loop_depth = self.in_function, self.loop_depth
         self.in_function = True  # Entramos no escopo de uma função
-        body = self.block()
-        self.in_function = prev_in_function
+        self.loop_depth = 0  # break/continue não atravessam a função
+        node.body = self.block()
+        self.in_function, self.loop_depth = prev_in_function, prev_loop_depth
+        self.symbols.exit_scope()  # escopo dos parâmetros
         
-        return FuncDecl(name_token.value, params, return_type, body, line=name_token.line)
+        return node
 
     def parameter(self) -> tuple:
         name_token = self.consume("IDENTIFIER", "Esperado nome do parâmetro.")
@@ -224,7 +356,7 @@ class Parser:
 
     def block(self) -> Block:
         lbrace_token = self.consume("LBRACE", "Esperado '{' para iniciar o bloco.")
-        self.enter_scope() 
+        scope = self.symbols.enter_scope()
         declarations = []
         while not self.check("RBRACE") and not self.is_at_end():
             try:
@@ -232,36 +364,38 @@ class Parser:
                 if decl is not None:
                     declarations.append(decl)
             except ParserError as e:
-                print(e)
+                self.report(e)
                 self.synchronize()
         self.consume("RBRACE", "Esperado '}' para fechar o bloco.")
-        self.exit_scope()
-        return Block(declarations, line=lbrace_token.line)
+        self.symbols.exit_scope()
+        node = Block(declarations, line=lbrace_token.line, column=lbrace_token.column)
+        node.scope = scope
+        return node
 
     def statement(self) -> ASTNode:
-        if self.match("IF"):
+        if self.match(IF_SET):
             return self.if_statement()
-        if self.match("WHILE"):
+        if self.match(WHILE_SET):
             return self.while_statement()
-        if self.match("RETURN"):
+        if self.match(RETURN_SET):
             return self.return_statement()
-        if self.match("BREAK"):
+        if self.match(BREAK_SET):
             if self.loop_depth == 0:
                 raise ParserError("Comando 'break' usado fora de um loop.", self.peek())
             token = self.previous()
             self.consume("SEMICOLON", "Esperado ';' após 'break'.")
-            return BreakStatement(line=token.line)
-        if self.match("CONTINUE"):
+            return BreakStatement(line=token.line, column=token.column)
+        if self.match(CONTINUE_SET):
             if self.loop_depth == 0:
                 raise ParserError("Comando 'continue' usado fora de um loop.", self.peek())
             token = self.previous()
             self.consume("SEMICOLON", "Esperado ';' após 'continue'.")
-            return ContinueStatement(line=token.line)
-        if self.match("PRINT"):
+            return ContinueStatement(line=token.line, column=token.column)
+        if self.match(PRINT_SET):
             return self.print_statement()
         
-        if self.peek() and self.peek().type == "IDENTIFIER":
-            if (self.current + 1) < len(self.tokens) and self.tokens[self.current + 1].type == "ASSIGN":
+        if self.check("IDENTIFIER"):
+            if self.tokens.check("ASSIGN", 1):
                 return self.assignment()
             else:
                 return self.expression_statement()
@@ -280,9 +414,9 @@ class Parser:
         self.consume("RPAREN", "Esperado ')' após condição do 'if'.")
         then_branch = self.block()
         else_branch = None
-        if self.match("ELSE"):
+        if self.match(ELSE_SET):
             else_branch = self.block()
-        return IfStatement(condition, then_branch, else_branch, line=token.line)
+        return IfStatement(condition, then_branch, else_branch, line=token.line, column=token.column)
 
     def while_statement(self) -> WhileStatement:
         token = self.previous()  # token 'while'
@@ -292,7 +426,7 @@ class Parser:
         self.loop_depth += 1
         body = self.block()
         self.loop_depth -= 1
-        return WhileStatement(condition, body, line=token.line)
+        return WhileStatement(condition, body, line=token.line, column=token.column)
 
     def return_statement(self) -> ReturnStatement:
         token = self.previous()  # token 'return'
@@ -300,7 +434,7 @@ class Parser:
             raise ParserError("Comando 'return' usado fora de função.", token)
         value = self.expression()
         self.consume("SEMICOLON", "Esperado ';' após 'return'.")
-        return ReturnStatement(value, line=token.line)
+        return ReturnStatement(value, line=token.line, column=token.column)
 
     def print_statement(self) -> PrintStatement:
         token = self.previous()  # token 'print'
@@ -308,101 +442,93 @@ class Parser:
         value = self.expression()
         self.consume("RPAREN", "Esperado ')' após expressão do 'print'.")
         self.consume("SEMICOLON", "Esperado ';' após 'print'.")
-        return PrintStatement(value, line=token.line)
+        return PrintStatement(value, line=token.line, column=token.column)
 
     def assignment(self) -> Assignment:
         name_token = self.consume("IDENTIFIER", "Esperado um identificador para atribuição.")
-        self.lookup_in_scope(name_token.value)
+        symbol = self.lookup(name_token.value, False, name_token)
         self.consume("ASSIGN", "Esperado '=' em atribuição.")
         value = self.expression()
         self.consume("SEMICOLON", "Esperado ';' após atribuição.")
-        return Assignment(name_token.value, value, line=name_token.line)
+        node = Assignment(name_token.value, value, line=name_token.line, column=name_token.column)
+        node.symbol = symbol
+        return node
 
     def expression(self) -> Expression:
-        return self.equality()
-
-    def equality(self) -> Expression:
-        expr = self.comparison()
-        while self.match("EQUAL", "DIFFERENT"):
-            operator = self.previous().type
-            right = self.comparison()
-            expr = BinaryOp(expr, operator, right, line=self.previous().line)
-        return expr
-
-    def comparison(self) -> Expression:
-        expr = self.term()
-        while self.match("GREATER", "GREATER_OR_EQUAL", "LESS", "LESS_OR_EQUAL"):
-            operator = self.previous().type
-            right = self.term()
-            expr = BinaryOp(expr, operator, right, line=self.previous().line)
-        return expr
-
-    def term(self) -> Expression:
-        expr = self.factor()
-        while self.match("PLUS", "MINUS"):
-            operator = self.previous().type
-            right = self.factor()
-            expr = BinaryOp(expr, operator, right, line=self.previous().line)
-        return expr
-
-    def factor(self) -> Expression:
-        expr = self.unary()
-        while self.match("MULTIPLY", "DIVIDE"):
-            operator = self.previous().type
-            right = self.unary()
-            expr = BinaryOp(expr, operator, right, line=self.previous().line)
-        return expr
-
-    def unary(self) -> Expression:
-        if self.match("MINUS", "NOT"):
-            operator = self.previous().type
-            operand = self.unary()
-            return UnaryOp(operator, operand, line=self.previous().line)
-        return self.primary()
-
-    def primary(self) -> Expression:
-        if self.match("INTEGER"):
-            token = self.previous()
-            return Literal(int(token.value), line=token.line)
-        if self.match("TRUE"):
-            token = self.previous()
-            return Literal(True, line=token.line)
-        if self.match("FALSE"):
-            token = self.previous()
-            return Literal(False, line=token.line)
-        if self.match("IDENTIFIER"):
-            token = self.previous()
-            identifier = token.value
-            symbol = self.lookup_in_scope(identifier)
-            if self.match("LPAREN"):
-                if not symbol.get("is_function"):
-                    raise ParserError(f"'{identifier}' não é uma função.", token)
-                args = []
-                if not self.check("RPAREN"):
-                    args.append(self.expression())
-                    while self.match("COMMA"):
-                        args.append(self.expression())
-                self.consume("RPAREN", "Esperado ')' após argumentos da função.")
-                return FuncCall(identifier, args, line=token.line)
+        # Parser de precedência (Pratt) iterativo: operandos e operadores ficam
+        # em pilhas explícitas, e parênteses/chamadas guardam o contexto
+        # externo em `groups`, então o aninhamento não consome a pilha do
+        # Python. Cada operando carrega o seu último token (`end`), cuja linha e
+        # coluna são as do BinaryOp/UnaryOp que o usa como operando direito.
+        tokens = self.tokens
+        operands = []   # operandos esquerdos pendentes
+        operators = []  # (precedência, operador)
+        groups = []     # (token da função ou None, símbolo, argumentos, operands, operators)
+        while True:
+            kind = tokens.kind()
+            while kind in UNARY_OPERATORS:
+                tokens.advance()
+                operators.append((UNARY_PRECEDENCE, TOKEN_TYPES[kind]))
+                kind = tokens.kind()
+
+            if kind == INTEGER:
+                token = tokens.advance()
+                node, end = Literal(int(token.value), line=token.line, column=token.column), token
+            elif kind == TRUE or kind == FALSE:
+                token = tokens.advance()
+                node, end = Literal(kind == TRUE, line=token.line, column=token.column), token
+            elif kind == IDENTIFIER:
+                token = tokens.advance()
+                identifier = token.value
+                symbol = self.lookup(identifier, tokens.kind() == LPAREN, token)
+                if self.match(LPAREN_SET):
+                    if not self.check("RPAREN"):
+                        groups.append((token, symbol, [], operands, operators))
+                        operands, operators = [], []
+                        continue
+                    end = self.consume("RPAREN", "Esperado ')' após argumentos da função.")
+                    node = FuncCall(identifier, [], line=token.line, column=token.column)
+                else:
+                    node, end = Identifier(identifier, line=token.line, column=token.column), token
+                node.symbol = symbol
+            elif kind == LPAREN:
+                tokens.advance()
+                groups.append((None, None, None, operands, operators))
+                operands, operators = [], []
+                continue
             else:
-                if symbol.get("is_function"):
-                    raise ParserError(f"'{identifier}' é uma função e não pode ser usado como variável.", token)
-                return Identifier(identifier, line=token.line)
-        if self.match("LPAREN"):
-            token = self.previous()
-            expr = self.expression()
-            self.consume("RPAREN", "Esperado ')' após expressão.")
-            return expr
-
-        raise ParserError("Esperada expressão válida.", self.peek())
+                raise ParserError("Esperada expressão válida.", self.peek())
+
+            while True:
+                while operators and operators[-1][0] == UNARY_PRECEDENCE:
+                    node = UnaryOp(operators.pop()[1], node, line=end.line, column=end.column)
+                precedence = BINARY_PRECEDENCE.get(tokens.kind())
+                if precedence is not None:
+                    while operators and operators[-1][0] >= precedence:
+                        node = BinaryOp(operands.pop(), operators.pop()[1], node, line=end.line, column=end.column)
+                    operands.append(node)
+                    operators.append((precedence, tokens.advance().type))
+                    break
+                while operators:
+                    node = BinaryOp(operands.pop(), operators.pop()[1], node, line=end.line, column=end.column)
+                if not groups:
+                    return node
+                callee, symbol, args, operands, operators = groups.pop()
+                if callee is None:
+                    end = self.consume("RPAREN", "Esperado ')' após expressão.")
+                    continue
+                args.append(node)
+                if self.match(COMMA_SET):
+                    groups.append((callee, symbol, args, operands, operators))
+                    operands, operators = [], []
+                    break
+                end = self.consume("RPAREN", "Esperado ')' após argumentos da função.")
+                node = FuncCall(callee.value, args, line=callee.line, column=callee.column)
+                node.symbol = symbol
 
     # Métodos auxiliares
-    def match(self, *types) -> bool:
-        for type in types:
-            if self.check(type):
-                self.advance()
-                return True
-        return False
+    def match(self, kinds: frozenset) -> bool:
+        return self.tokens.match(kinds)
 
     def consume(self, type: str, message: str) -> Token:
         if self.check(type):
@@ -410,27 +536,21 @@ class Parser:
         raise ParserError(message, self.peek())
 
     def consume_type(self) -> str:
-        if self.match("INT", "BOOL"):
+        if self.match(TYPE_SET):
             return self.previous().type
         raise ParserError("Esperado tipo 'Int' ou 'Bool'.", self.peek())
 
     def check(self, type: str) -> bool:
-        if self.is_at_end():
-            return False
-        return self.peek().type == type
+        return self.tokens.check(type)
 
     def advance(self) -> Token:
-        if not self.is_at_end():
-            self.current += 1
-        return self.previous()
+        return self.tokens.advance()
 
     def is_at_end(self) -> bool:
-        return self.current >= len(self.tokens)
+        return self.tokens.is_at_end()
 
-    def peek(self) -> Optional[Token]:
-        if self.is_at_end():
-            return None
-        return self.tokens[self.current]
+    def peek(self) -> Token:
+        return self.tokens.peek()
 
     def previous(self, steps=1) -> Token:
-        return self.tokens[self.current - steps]
+        return self.tokens.previous(steps)
@@ -0,0 +1,188 @@
+# phase_benchmark.py
+
+# Mede cada fase do compilador (lexer, parser, análise semântica e geração
+# de código) em programas gerados por program_generator.py, de tamanhos
+# crescentes. Uso:
+#   python phase_benchmark.py [--repeat N] [--sizes NOME...] [-o RESULTADOS.json]
+#                             [--baseline BASE.json] [--update-baseline] [--tolerance F]
+#
+# Os resultados (o melhor de N tempos de cada fase, em segundos) podem ser
+# gravados em JSON. Se houver uma base (por padrão phase_baseline.json, ao
+# lado deste arquivo), cada fase é comparada com ela e as que ficaram mais
+# lentas que a tolerância são marcadas como regressão; o código de saída é
+# então 1. A base depende da máquina: --update-baseline grava a execução
+# atual como a nova base.
+#
+# Uma fase que estoura a pilha do Python (RecursionError) num tamanho é
+# registrada como falha daquele tamanho, e as fases seguintes não rodam.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Dict, List, Optional
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from code_generator import CodeGenerator
+from diagnostics import Diagnostics
+from program_generator import generate_program
+
+PHASES = ("lexer", "parser", "semantic", "codegen")
+
+# Tamanhos medidos, na ordem: os três primeiros crescem em volume, os dois
+# últimos em aninhamento (comandos e expressões)
+SIZES = {
+    "small": {"functions": 4, "depth": 3, "expression_depth": 3, "statements": 3},
+    "medium": {"functions": 40, "depth": 4, "expression_depth": 4, "statements": 8},
+    "large": {"functions": 150, "depth": 4, "expression_depth": 5, "statements": 10},
+    "deep_blocks": {"functions": 4, "depth": 150, "expression_depth": 3, "statements": 2},
+    "deep_expressions": {"functions": 4, "depth": 2, "expression_depth": 400, "statements": 2},
+}
+
+SEED = 2024
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phase_baseline.json")
+# Uma fase é regressão se ficar mais lenta que base * (1 + tolerância) e a
+# diferença passar de MIN_DIFFERENCE (abaixo disso é ruído de medição)
+DEFAULT_TOLERANCE = 0.25
+MIN_DIFFERENCE = 0.002
+
+
+def run_phases(code: str, times: Dict[str, float]):
+    # Tempo de cada fase numa compilação, registrado em `times` à medida que
+    # as fases terminam; as saídas de uma são a entrada da seguinte, como em
+    # main.py
+    diagnostics = Diagnostics()
+    start = time.perf_counter()
+    tokens = Lexer(code, diagnostics).token_stream()
+    times["lexer"] = time.perf_counter() - start
+    start = time.perf_counter()
+    ast = Parser(tokens, diagnostics).parse()
+    times["parser"] = time.perf_counter() - start
+    start = time.perf_counter()
+    SemanticAnalyzer(diagnostics).analyze(ast)
+    times["semantic"] = time.perf_counter() - start
+    if diagnostics.has_errors():
+        raise ValueError(f"programa gerado inválido: {diagnostics.errors[0]}")
+    start = time.perf_counter()
+    CodeGenerator().generate(ast)
+    times["codegen"] = time.perf_counter() - start
+
+
+def measure(sizes: dict, repeat: int) -> dict:
+    code = generate_program(SEED, **sizes)
+    result = {
+        "sizes": sizes,
+        "bytes": len(code),
+        "lines": code.count("\n"),
+        "tokens": len(Lexer(code).token_stream()),
+        "phases": {},
+        "failure": None,
+    }
+    best: Dict[str, float] = {}
+    for _ in range(repeat):
+        times = {}
+        try:
+            run_phases(code, times)
+        except RecursionError as error:
+            # A fase que falhou é a primeira que não chegou a registrar tempo
+            phase = next(phase for phase in PHASES if phase not in times)
+            result["failure"] = f"{phase}: RecursionError: {error}"
+            break
+        for phase, elapsed in times.items():
+            best[phase] = min(elapsed, best.get(phase, elapsed))
+    result["phases"] = best
+    return result
+
+
+def run_benchmark(names: List[str], repeat: int) -> dict:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": SEED,
+        "repeat": repeat,
+        "results": {name: measure(SIZES[name], repeat) for name in names},
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[dict]:
+    # Uma linha por fase medida nas duas execuções
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None or base.get("sizes") != result["sizes"]:
+            continue  # tamanho novo ou redefinido: nada para comparar
+        for phase, elapsed in result["phases"].items():
+            before = base["phases"].get(phase)
+            if before is None:
+                continue
+            rows.append({
+                "size": name,
+                "phase": phase,
+                "baseline": before,
+                "current": elapsed,
+                "ratio": elapsed / before if before > 0 else float("inf"),
+                "regression": elapsed > before * (1 + tolerance) and elapsed - before > MIN_DIFFERENCE,
+            })
+        if result["failure"] and not base.get("failure"):
+            rows.append({"size": name, "phase": result["failure"].split(":")[0], "baseline": None,
+                         "current": None, "ratio": None, "regression": True})
+    return rows
+
+
+def print_results(report: dict, rows: Optional[List[dict]]):
+    print(f"{'tamanho':<18} {'bytes':>9} {'tokens':>8} " + " ".join(f"{phase:>10}" for phase in PHASES))
+    for name, result in report["results"].items():
+        times = " ".join(f"{result['phases'][phase] * 1000:>8.2f}ms" if phase in result["phases"]
+                         else f"{'-':>10}" for phase in PHASES)
+        print(f"{name:<18} {result['bytes']:>9} {result['tokens']:>8} {times}")
+        if result["failure"]:
+            print(f"{'':<18} FALHOU em {result['failure']}")
+    if rows is None:
+        return
+    print()
+    print(f"{'tamanho':<18} {'fase':<9} {'base':>10} {'atual':>10} {'razão':>7}")
+    for row in rows:
+        if row["ratio"] is None:
+            print(f"{row['size']:<18} {row['phase']:<9} {'-':>10} {'falhou':>10} {'-':>7}  REGRESSÃO")
+            continue
+        mark = "  REGRESSÃO" if row["regression"] else ""
+        print(f"{row['size']:<18} {row['phase']:<9} {row['baseline'] * 1000:>8.2f}ms "
+              f"{row['current'] * 1000:>8.2f}ms {row['ratio']:>6.2f}x{mark}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Tempo de cada fase do compilador em programas gerados.")
+    arg_parser.add_argument('--repeat', type=int, default=5, help="compilações por tamanho (vale a melhor)")
+    arg_parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES), metavar='NOME',
+                            help=f"tamanhos medidos (padrão: todos: {', '.join(SIZES)})")
+    arg_parser.add_argument('-o', '--output', metavar='ARQUIVO', help="grava os resultados em JSON")
+    arg_parser.add_argument('--baseline', default=DEFAULT_BASELINE, metavar='ARQUIVO',
+                            help="resultados de referência (padrão: %(default)s)")
+    arg_parser.add_argument('--update-baseline', action='store_true',
+                            help="grava esta execução como a nova referência")
+    arg_parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                            help="lentidão aceita antes de marcar regressão (padrão: %(default)s = 25%%)")
+    args = arg_parser.parse_args(argv)
+
+    report = run_benchmark(args.sizes, args.repeat)
+    rows = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as file:
+            rows = compare(report, json.load(file), args.tolerance)
+        report["comparison"] = {"baseline": args.baseline, "tolerance": args.tolerance, "phases": rows}
+    print_results(report, rows)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Nova referência gravada em {args.baseline}.")
+    return 1 if rows and any(row["regression"] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
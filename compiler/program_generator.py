@@ -0,0 +1,207 @@
+# program_generator.py
+
+# Gera programas válidos (passam pelo parser e pela análise semântica) de
+# tamanho controlado, para medir o compilador em entradas maiores que os
+# exemplos teste*.kt. A mesma semente e os mesmos tamanhos dão sempre o
+# mesmo programa. Uso:
+#   python program_generator.py [--seed N] [--functions N] [--depth N]
+#                               [--expression-depth N] [--statements N]
+#
+# Tamanhos:
+#   functions         funções declaradas antes do programa principal
+#   depth             aninhamento de while/if em cada corpo
+#   expression_depth  aninhamento de cada expressão (operadores e parênteses)
+#   statements        comandos simples em cada nível de cada corpo
+#
+# Em cada nível há um único comando composto, que contém o nível seguinte,
+# então o tamanho cresce linearmente com depth e expression_depth, e nenhum
+# dos dois é limitado pela pilha do Python (a geração é iterativa). Os
+# laços usam um contador próprio, incrementado no início do corpo (um
+# continue não os torna infinitos), e dão LOOP_COUNT voltas. Funções não
+# chamam outras funções; o programa principal chama todas.
+
+import argparse
+import random
+from typing import Dict, List, Optional, Tuple
+
+LOOP_COUNT = 3
+INDENT = "    "
+
+ARITHMETIC = ("+", "-", "*")
+COMPARISONS = ("<", ">", "<=", ">=", "==", "!=")
+
+
+class Scope:
+    # Variáveis visíveis num nível: nome -> (tipo, pode receber atribuição)
+    __slots__ = ("variables",)
+
+    def __init__(self, parent: Optional["Scope"] = None):
+        self.variables: Dict[str, Tuple[str, bool]] = dict(parent.variables) if parent else {}
+
+    def of_type(self, type: str) -> List[str]:
+        return [name for name, (var_type, _) in self.variables.items() if var_type == type]
+
+    def assignable(self) -> List[str]:
+        return [name for name, (_, mutable) in self.variables.items() if mutable]
+
+
+class ProgramGenerator:
+    def __init__(self, seed: int = 0, functions: int = 4, depth: int = 3, expression_depth: int = 3,
+                 statements: int = 3):
+        self.rng = random.Random(seed)
+        self.functions = functions
+        self.depth = depth
+        self.expression_depth = expression_depth
+        self.statements = statements
+        self.lines: List[str] = []
+        self.declared: List[Tuple[str, List[str], str]] = []  # (nome, tipos dos parâmetros, retorno)
+        self.counter = 0
+
+    def generate(self) -> str:
+        for _ in range(self.functions):
+            self.function()
+        self.body(Scope(), 0, None, calls=True)
+        return "\n".join(self.lines) + "\n"
+
+    def fresh(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def emit(self, level: int, line: str):
+        self.lines.append(INDENT * level + line)
+
+    # Declarações
+
+    def function(self):
+        rng = self.rng
+        name = self.fresh("f")
+        scope = Scope()
+        params = []
+        for _ in range(rng.randint(0, 3)):
+            param, type = self.fresh("p"), rng.choice(("Int", "Int", "Bool"))
+            params.append((param, type))
+            scope.variables[param] = (type, True)
+        return_type = rng.choice(("Int", "Int", "Bool", "Unit"))
+        header = ", ".join(f"{param} : {type}" for param, type in params)
+        self.emit(0, f"fun {name}({header})" + (f" : {return_type}" if return_type != "Unit" else "") + " {")
+        self.body(scope, 1, return_type, calls=False)
+        self.emit(0, "}")
+        self.declared.append((name, [type for _, type in params], return_type))
+
+    def body(self, scope: Scope, level: int, return_type: Optional[str], calls: bool):
+        # Desce até depth níveis, cada um com seus comandos e um while ou if
+        # que contém o próximo; na volta, fecha os blocos (com um eventual
+        # else) e acrescenta mais comandos em cada nível
+        rng = self.rng
+        closers = []  # (nível, escopo, dentro de laço?, escopo do else ou None)
+        in_loop = False
+        for nesting in range(self.depth + 1):
+            self.simple_statements(scope, level, calls, in_loop)
+            if nesting == self.depth:
+                break
+            if rng.random() < 0.5:
+                counter = self.fresh("i")
+                self.emit(level, f"val {counter} : Int = 0;")
+                scope.variables[counter] = ("Int", False)  # lido no corpo, mas nunca atribuído
+                self.emit(level, f"while ({counter} < {LOOP_COUNT}) {{")
+                self.emit(level + 1, f"{counter} = {counter} + 1;")
+                closers.append((level, scope, in_loop, None))
+                in_loop = True
+            else:
+                self.emit(level, f"if ({self.expression('Bool', scope, calls)}) {{")
+                closers.append((level, scope, in_loop, Scope(scope) if rng.random() < 0.5 else None))
+            scope, level = Scope(scope), level + 1
+        for level, scope, in_loop, else_scope in reversed(closers):
+            if else_scope is not None:
+                self.emit(level, "} else {")
+                self.simple_statements(else_scope, level + 1, calls, in_loop)
+            self.emit(level, "}")
+            self.simple_statements(scope, level, calls, in_loop)
+        if return_type not in (None, "Unit"):
+            self.emit(level, f"return {self.expression(return_type, scope, calls)};")
+
+    def simple_statements(self, scope: Scope, level: int, calls: bool, in_loop: bool):
+        rng = self.rng
+        for _ in range(self.statements):
+            choice = rng.random()
+            targets = scope.assignable()
+            if choice < 0.35 or not targets:
+                name, type = self.fresh("v"), rng.choice(("Int", "Int", "Bool"))
+                constant = rng.random() < 0.3
+                self.emit(level, f"{'const' if constant else 'val'} {name} : {type} = "
+                                 f"{self.expression(type, scope, calls)};")
+                scope.variables[name] = (type, not constant)
+            elif choice < 0.65:
+                name = rng.choice(targets)
+                self.emit(level, f"{name} = {self.expression(scope.variables[name][0], scope, calls)};")
+            elif choice < 0.85:
+                self.emit(level, f"print({self.expression(rng.choice(('Int', 'Bool')), scope, calls)});")
+            elif in_loop and choice < 0.9:
+                keyword = rng.choice(("break", "continue"))
+                self.emit(level, f"if ({self.expression('Bool', scope, calls)}) {{ {keyword}; }}")
+            elif calls and self.declared:
+                self.emit(level, f"{self.call(rng.choice(self.declared), scope)};")
+            else:
+                self.emit(level, f"print({self.expression('Int', scope, calls)});")
+
+    # Expressões
+
+    def leaf(self, type: str, scope: Scope) -> str:
+        rng = self.rng
+        names = scope.of_type(type)
+        if names and rng.random() < 0.7:
+            return rng.choice(names)
+        if type == "Int":
+            return str(rng.randint(0, 9))
+        return rng.choice(("true", "false"))
+
+    def call(self, function: Tuple[str, List[str], str], scope: Scope) -> str:
+        name, params, _ = function
+        return f"{name}({', '.join(self.leaf(type, scope) for type in params)})"
+
+    def expression(self, type: str, scope: Scope, calls: bool) -> str:
+        # Começa por uma folha inteira e a envolve expression_depth vezes,
+        # sempre com uma folha do outro lado: o aninhamento é o pedido, o
+        # tamanho é linear. Uma expressão Bool fecha com uma comparação.
+        rng = self.rng
+        results = [function for function in self.declared if function[2] == "Int"] if calls else []
+        text = self.leaf("Int", scope)
+        for _ in range(max(0, self.expression_depth - (type == "Bool"))):
+            choice = rng.random()
+            if choice < 0.15:
+                text = f"-({text})"
+            elif choice < 0.25:
+                text = f"({text} / {rng.randint(1, 9)})"
+            elif choice < 0.3 and results:
+                text = f"({text} + {self.call(rng.choice(results), scope)})"
+            elif rng.random() < 0.5:
+                text = f"({text} {rng.choice(ARITHMETIC)} {self.leaf('Int', scope)})"
+            else:
+                text = f"({self.leaf('Int', scope)} {rng.choice(ARITHMETIC)} {text})"
+        if type == "Bool":
+            if self.expression_depth == 0:
+                return self.leaf("Bool", scope)
+            return f"({text} {rng.choice(COMPARISONS)} {self.leaf('Int', scope)})"
+        return text
+
+
+def generate_program(seed: int = 0, **sizes) -> str:
+    return ProgramGenerator(seed, **sizes).generate()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Gera um programa válido de tamanho controlado.")
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--functions', type=int, default=4, help="funções declaradas (padrão: %(default)s)")
+    arg_parser.add_argument('--depth', type=int, default=3, help="aninhamento de while/if (padrão: %(default)s)")
+    arg_parser.add_argument('--expression-depth', type=int, default=3,
+                            help="aninhamento das expressões (padrão: %(default)s)")
+    arg_parser.add_argument('--statements', type=int, default=3,
+                            help="comandos simples por nível (padrão: %(default)s)")
+    args = arg_parser.parse_args(argv)
+    print(generate_program(args.seed, functions=args.functions, depth=args.depth,
+                           expression_depth=args.expression_depth, statements=args.statements), end="")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+# python_generator.py
+
+import sys
+from typing import Dict, List, Optional, TextIO
+from parser import (
+    Program, VarDecl, FuncDecl, Block, Assignment, IfStatement, WhileStatement, ReturnStatement,
+    BreakStatement, ContinueStatement, PrintStatement, Expression, Identifier, Literal, BinaryOp,
+    UnaryOp, FuncCall,
+)
+from type_system import INT, BOOL
+from operations import divide
+from vm import VMError, MAX_CALL_DEPTH, format_value
+
+# Int de 32 bits: o resultado de + - * (e do menos unário) dá a volta com
+# aritmética pura, sem chamada de função
+WRAP = "(((({}) + 2147483648) & 4294967295) - 2147483648)"
+
+ARITHMETIC = {"PLUS": "+", "MINUS": "-", "MULTIPLY": "*"}
+COMPARISON = {
+    "EQUAL": "==", "DIFFERENT": "!=", "LESS": "<", "LESS_OR_EQUAL": "<=",
+    "GREATER": ">", "GREATER_OR_EQUAL": ">=",
+}
+
+# Profundidade a partir da qual uma subexpressão vai para uma variável
+# auxiliar (o compilador do Python recusa expressões aninhadas demais)
+MAX_EXPRESSION_DEPTH = 20
+
+
+class PythonGenerator:
+    # Alternativa ao CodeGenerator: traduz uma AST já analisada em código
+    # Python. O programa inteiro vira a função _program; as funções da
+    # linguagem viram funções aninhadas, de modo que variáveis são locais
+    # rápidas do Python e as de funções externas são lidas por closure (e
+    # atribuídas com nonlocal). Cada Symbol recebe um nome único, já que o
+    # Python não tem escopo de bloco.
+    def __init__(self):
+        self.lines: List[str] = []
+        self.indent = ""
+        self.visitors = {}  # classe do nó -> método visit_* já resolvido
+        self.names: Dict[object, str] = {}  # Symbol -> nome no código gerado
+        self.frame = None  # Symbol da função sendo gerada (None no nível superior)
+        self.nonlocals = None  # nomes de fora atribuídos na função sendo gerada
+        self.temp_counter = 0
+
+    def generate(self, node) -> str:
+        self.lines = ["def _program():"]
+        self.indent = "    "
+        self.nonlocals = set()
+        start = len(self.lines)
+        self.visit(node)
+        if len(self.lines) == start:
+            self.emit("pass")
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, line: str):
+        self.lines.append(self.indent + line)
+
+    def name(self, symbol) -> str:
+        name = self.names.get(symbol)
+        if name is None:
+            name = self.names[symbol] = f"{symbol.name}_{len(self.names)}"
+        return name
+
+    def new_temp(self) -> str:
+        self.temp_counter += 1
+        return f"_t{self.temp_counter}"
+
+    def visit(self, node):
+        visitor = self.visitors.get(type(node))
+        if visitor is None:
+            visitor = self.resolve_visitor(type(node))
+        return visitor(node)
+
+    def resolve_visitor(self, node_class):
+        visitor = self.generic_visit
+        for cls in node_class.__mro__:
+            method = getattr(self, f"visit_{cls.__name__}", None)
+            if method is not None:
+                visitor = method
+                break
+        self.visitors[node_class] = visitor
+        return visitor
+
+    def generic_visit(self, node):
+        raise Exception(f'No visit_{type(node).__name__} method')
+
+    # Comandos
+
+    def visit_Program(self, node: Program):
+        for declaration in node.declarations:
+            self.statement(declaration)
+
+    def statement(self, node):
+        if isinstance(node, Expression):  # chamada usada como comando
+            self.emit(self.expression(node))
+        else:
+            self.visit(node)
+
+    def body(self, node: Block):
+        self.indent += "    "
+        start = len(self.lines)
+        self.visit(node)
+        if len(self.lines) == start:
+            self.emit("pass")
+        self.indent = self.indent[:-4]
+
+    def visit_Block(self, node: Block):
+        for decl in node.declarations:
+            self.statement(decl)
+
+    def store(self, symbol, value: str):
+        if symbol.frame is not self.frame:
+            self.nonlocals.add(self.name(symbol))
+        self.emit(f"{self.name(symbol)} = {value}")
+
+    def visit_VarDecl(self, node: VarDecl):
+        self.store(node.symbol, self.expression(node.initializer))
+
+    def visit_Assignment(self, node: Assignment):
+        self.store(node.symbol, self.expression(node.value))
+
+    def visit_PrintStatement(self, node: PrintStatement):
+        value = self.expression(node.value)
+        if node.value.type is INT:
+            self.emit(f"_emit(str({value}))")
+        elif node.value.type is BOOL:
+            self.emit(f"_emit('true' if {value} else 'false')")
+        else:
+            self.emit(f"_emit(_show({value}))")
+
+    def visit_IfStatement(self, node: IfStatement):
+        self.emit(f"if {self.expression(node.condition)}:")
+        self.body(node.then_branch)
+        if node.else_branch:
+            self.emit("else:")
+            self.body(node.else_branch)
+
+    def visit_WhileStatement(self, node: WhileStatement):
+        # Se a condição precisou de variáveis auxiliares, elas têm de ser
+        # recalculadas a cada volta: o teste vai para dentro do laço
+        mark = len(self.lines)
+        condition = self.expression(node.condition)
+        if len(self.lines) == mark:
+            self.emit(f"while {condition}:")
+            self.body(node.body)
+            return
+        spilled = self.lines[mark:]
+        del self.lines[mark:]
+        self.emit("while True:")
+        self.lines.extend("    " + line for line in spilled)
+        self.indent += "    "
+        self.emit(f"if not {condition}:")
+        self.emit("    break")
+        self.indent = self.indent[:-4]
+        self.body(node.body)
+
+    def visit_ReturnStatement(self, node: ReturnStatement):
+        self.emit(f"return {self.expression(node.value)}")
+
+    def visit_BreakStatement(self, node: BreakStatement):
+        self.emit("break")
+
+    def visit_ContinueStatement(self, node: ContinueStatement):
+        self.emit("continue")
+
+    def visit_FuncDecl(self, node: FuncDecl):
+        params = ", ".join(self.name(node.scope.symbols[name]) for name, _, _ in node.params)
+        self.emit(f"def {self.name(node.symbol)}({params}):")
+        outer_frame, outer_nonlocals, outer_lines = self.frame, self.nonlocals, self.lines
+        self.frame, self.nonlocals, self.lines = node.symbol, set(), []
+        self.body(node.body)
+        body, nonlocals = self.lines, self.nonlocals
+        self.frame, self.nonlocals, self.lines = outer_frame, outer_nonlocals, outer_lines
+        if nonlocals:
+            self.emit(f"    nonlocal {', '.join(sorted(nonlocals))}")
+        self.lines.extend(body)
+
+    # Expressões: cada visitante devolve (código, profundidade)
+
+    def expression(self, node) -> str:
+        return self.visit(node)[0]
+
+    def operand(self, node):
+        code, depth = self.visit(node)
+        if depth >= MAX_EXPRESSION_DEPTH:
+            temp = self.new_temp()
+            self.emit(f"{temp} = {code}")
+            return temp, 0
+        return code, depth
+
+    def evaluate_before(self, mark: int, codes: List[str]) -> List[str]:
+        # Um operando posterior gerou comandos (a partir de `mark`); os
+        # operandos anteriores precisam ser avaliados antes deles, como no
+        # programa original (uma chamada pode alterar a variável lida).
+        temps = [self.new_temp() for _ in codes]
+        self.lines[mark:mark] = [f"{self.indent}{temp} = {code}" for temp, code in zip(temps, codes)]
+        return temps
+
+    def visit_Literal(self, node: Literal):
+        return repr(node.value), 0
+
+    def visit_Identifier(self, node: Identifier):
+        return self.name(node.symbol), 0
+
+    def visit_BinaryOp(self, node: BinaryOp):
+        left, left_depth = self.operand(node.left)
+        mark = len(self.lines)
+        right, right_depth = self.operand(node.right)
+        if len(self.lines) > mark and not isinstance(node.left, Literal):
+            [left], left_depth = self.evaluate_before(mark, [left]), 0
+        depth = max(left_depth, right_depth) + 1
+        operator = node.operator
+        if operator in ARITHMETIC:
+            return WRAP.format(f"{left} {ARITHMETIC[operator]} {right}"), depth
+        if operator == "DIVIDE":
+            return f"_div({left}, {right})", depth
+        return f"({left} {COMPARISON[operator]} {right})", depth
+
+    def visit_UnaryOp(self, node: UnaryOp):
+        operand, depth = self.operand(node.operand)
+        if node.operator == "NOT":
+            return f"(not {operand})", depth + 1
+        return WRAP.format(f"-{operand}"), depth + 1
+
+    def visit_FuncCall(self, node: FuncCall):
+        args = []
+        depth = 0
+        for arg in node.args:
+            mark = len(self.lines)
+            code, arg_depth = self.operand(arg)
+            if len(self.lines) > mark:
+                evaluated = [index for index, previous in enumerate(node.args[:len(args)])
+                             if not isinstance(previous, Literal)]
+                temps = self.evaluate_before(mark, [args[index] for index in evaluated])
+                for index, temp in zip(evaluated, temps):
+                    args[index] = temp
+            args.append(code)
+            depth = max(depth, arg_depth)
+        return f"{self.name(node.symbol)}({', '.join(args)})", depth + 1
+
+
+def compile_source(source: str):
+    try:
+        return compile(source, "<programa>", "exec")
+    except (SyntaxError, RecursionError, MemoryError) as error:
+        # Ex.: mais de 20 laços aninhados, limite do compilador do Python
+        raise VMError(f"O programa excede os limites do backend Python ({error}); use a máquina virtual.")
+
+
+def run(source: str, out: Optional[TextIO] = None):
+    # Executa o código gerado; erros de execução viram VMError, como na
+    # máquina virtual
+    output: List[str] = []
+    namespace = {"_emit": output.append, "_div": divide, "_show": format_value}
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, MAX_CALL_DEPTH + 100))
+    try:
+        exec(compile_source(source), namespace)
+        namespace["_program"]()
+    except ZeroDivisionError:
+        raise VMError("Divisão por zero.")
+    except RecursionError:
+        raise VMError("Estouro da pilha de chamadas.")
+    finally:
+        sys.setrecursionlimit(limit)
+        if output:
+            (out or sys.stdout).write("\n".join(output) + "\n")
@@ -0,0 +1,109 @@
+# resolver.py
+
+from parser import (
+    ASTNode, Program, VarDecl, FuncDecl, Block, Assignment, IfStatement,
+    WhileStatement, ReturnStatement, BreakStatement, ContinueStatement,
+    PrintStatement, BinaryOp, UnaryOp, Literal, Identifier, FuncCall
+)
+from symbols import Scope, Symbol, SymbolTable
+
+class Resolver(SymbolTable):
+    # Resolve os nomes de uma AST que não veio do Parser (o Parser já anota os
+    # nós enquanto os constrói, com a mesma SymbolTable). VarDecl e FuncDecl
+    # recebem o símbolo que declaram; Identifier, Assignment e FuncCall
+    # recebem o símbolo a que se referem. Um nome não resolvido (ou uma
+    # redeclaração) fica com symbol = None, e o SemanticAnalyzer reporta o
+    # erro ao chegar naquele nó, mantendo a ordem das mensagens.
+    def __init__(self):
+        super().__init__()
+        self.visitors = {}
+
+    def resolve(self, node: ASTNode):
+        visitor = self.visitors.get(type(node))
+        if visitor is None:
+            visitor = self.resolve_visitor(type(node))
+        visitor(node)
+
+    def resolve_visitor(self, node_class):
+        visitor = self.resolve_leaf
+        for cls in node_class.__mro__:
+            method = getattr(self, f"resolve_{cls.__name__}", None)
+            if method is not None:
+                visitor = method
+                break
+        self.visitors[node_class] = visitor
+        return visitor
+
+    # Declarações
+    def resolve_Program(self, node: Program):
+        node.scope = self.root
+        for decl in node.declarations:
+            self.resolve(decl)
+
+    def resolve_VarDecl(self, node: VarDecl):
+        # Como no Parser, o nome só é visível depois do inicializador
+        self.resolve(node.initializer)
+        if self.is_declared(node.name):
+            node.symbol = None
+        else:
+            node.symbol = self.declare_variable(node.name, node.var_type, node.is_const, node)
+
+    def resolve_FuncDecl(self, node: FuncDecl):
+        function = self.function_symbol(node.name, node.params, node.return_type, node)
+        if self.is_declared(node.name):
+            node.symbol = None
+        else:
+            node.symbol = function
+            self.bind(function)
+        node.scope = self.enter_scope(function)
+        for param_name, param_type, _ in node.params:
+            self.declare_variable(param_name, param_type)
+        self.resolve(node.body)
+        self.exit_scope()
+
+    def resolve_Block(self, node: Block):
+        node.scope = self.enter_scope()
+        for decl in node.declarations:
+            self.resolve(decl)
+        self.exit_scope()
+
+    # Comandos
+    def resolve_Assignment(self, node: Assignment):
+        node.symbol = self.lookup(node.name, False)
+        self.resolve(node.value)
+
+    def resolve_IfStatement(self, node: IfStatement):
+        self.resolve(node.condition)
+        self.resolve(node.then_branch)
+        if node.else_branch:
+            self.resolve(node.else_branch)
+
+    def resolve_WhileStatement(self, node: WhileStatement):
+        self.resolve(node.condition)
+        self.resolve(node.body)
+
+    def resolve_ReturnStatement(self, node: ReturnStatement):
+        self.resolve(node.value)
+
+    def resolve_PrintStatement(self, node: PrintStatement):
+        self.resolve(node.value)
+
+    # Expressões
+    def resolve_BinaryOp(self, node: BinaryOp):
+        self.resolve(node.left)
+        self.resolve(node.right)
+
+    def resolve_UnaryOp(self, node: UnaryOp):
+        self.resolve(node.operand)
+
+    def resolve_Identifier(self, node: Identifier):
+        node.symbol = self.lookup(node.name, False)
+
+    def resolve_FuncCall(self, node: FuncCall):
+        node.symbol = self.lookup(node.name, True)
+        for arg in node.args:
+            self.resolve(arg)
+
+    def resolve_leaf(self, node: ASTNode):
+        # Literal, BreakStatement e ContinueStatement não têm nomes
+        pass
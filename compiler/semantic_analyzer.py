@@ -1,164 +1,247 @@
 # semantic_analyzer.py
 
+from typing import Optional
 from parser import (
-    Program, VarDecl, FuncDecl, Block, Assignment, IfStatement,
+    ASTNode, Program, VarDecl, FuncDecl, Block, Assignment, IfStatement,
     WhileStatement, ReturnStatement, BreakStatement, ContinueStatement,
     PrintStatement, BinaryOp, UnaryOp, Literal, Identifier, FuncCall
 )
+from resolver import Resolver
+from type_system import INT, BOOL, UNIT, ERROR, ARITHMETIC_OPERATORS, RELATIONAL_OPERATORS, type_named
+from diagnostics import Diagnostics
+from operations import INT_MIN, INT_MAX
 
 class SemanticError(Exception):
-    pass
+    def __init__(self, message, line=None, column=None):
+        self.message = message
+        self.line = line
+        self.column = column
+        if line is not None:
+            message = f"{message} (linha {line}" + (f", coluna {column})" if column is not None else ")")
+        super().__init__(message)
 
 class SemanticAnalyzer:
-    def __init__(self):
-        self.scope_stack = [{}]
+    # Cada classe de nó é despachada uma única vez para o seu analyze_<Classe>
+    # (o resultado fica em `visitors`). Os tipos são objetos Type internos,
+    # comparados por identidade, e o tipo de cada expressão fica anotado em
+    # `node.type` para os passos seguintes.
+    #
+    # Sem um coletor de diagnósticos, o primeiro erro interrompe a análise com
+    # SemanticError. Com ele, cada erro é registrado e a análise continua: a
+    # expressão com problema recebe o tipo ERROR, que não gera novos erros
+    # nas expressões e comandos que a contêm.
+    def __init__(self, diagnostics: Optional[Diagnostics] = None):
+        self.resolver = Resolver()
+        self.visitors = {}
+        self.diagnostics = diagnostics
+
+    def error(self, node: ASTNode, message: str, *types):
+        if ERROR in types:
+            return  # já reportado na subexpressão
+        if self.diagnostics is None:
+            raise SemanticError(message, node.line, node.column)
+        self.diagnostics.error("semantic", message, node.line, node.column)
 
     def analyze(self, node):
-        if isinstance(node, Program):
-            self.enter_scope()
-            for decl in node.declarations:
-                self.analyze(decl)
-            self.exit_scope()
-        elif isinstance(node, VarDecl):
-            self.declare_variable(node)
-            expr_type = self.analyze(node.initializer)
-            if expr_type != node.var_type:
-                raise SemanticError(
-                    f"Type mismatch na declaração da variável '{node.name}'. "
-                    f"Esperado '{node.var_type}', mas foi encontrado '{expr_type}'."
-                )
-        elif isinstance(node, Assignment):
-            var_type = self.lookup_variable(node.name)
-            expr_type = self.analyze(node.value)
-            if var_type != expr_type:
-                raise SemanticError(
-                    f"Type mismatch na atribuição para '{node.name}'. "
-                    f"Variável do tipo '{var_type}' não pode receber valor do tipo '{expr_type}'."
-                )
-        elif isinstance(node, FuncDecl):
-            self.declare_function(node)
-            self.enter_scope()
-            # Agora desempacotamos três valores: nome, tipo e linha
-            for param_name, param_type, param_line in node.params:
-                self.current_scope()[param_name] = {"type": param_type, "is_const": False}
-            body_type = self.analyze(node.body)
-            if node.return_type != "Unit" and body_type != node.return_type:
-                raise SemanticError(
-                    f"Type mismatch na função '{node.name}'. "
-                    f"Esperado retorno '{node.return_type}', mas o corpo retorna '{body_type}'."
+        visitor = self.visitors.get(type(node))
+        if visitor is None:
+            visitor = self.resolve_visitor(type(node))
+        return visitor(node)
+
+    def resolve_visitor(self, node_class):
+        visitor = self.analyze_unknown
+        for cls in node_class.__mro__:
+            method = getattr(self, f"analyze_{cls.__name__}", None)
+            if method is not None:
+                visitor = method
+                break
+        self.visitors[node_class] = visitor
+        return visitor
+
+    def analyze_unknown(self, node: ASTNode):
+        self.error(node, "Nó desconhecido na AST.")
+        return ERROR
+
+    # Declarações
+    def analyze_Program(self, node: Program):
+        # Os nomes são resolvidos uma única vez, normalmente pelo próprio
+        # Parser (que anota a árvore de escopos no Program); o Resolver só
+        # percorre árvores construídas de outra forma. Daqui em diante cada
+        # uso consulta diretamente o símbolo anotado no nó.
+        if node.scope is None:
+            self.resolver.resolve(node)
+        for decl in node.declarations:
+            self.analyze(decl)
+
+    def analyze_VarDecl(self, node: VarDecl):
+        if node.symbol is None:
+            self.error(node, f"Variável '{node.name}' já declarada neste escopo.")
+        expr_type = self.analyze(node.initializer)
+        if expr_type is not type_named(node.var_type):
+            self.error(
+                node,
+                f"Type mismatch na declaração da variável '{node.name}'. "
+                f"Esperado '{node.var_type}', mas foi encontrado '{expr_type}'.",
+                expr_type,
+            )
+
+    def analyze_FuncDecl(self, node: FuncDecl):
+        if node.symbol is None:
+            self.error(node, f"Função '{node.name}' já declarada neste escopo.")
+        body_type = self.analyze(node.body)
+        return_type = type_named(node.return_type)
+        if return_type is not UNIT and body_type is not return_type:
+            self.error(
+                node,
+                f"Type mismatch na função '{node.name}'. "
+                f"Esperado retorno '{node.return_type}', mas o corpo retorna '{body_type}'.",
+                body_type,
+            )
+
+    def analyze_Block(self, node: Block):
+        ret_type = None
+        for decl in node.declarations:
+            result = self.analyze(decl)
+            if isinstance(decl, ReturnStatement):
+                ret_type = result
+        return ret_type
+
+    # Comandos
+    def analyze_Assignment(self, node: Assignment):
+        var_type = self.variable_type(node)
+        expr_type = self.analyze(node.value)
+        if var_type is not expr_type:
+            self.error(
+                node,
+                f"Type mismatch na atribuição para '{node.name}'. "
+                f"Variável do tipo '{var_type}' não pode receber valor do tipo '{expr_type}'.",
+                var_type, expr_type,
+            )
+
+    def analyze_IfStatement(self, node: IfStatement):
+        cond_type = self.analyze(node.condition)
+        if cond_type is not BOOL:
+            self.error(node, "A condição do 'if' deve ser do tipo BOOL.", cond_type)
+        self.analyze(node.then_branch)
+        if node.else_branch:
+            self.analyze(node.else_branch)
+
+    def analyze_WhileStatement(self, node: WhileStatement):
+        cond_type = self.analyze(node.condition)
+        if cond_type is not BOOL:
+            self.error(node, "A condição do 'while' deve ser do tipo BOOL.", cond_type)
+        self.analyze(node.body)
+
+    def analyze_ReturnStatement(self, node: ReturnStatement):
+        return self.analyze(node.value)
+
+    def analyze_PrintStatement(self, node: PrintStatement):
+        return self.analyze(node.value)
+
+    def analyze_BreakStatement(self, node: BreakStatement):
+        return UNIT
+
+    def analyze_ContinueStatement(self, node: ContinueStatement):
+        return UNIT
+
+    # Expressões: o tipo calculado fica em node.type
+    def analyze_BinaryOp(self, node: BinaryOp):
+        left_type = self.analyze(node.left)
+        right_type = self.analyze(node.right)
+        if node.operator in ARITHMETIC_OPERATORS:
+            if left_type is not INT or right_type is not INT:
+                self.error(node, "Operadores aritméticos só aceitam operandos do tipo INT.", left_type, right_type)
+                node.type = ERROR
+            else:
+                node.type = INT
+        elif node.operator in RELATIONAL_OPERATORS:
+            if left_type is not right_type:
+                self.error(
+                    node, "Operadores relacionais exigem que os operandos sejam do mesmo tipo.", left_type, right_type
                 )
-            self.exit_scope()
-        elif isinstance(node, Block):
-            self.enter_scope()
-            ret_type = None
-            for decl in node.declarations:
-                result = self.analyze(decl)
-                if isinstance(decl, ReturnStatement):
-                    ret_type = result
-            self.exit_scope()
-            return ret_type
-        elif isinstance(node, IfStatement):
-            cond_type = self.analyze(node.condition)
-            if cond_type != "BOOL":
-                raise SemanticError("A condição do 'if' deve ser do tipo BOOL.")
-            self.analyze(node.then_branch)
-            if node.else_branch:
-                self.analyze(node.else_branch)
-        elif isinstance(node, WhileStatement):
-            cond_type = self.analyze(node.condition)
-            if cond_type != "BOOL":
-                raise SemanticError("A condição do 'while' deve ser do tipo BOOL.")
-            self.analyze(node.body)
-        elif isinstance(node, ReturnStatement):
-            return self.analyze(node.value)
-        elif isinstance(node, PrintStatement):
-            return self.analyze(node.value)
-        elif isinstance(node, BinaryOp):
-            left_type = self.analyze(node.left)
-            right_type = self.analyze(node.right)
-            if node.operator in ["PLUS", "MINUS", "MULTIPLY", "DIVIDE"]:
-                if left_type != "INT" or right_type != "INT":
-                    raise SemanticError("Operadores aritméticos só aceitam operandos do tipo INT.")
-                return "INT"
-            elif node.operator in ["EQUAL", "DIFFERENT", "GREATER", "GREATER_OR_EQUAL", "LESS", "LESS_OR_EQUAL"]:
-                if left_type != right_type:
-                    raise SemanticError("Operadores relacionais exigem que os operandos sejam do mesmo tipo.")
-                return "BOOL"
+                node.type = ERROR
+            else:
+                node.type = BOOL
+        else:
+            self.error(node, f"Operador desconhecido: {node.operator}")
+            node.type = ERROR
+        return node.type
+
+    def analyze_UnaryOp(self, node: UnaryOp):
+        operand = node.operand
+        if node.operator == "MINUS" and isinstance(operand, Literal) and type(operand.value) is int \
+                and operand.value == INT_MAX + 1:
+            # -2147483648: o único literal que só cabe em Int com o sinal (a
+            # negação com volta de 32 bits dá exatamente INT_MIN)
+            operand.type = node.type = INT
+            return node.type
+        operand_type = self.analyze(operand)
+        if node.operator == "MINUS":
+            if operand_type is not INT:
+                self.error(node, "Operador '-' só pode ser aplicado a INT.", operand_type)
+                node.type = ERROR
             else:
-                raise SemanticError(f"Operador desconhecido: {node.operator}")
-        elif isinstance(node, UnaryOp):
-            operand_type = self.analyze(node.operand)
-            if node.operator == "MINUS":
-                if operand_type != "INT":
-                    raise SemanticError("Operador '-' só pode ser aplicado a INT.")
-                return "INT"
-            elif node.operator == "NOT":
-                if operand_type != "BOOL":
-                    raise SemanticError("Operador 'NOT' só pode ser aplicado a BOOL.")
-                return "BOOL"
+                node.type = INT
+        elif node.operator == "NOT":
+            if operand_type is not BOOL:
+                self.error(node, "Operador 'NOT' só pode ser aplicado a BOOL.", operand_type)
+                node.type = ERROR
             else:
-                raise SemanticError(f"Operador unário desconhecido: {node.operator}")
-        elif isinstance(node, Literal):
-            if isinstance(node.value, bool):
-                return "BOOL"
-            elif isinstance(node.value, int):
-                return "INT"
-        elif isinstance(node, Identifier):
-            return self.lookup_variable(node.name)
-        elif isinstance(node, FuncCall):
-            func_info = self.lookup_function(node.name)
-            params = func_info["params"]
-            if len(params) != len(node.args):
-                raise SemanticError(
-                    f"Chamada de função '{node.name}' com número inválido de argumentos. "
-                    f"Esperado {len(params)}, recebido {len(node.args)}."
-                )
+                node.type = BOOL
+        else:
+            self.error(node, f"Operador unário desconhecido: {node.operator}")
+            node.type = ERROR
+        return node.type
+
+    def analyze_Literal(self, node: Literal):
+        if isinstance(node.value, bool):
+            node.type = BOOL
+        elif isinstance(node.value, int):
+            if INT_MIN <= node.value <= INT_MAX:
+                node.type = INT
+            else:
+                # Como em Kotlin: o literal não dá a volta, é um erro
+                self.error(node, f"Literal inteiro fora do intervalo de Int: {node.value}.")
+                node.type = ERROR
+        return node.type
+
+    def analyze_Identifier(self, node: Identifier):
+        node.type = self.variable_type(node)
+        return node.type
+
+    def analyze_FuncCall(self, node: FuncCall):
+        func_info = node.symbol
+        if func_info is None:
+            self.error(node, f"Função '{node.name}' não declarada.")
+            for arg in node.args:
+                self.analyze(arg)
+            node.type = ERROR
+            return node.type
+        params = func_info.params
+        if len(params) != len(node.args):
+            self.error(
+                node,
+                f"Chamada de função '{node.name}' com número inválido de argumentos. "
+                f"Esperado {len(params)}, recebido {len(node.args)}."
+            )
+            for arg in node.args:
+                self.analyze(arg)
+        else:
             # Desempacotando (nome, tipo, linha) para cada parâmetro
             for ((param_name, param_type, param_line), arg) in zip(params, node.args):
                 arg_type = self.analyze(arg)
-                if arg_type != param_type:
-                    raise SemanticError(
+                if arg_type is not type_named(param_type):
+                    self.error(
+                        node,
                         f"Type mismatch no argumento '{param_name}' da função '{node.name}'. "
-                        f"Esperado '{param_type}', recebido '{arg_type}'."
+                        f"Esperado '{param_type}', recebido '{arg_type}'.",
+                        arg_type,
                     )
-            return func_info.get("return_type", "Unit")
-        elif isinstance(node, BreakStatement):
-            return "Unit"
-        elif isinstance(node, ContinueStatement):
-            return "Unit"
-        else:
-            raise SemanticError("Nó desconhecido na AST.")
-
-    def enter_scope(self):
-        self.scope_stack.append({})
-
-    def exit_scope(self):
-        self.scope_stack.pop()
-
-    def current_scope(self):
-        return self.scope_stack[-1]
-
-    def declare_variable(self, node: VarDecl):
-        if node.name in self.current_scope():
-            raise SemanticError(f"Variável '{node.name}' já declarada neste escopo.")
-        self.current_scope()[node.name] = {"type": node.var_type, "is_const": node.is_const}
-
-    def declare_function(self, node: FuncDecl):
-        if node.name in self.current_scope():
-            raise SemanticError(f"Função '{node.name}' já declarada neste escopo.")
-        self.current_scope()[node.name] = {
-            "params": node.params,
-            "return_type": node.return_type
-        }
-
-    def lookup_variable(self, name):
-        for scope in reversed(self.scope_stack):
-            if name in scope and isinstance(scope[name], dict) and "type" in scope[name]:
-                return scope[name]["type"]
-        raise SemanticError(f"Variável '{name}' não declarada.")
-
-    def lookup_function(self, name):
-        for scope in reversed(self.scope_stack):
-            if name in scope and isinstance(scope[name], dict) and "params" in scope[name]:
-                return scope[name]
-        raise SemanticError(f"Função '{name}' não declarada.")
+        node.type = func_info.return_type
+        return node.type
+
+    def variable_type(self, node):
+        if node.symbol is None:
+            self.error(node, f"Variável '{node.name}' não declarada.")
+            return ERROR
+        return node.symbol.type
@@ -0,0 +1,246 @@
+# server.py
+
+# Servidor de compilação residente: mantém o compilador carregado e aquecido
+# e atende pedidos de vários clientes por um socket Unix, evitando o custo
+# de iniciar o Python a cada arquivo.
+#
+#   python server.py serve [--socket CAMINHO]
+#   python server.py compile ARQUIVO [-O] [--tokens]
+#   python server.py stats
+#   python server.py stop
+#
+# Protocolo: uma mensagem JSON por linha, nos dois sentidos. Pedidos:
+#   {"op": "compile", "source": "...", "optimize": false, "tokens": true}
+#     -> {"ok": true, "errors": N, "diagnostics": [...], "ir": "..." ou null,
+#         "tokens": [[tipo, valor, linha, coluna], ...]}
+#   {"op": "stats"}    -> contadores e percentis de latência (ms)
+#   {"op": "ping"}     -> {"ok": true}
+#   {"op": "shutdown"} -> {"ok": true}, e o servidor termina
+# Erros no pedido viram {"ok": false, "error": "..."}.
+#
+# A compilação roda na própria thread do laço de eventos: ela é curta e
+# limitada pela CPU (threads não ajudariam por causa do GIL); enquanto um
+# pedido compila, os outros esperam na fila do laço.
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import List
+
+
+def import_asyncio():
+    # O asyncio importa (via inspect) o módulo ast da biblioteca padrão, que
+    # o ast.py do compilador esconde: ele é carregado com o diretório do
+    # compilador fora do caminho, e depois o nosso volta a ser o "ast"
+    here = os.path.dirname(os.path.abspath(__file__))
+    path = sys.path[:]
+    ours = sys.modules.pop('ast', None)
+    sys.path[:] = [entry for entry in path if os.path.abspath(entry or os.curdir) != here]
+    try:
+        import asyncio
+    finally:
+        sys.path[:] = path
+        sys.modules.pop('ast', None)
+        if ours is not None:
+            sys.modules['ast'] = ours
+    return asyncio
+
+
+asyncio = import_asyncio()
+
+from batch import compile_source
+from diagnostics import Diagnostic
+
+# Linha máxima aceita (código-fonte inteiro vai numa linha)
+MAX_MESSAGE = 16 * 1024 * 1024
+# Quantas latências recentes entram nos percentis
+LATENCY_WINDOW = 10_000
+PERCENTILES = (50, 90, 99)
+
+WARMUP_SOURCE = """
+fun f(x : Int) : Int { return x * 2; }
+val i : Int = 0;
+while (i < 3) { print(f(i)); i = i + 1; }
+"""
+
+
+def default_socket() -> str:
+    return os.path.join(tempfile.gettempdir(), f"compilador-{os.getuid()}.sock")
+
+
+def percentile(ordered: List[float], percent: float) -> float:
+    # Método do posto mais próximo sobre uma lista já ordenada
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+class CompileServer:
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.time()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # segundos, só de compile
+        self.requests = 0
+        self.failures = 0
+        self.clients = 0
+        self.server = None
+        self.stopping = None
+
+    def compile(self, request: dict) -> dict:
+        source = request.get("source")
+        if not isinstance(source, str):
+            raise ValueError("o campo 'source' deve ser uma string")
+        outputs, artifacts = compile_source(source, bool(request.get("optimize")))
+        diagnostics = outputs["diagnostics"]
+        response = {
+            "ok": True,
+            "errors": len(diagnostics.errors),
+            "diagnostics": json.loads(diagnostics.to_json())["diagnostics"],
+            "ir": outputs["ir"],
+            "instructions": outputs["instructions"],
+        }
+        if request.get("tokens", True):
+            response["tokens"] = [[token.type, token.value, token.line, token.column]
+                                  for token in artifacts["tokens"]]
+        return response
+
+    def stats(self) -> dict:
+        ordered = sorted(self.latencies)
+        latency = {f"p{percent}": round(percentile(ordered, percent) * 1000, 3) for percent in PERCENTILES}
+        latency["max"] = round(ordered[-1] * 1000, 3) if ordered else 0.0
+        latency["mean"] = round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0
+        return {
+            "ok": True,
+            "uptime": round(time.time() - self.started, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "clients": self.clients,
+            "compiles": len(ordered),
+            "latency_ms": latency,
+        }
+
+    def handle(self, request) -> dict:
+        if not isinstance(request, dict):
+            raise ValueError("o pedido deve ser um objeto JSON")
+        op = request.get("op")
+        if op == "compile":
+            start = time.perf_counter()
+            response = self.compile(request)
+            self.latencies.append(time.perf_counter() - start)
+            return response
+        if op == "stats":
+            return self.stats()
+        if op == "ping":
+            return {"ok": True}
+        if op == "shutdown":
+            self.stopping.set()
+            return {"ok": True}
+        raise ValueError(f"operação desconhecida: {op!r}")
+
+    async def client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Uma conexão pode mandar vários pedidos, respondidos em ordem
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # linha maior que MAX_MESSAGE
+                    response = {"ok": False, "error": "mensagem grande demais"}
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    break
+                if not line:
+                    break
+                self.requests += 1
+                try:
+                    response = self.handle(json.loads(line))
+                except Exception as error:  # o servidor continua atendendo os outros
+                    self.failures += 1
+                    response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+                writer.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # cliente desconectado, ou servidor encerrando com a conexão aberta
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def serve(self):
+        compile_source(WARMUP_SOURCE, True)  # importações e caches prontos antes do primeiro pedido
+        if os.path.exists(self.path):
+            os.remove(self.path)  # socket de um servidor anterior
+        self.stopping = asyncio.Event()
+        self.server = await asyncio.start_unix_server(self.client, path=self.path, limit=MAX_MESSAGE)
+        print(f"Servidor de compilação em {self.path}", file=sys.stderr)
+        try:
+            async with self.server:
+                await self.stopping.wait()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def request(path: str, message: dict) -> dict:
+    # Cliente síncrono: um pedido, uma resposta
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps(message).encode() + b"\n")
+        with connection.makefile('rb') as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("o servidor fechou a conexão sem responder")
+    return json.loads(line)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Servidor de compilação residente (socket Unix).")
+    arg_parser.add_argument('--socket', default=default_socket(), help="caminho do socket (padrão: %(default)s)")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('serve', help="inicia o servidor")
+    compile_parser = commands.add_parser('compile', help="compila um arquivo no servidor")
+    compile_parser.add_argument('arquivo')
+    compile_parser.add_argument('-O', '--optimize', action='store_true')
+    compile_parser.add_argument('--tokens', action='store_true', help="mostra também os tokens")
+    commands.add_parser('stats', help="estatísticas do servidor, em JSON")
+    commands.add_parser('stop', help="encerra o servidor")
+    args = arg_parser.parse_args(argv)
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(CompileServer(args.socket).serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command == 'compile':
+        with open(args.arquivo, 'r') as file:
+            source = file.read()
+    try:
+        if args.command == 'compile':
+            response = request(args.socket, {"op": "compile", "source": source, "optimize": args.optimize,
+                                             "tokens": args.tokens})
+            if not response.get("ok"):
+                print(f"Erro do servidor: {response.get('error')}", file=sys.stderr)
+                return 1
+            for token in response.get("tokens", ()):
+                print(token)
+            for diagnostic in response["diagnostics"]:
+                print(Diagnostic(**diagnostic), file=sys.stderr)
+            if response["ir"] is not None:
+                print(response["ir"], end="")
+            return 1 if response["errors"] else 0
+        response = request(args.socket, {"op": "stats" if args.command == 'stats' else "shutdown"})
+        if args.command == 'stats':
+            print(json.dumps(response, indent=2))
+        return 0
+    except (ConnectionError, FileNotFoundError) as error:
+        print(f"Sem conexão com o servidor em {args.socket}: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
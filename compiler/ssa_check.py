@@ -0,0 +1,97 @@
+# ssa_check.py
+
+# Verifica a ida e volta da SSA (cfg.to_ssa seguido de cfg.from_ssa) em
+# programas gerados por program_generator.py: cada programa roda na máquina
+# virtual antes e depois da conversão, sem e com as otimizações de -O, e as
+# saídas devem ser iguais. Sem nada entre as duas conversões, as cópias dos
+# phis voltam a ser `x = x` e somem; por isso cada programa é verificado
+# também com uma propagação de constantes feita sobre a SSA, que deixa
+# operandos diferentes nos phis. Uso: python ssa_check.py [--programs N] [--seed N]
+#
+# O código de saída é 1 se algum programa divergir.
+
+import argparse
+import io
+import random
+import sys
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from code_generator import CodeGenerator
+from batch import optimize
+from ir import COPY, Var
+from cfg import ControlFlowGraph, rename_operands, ssa_round_trip
+from bytecode import compile_module
+from vm import run
+from program_generator import generate_program
+
+# Instruções executadas por programa: os laços gerados são curtos, mas as
+# chamadas dentro deles se multiplicam
+BUDGET = 2_000_000
+
+
+def execute(module) -> str:
+    out = io.StringIO()
+    try:
+        run(compile_module(module), BUDGET, out)
+    except Exception as error:  # VMError, ou código quebrado pela conversão
+        out.write(f"<{type(error).__name__}: {error}>")
+    return out.getvalue()
+
+
+def propagate_constants(cfg: ControlFlowGraph):
+    # Remove `x.n = constante` e troca as leituras de x.n (inclusive nos
+    # phis) pela constante; só é correto porque x.n tem uma única definição
+    constants = {}
+    for block in cfg.blocks:
+        kept = []
+        for instruction in block.instructions:
+            if instruction.op == COPY and instruction.dest in cfg.versions and type(instruction.a) in (int, bool):
+                constants[instruction.dest] = instruction.a
+            else:
+                kept.append(instruction)
+        block.instructions[:] = kept
+    replace = lambda operand: constants.get(operand, operand) if type(operand) is Var else operand
+    for block in cfg.blocks:
+        for instruction in block.instructions:
+            rename_operands(instruction, replace)
+        for phi in block.phis:
+            for predecessor, operand in phi.operands.items():
+                phi.operands[predecessor] = replace(operand)
+
+
+def check(code: str, optimize_code: bool, transform=None) -> bool:
+    ast = Parser(Lexer(code).token_stream()).parse()
+    SemanticAnalyzer().analyze(ast)
+    expected = CodeGenerator().generate(ast)
+    module = CodeGenerator().generate(ast)
+    if optimize_code:
+        optimize(expected)
+        optimize(module)
+    for function in module.all_functions():
+        ssa_round_trip(module, function, transform)
+    return execute(expected) == execute(module)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Ida e volta da SSA em programas gerados.")
+    arg_parser.add_argument('--programs', type=int, default=200, help="programas verificados (padrão: %(default)s)")
+    arg_parser.add_argument('--seed', type=int, default=0, help="semente do primeiro programa")
+    args = arg_parser.parse_args(argv)
+    failures = 0
+    for seed in range(args.seed, args.seed + args.programs):
+        rng = random.Random(seed)
+        code = generate_program(seed, functions=rng.randint(0, 5), depth=rng.randint(0, 4),
+                                expression_depth=rng.randint(1, 4), statements=rng.randint(1, 4))
+        for optimize_code in (False, True):
+            for transform in (None, propagate_constants):
+                if not check(code, optimize_code, transform):
+                    failures += 1
+                    print(f"DIVERGIU: semente {seed}{' com -O' if optimize_code else ''}"
+                          f"{' com propagação' if transform else ''}")
+    print(f"{args.programs} programas, {failures} divergências.")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# stats.py
+
+# Estatísticas de uma compilação, para main.py --stats: tempo e pico de
+# memória de cada fase, contadores (tokens, nós da AST por classe, escopos,
+# temporários...) e, opcionalmente, o perfil (cProfile) de uma única fase.
+# Tudo sai num único objeto JSON.
+#
+# Desligado, o driver usa DISABLED, cujo phase() devolve sempre o mesmo
+# contexto vazio: o custo é uma chamada por fase, e nada é contado. Ligado,
+# a memória é medida com tracemalloc, que deixa as fases várias vezes mais
+# lentas; os tempos servem para comparar as fases entre si.
+
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+from parser import ASTNode
+from incremental import node_fields
+
+# Fases na ordem em que o driver as executa
+PHASES = ("lexer", "parser", "semantic", "optimize", "codegen", "backend", "run")
+
+# Funções listadas no resumo do perfil
+PROFILE_LIMIT = 25
+
+
+class DisabledStats:
+    enabled = False
+
+    def phase(self, name: str):
+        return NO_PHASE
+
+
+NO_PHASE = nullcontext()
+DISABLED = DisabledStats()
+
+
+class CompilationStats:
+    enabled = True
+
+    def __init__(self, memory: bool = True, profile_phase: Optional[str] = None):
+        self.memory = memory
+        self.profile_phase = profile_phase
+        self.profiler: Optional[cProfile.Profile] = None
+        self.phases: Dict[str, dict] = {}
+        self.counts: Dict[str, object] = {}
+        self.started = time.perf_counter()
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str):
+        # Uma fase executada mais de uma vez (ex.: as passadas de -O antes e
+        # depois da geração de código) soma os tempos e guarda o maior pico.
+        # O pico é medido a partir da memória em uso no início da fase.
+        memory = tracemalloc.is_tracing()
+        if memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        profiler = None
+        if name == self.profile_phase:
+            profiler = self.profiler = self.profiler or cProfile.Profile()
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+            entry = self.phases.setdefault(name, {"seconds": 0.0})
+            entry["seconds"] += elapsed
+            if memory:
+                current, peak = tracemalloc.get_traced_memory()
+                entry["peak_bytes"] = max(entry.get("peak_bytes", 0), peak - before)
+                entry["retained_bytes"] = entry.get("retained_bytes", 0) + current - before
+
+    def count(self, name: str, value):
+        self.counts[name] = value
+
+    def to_dict(self, **extra) -> dict:
+        result = dict(extra)
+        result["total_seconds"] = time.perf_counter() - self.started
+        result["phases"] = {name: self.phases[name] for name in PHASES if name in self.phases}
+        result["counts"] = self.counts
+        if self.profiler is not None:
+            result["profile"] = {"phase": self.profile_phase, "functions": profile_summary(self.profiler)}
+        return result
+
+    def to_json(self, **extra) -> str:
+        return json.dumps(self.to_dict(**extra), indent=2)
+
+
+def ast_node_counts(root: ASTNode) -> Dict[str, int]:
+    # Nós da AST por classe, em ordem decrescente
+    counts = Counter()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        counts[type(node).__name__] += 1
+        for value in node_fields(node):
+            if isinstance(value, ASTNode):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(item for item in value if isinstance(item, ASTNode))
+    return dict(counts.most_common())
+
+
+def profile_summary(profiler: cProfile.Profile, limit: int = PROFILE_LIMIT) -> List[dict]:
+    # As funções com mais tempo próprio, lidas direto do profiler (o módulo
+    # pstats não é importável daqui: ele passa pelo módulo ast da biblioteca
+    # padrão, escondido pelo ast.py do compilador)
+    rows = []
+    for entry in profiler.getstats():
+        code = entry.code
+        if isinstance(code, str):
+            function = code  # função embutida, ex.: "<built-in method builtins.len>"
+        else:
+            function = f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+        rows.append({
+            "function": function,
+            "calls": entry.callcount,
+            "own_seconds": entry.inlinetime,
+            "cumulative_seconds": entry.totaltime,
+        })
+    rows.sort(key=lambda row: row["own_seconds"], reverse=True)
+    return rows[:limit]
@@ -0,0 +1,120 @@
+# symbols.py
+
+from typing import Dict, List, Optional
+from type_system import Type, type_named
+
+class Symbol:
+    # Entrada da tabela de símbolos. `depth` é a profundidade do escopo em que
+    # o nome foi declarado (0 = global) e `slot` a posição na área de
+    # variáveis do quadro (`frame`) ao qual ele pertence: o da função que o
+    # declara, ou o quadro global (None) fora de funções. `type` e
+    # `return_type` são Types internos (comparáveis por identidade).
+    __slots__ = (
+        "name", "type", "is_const", "is_function", "params", "return_type",
+        "depth", "slot", "frame", "frame_size", "node",
+    )
+
+    def __init__(self, name: str, depth: int, slot: int, frame: Optional["Symbol"], type: str = None,
+                 is_const: bool = False, is_function: bool = False, params=None, return_type: str = None,
+                 node=None):
+        self.name = name
+        self.type: Optional[Type] = type_named(type)
+        self.is_const = is_const
+        self.is_function = is_function
+        self.params = params
+        self.return_type: Optional[Type] = type_named(return_type)
+        self.depth = depth
+        self.slot = slot
+        self.frame = frame
+        self.frame_size = 0  # apenas funções: quantidade de slots do seu quadro
+        self.node = node
+
+    def __repr__(self):
+        return f"Symbol(name='{self.name}', depth={self.depth}, slot={self.slot})"
+
+
+class Scope:
+    # Nó da árvore de escopos: o escopo global é a raiz, e cada função
+    # (parâmetros) e bloco acrescenta um filho ao escopo em que aparece.
+    __slots__ = ("parent", "depth", "symbols", "frame", "children")
+
+    def __init__(self, parent: Optional["Scope"], frame: Optional[Symbol]):
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.symbols: Dict[str, Symbol] = {}
+        self.frame = frame
+        self.children: List["Scope"] = []
+        if parent is not None:
+            parent.children.append(self)
+
+
+class SymbolTable:
+    # Estado de escopo compartilhado pelo Parser (que resolve os nomes enquanto
+    # constrói a AST) e pelo Resolver (que resolve uma AST construída de outra
+    # forma, ex.: a partir de uma ASTArena). Variáveis e funções dividem o
+    # escopo, mas a busca de uma variável ignora funções e vice-versa.
+    def __init__(self):
+        self.root = Scope(None, None)
+        self.scope = self.root
+        self.global_frame_size = 0
+        # Para cada nome, a pilha de símbolos visíveis (o mais interno no
+        # topo), separada por tipo: a busca não precisa percorrer os escopos.
+        self.variables: Dict[str, list] = {}
+        self.functions: Dict[str, list] = {}
+        # Contadores do trabalho de escopo, para medição
+        self.scopes_entered = 0
+        self.lookups = 0
+
+    def enter_scope(self, frame: Optional[Symbol] = None) -> Scope:
+        self.scopes_entered += 1
+        self.scope = Scope(self.scope, frame if frame is not None else self.scope.frame)
+        return self.scope
+
+    def exit_scope(self):
+        for name, symbol in self.scope.symbols.items():
+            self.bindings(symbol)[name].pop()
+        self.scope = self.scope.parent
+
+    def unwind(self, scope: Scope):
+        # Sai de todos os escopos abertos acima de `scope` (recuperação de erro)
+        while self.scope is not scope:
+            self.exit_scope()
+
+    def bindings(self, symbol: Symbol) -> Dict[str, list]:
+        return self.functions if symbol.is_function else self.variables
+
+    def bind(self, symbol: Symbol):
+        symbols = self.scope.symbols
+        previous = symbols.get(symbol.name)
+        if previous is not None:  # parâmetro repetido substitui o anterior
+            self.bindings(previous)[symbol.name].pop()
+        symbols[symbol.name] = symbol
+        self.bindings(symbol).setdefault(symbol.name, []).append(symbol)
+
+    def is_declared(self, name: str) -> bool:
+        return name in self.scope.symbols
+
+    def new_slot(self) -> int:
+        frame = self.scope.frame
+        if frame is None:
+            self.global_frame_size += 1
+            return self.global_frame_size - 1
+        frame.frame_size += 1
+        return frame.frame_size - 1
+
+    def declare_variable(self, name: str, type: str, is_const: bool = False, node=None) -> Symbol:
+        symbol = Symbol(name, self.scope.depth, self.new_slot(), self.scope.frame,
+                        type=type, is_const=is_const, node=node)
+        self.bind(symbol)
+        return symbol
+
+    def function_symbol(self, name: str, params, return_type: str, node=None) -> Symbol:
+        # Cria o símbolo da função sem registrá-lo: o chamador decide se ele é
+        # visível (não é, numa redeclaração), mas o quadro existe de qualquer forma.
+        return Symbol(name, self.scope.depth, -1, self.scope.frame, is_function=True,
+                      params=params, return_type=return_type, node=node)
+
+    def lookup(self, name: str, is_function: bool) -> Optional[Symbol]:
+        self.lookups += 1
+        visible = (self.functions if is_function else self.variables).get(name)
+        return visible[-1] if visible else None
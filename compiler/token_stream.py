@@ -0,0 +1,142 @@
+# token_stream.py
+
+from array import array
+from collections import deque
+from typing import Iterable, Iterator
+from Token import Token, TOKEN_TYPES, TOKEN_KIND
+
+EOF_KIND = TOKEN_KIND["EOF"]
+
+
+def kind_set(*types: str) -> frozenset:
+    # Conjunto de tipos aceito por match(), já convertido para TOKEN_KIND;
+    # quem chama o calcula uma vez, e a comparação fica entre inteiros
+    return frozenset(TOKEN_KIND[type] for type in types)
+
+
+class TokenBuffer:
+    # Consome tokens de qualquer iterável (lista ou gerador) mantendo apenas
+    # uma pequena janela: os próximos tokens já lidos e os últimos consumidos.
+    # Depois do último token, peek() devolve sempre o mesmo token EOF.
+    def __init__(self, tokens: Iterable[Token], history: int = 2):
+        self.source = iter(tokens)
+        self.ahead = deque()
+        self.behind = deque(maxlen=history)
+        self.current = 0  # quantidade de tokens já consumidos
+        self.eof = None
+
+    def peek(self, offset: int = 0) -> Token:
+        ahead = self.ahead
+        while offset >= len(ahead):
+            if self.eof is not None:
+                return self.eof
+            token = next(self.source, None)
+            if token is None:
+                last = ahead[-1] if ahead else self.behind[-1] if self.behind else None
+                self.eof = Token("EOF", "", last.line if last else 1)
+                return self.eof
+            ahead.append(token)
+        return ahead[offset]
+
+    def kind(self, offset: int = 0) -> int:
+        return TOKEN_KIND[self.peek(offset).type]
+
+    def check(self, type: str, offset: int = 0) -> bool:
+        return self.peek(offset).type == type
+
+    def match(self, kinds: frozenset) -> bool:
+        if TOKEN_KIND[self.peek().type] in kinds:
+            self.behind.append(self.ahead.popleft())
+            self.current += 1
+            return True
+        return False
+
+    def is_at_end(self) -> bool:
+        return self.peek().type == "EOF"
+
+    def advance(self) -> Token:
+        if self.peek().type != "EOF":
+            self.behind.append(self.ahead.popleft())
+            self.current += 1
+        return self.previous()
+
+    def previous(self, steps: int = 1) -> Token:
+        return self.behind[-steps]
+
+
+class TokenStream:
+    # Representação compacta da lista de tokens: o tipo de cada token é um
+    # inteiro pequeno (TOKEN_KIND) e as posições ficam em arrays paralelos.
+    # O valor só é recortado do código-fonte quando alguém pede o Token.
+    # O último registro é sempre o sentinela EOF (ver finish()), que não conta
+    # em len() nem aparece na iteração.
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.lines = array("I")
+        self.line_starts = array("I", [0])  # deslocamento do início de cada linha
+        self.current = 0
+        self.last = None  # último Token materializado, reaproveitado por previous()
+
+    def append(self, kind: int, start: int, end: int, line: int):
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def finish(self):
+        # O EOF fica logo após o último token, na mesma linha dele
+        line = self.lines[-1] if self.lines else 1
+        end = self.ends[-1] if self.ends else 0
+        self.append(EOF_KIND, end, end, line)
+
+    def __len__(self) -> int:
+        return len(self.kinds) - 1
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.kinds) - 1):
+            yield self.token(index)
+
+    def token(self, index: int) -> Token:
+        last = self.last
+        if last is not None and last[0] == index:
+            return last[1]
+        start = self.starts[index]
+        line = self.lines[index]
+        line_starts = self.line_starts
+        column = start - line_starts[line - 1] + 1 if line <= len(line_starts) else None
+        token = Token(TOKEN_TYPES[self.kinds[index]], self.source[start:self.ends[index]], line, column)
+        self.last = (index, token)
+        return token
+
+    def value(self, index: int) -> str:
+        return self.source[self.starts[index]:self.ends[index]]
+
+    # Mesma interface de cursor usada pelo Parser com o TokenBuffer
+    def peek(self, offset: int = 0) -> Token:
+        return self.token(min(self.current + offset, len(self.kinds) - 1))
+
+    def kind(self, offset: int = 0) -> int:
+        return self.kinds[min(self.current + offset, len(self.kinds) - 1)]
+
+    def check(self, type: str, offset: int = 0) -> bool:
+        return self.kind(offset) == TOKEN_KIND[type]
+
+    def match(self, kinds: frozenset) -> bool:
+        if self.kinds[self.current] in kinds:
+            self.current += 1
+            return True
+        return False
+
+    def is_at_end(self) -> bool:
+        return self.kinds[self.current] == EOF_KIND
+
+    def advance(self) -> Token:
+        if self.kinds[self.current] != EOF_KIND:
+            self.current += 1
+        return self.previous()
+
+    def previous(self, steps: int = 1) -> Token:
+        return self.token(self.current - steps)
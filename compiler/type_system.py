@@ -0,0 +1,41 @@
+# type_system.py
+
+from typing import Dict, Optional
+
+class Type:
+    # Tipos são únicos por nome: comparar tipos é comparar identidade, e o
+    # texto (usado nas mensagens de erro) continua sendo o nome original.
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"Type({self.name})"
+
+
+TYPES: Dict[str, Type] = {}
+
+
+def type_named(name: Optional[str]) -> Optional[Type]:
+    # Aceita o nome usado na AST ("INT", "BOOL", "Unit") ou um Type já interno
+    if name is None or isinstance(name, Type):
+        return name
+    result = TYPES.get(name)
+    if result is None:
+        result = TYPES[name] = Type(name)
+    return result
+
+
+INT = type_named("INT")
+BOOL = type_named("BOOL")
+UNIT = type_named("Unit")
+# Tipo de uma expressão cujo erro já foi reportado: comparações que o
+# envolvem não geram novos erros.
+ERROR = type_named("Error")
+
+ARITHMETIC_OPERATORS = frozenset(("PLUS", "MINUS", "MULTIPLY", "DIVIDE"))
+RELATIONAL_OPERATORS = frozenset(("EQUAL", "DIFFERENT", "GREATER", "GREATER_OR_EQUAL", "LESS", "LESS_OR_EQUAL"))
@@ -0,0 +1,167 @@
+# vm.py
+
+import sys
+from typing import TextIO
+from bytecode import (
+    Bytecode,
+    MOVE, ADD, SUB, MUL, DIV, EQ, NE, LT, LE, GT, GE, NEG, NOT, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE,
+    LOAD_GLOBAL, STORE_GLOBAL, LOAD_OUTER, STORE_OUTER, CALL, RETURN, PRINT, HALT,
+)
+from operations import INT_MIN, INT_MAX, wrap_int, divide
+
+DEFAULT_BUDGET = 50_000_000
+MAX_CALL_DEPTH = 10_000
+
+
+class VMError(Exception):
+    pass
+
+
+def format_value(value) -> str:
+    # Mesma representação do println de Kotlin
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return "kotlin.Unit"
+    return str(value)
+
+
+class VM:
+    # Executa um Bytecode. O orçamento limita o número de instruções
+    # executadas, para que laços infinitos terminem com um VMError.
+    #
+    # O laço de despacho não conta instrução por instrução: entre duas
+    # transferências de controle a execução é linear, então basta somar o
+    # tamanho do trecho (pc - start) a cada desvio, chamada ou retorno.
+    def __init__(self, bytecode: Bytecode, budget: int = DEFAULT_BUDGET, out: TextIO = None):
+        self.bytecode = bytecode
+        self.budget = budget
+        self.out = out or sys.stdout
+        self.executed = 0
+
+    def run(self) -> int:
+        # Devolve o número de instruções executadas
+        output = []
+        try:
+            self.execute(output)
+        finally:
+            if output:
+                self.out.write("\n".join(output) + "\n")
+        return self.executed
+
+    def budget_exceeded(self):
+        return VMError(f"Limite de {self.budget} instruções excedido.")
+
+    def execute(self, output: list):
+        functions = self.bytecode.functions
+        call_sites = self.bytecode.call_sites
+        budget = self.budget
+        append = output.append
+        main = self.bytecode.main
+        code = main.code
+        regs = globals_ = list(main.template)
+        stack = []
+        pc = start = executed = 0
+        try:
+            while True:
+                op, x, y, z = code[pc]
+                pc += 1
+                if op == MOVE:
+                    regs[x] = regs[y]
+                elif op == ADD:
+                    value = regs[y] + regs[z]
+                    regs[x] = value if INT_MIN <= value <= INT_MAX else wrap_int(value)
+                elif op == JUMP_IF_FALSE:
+                    if not regs[x]:
+                        executed += pc - start
+                        if executed > budget:
+                            raise self.budget_exceeded()
+                        pc = start = y
+                elif op == JUMP:
+                    executed += pc - start
+                    if executed > budget:
+                        raise self.budget_exceeded()
+                    pc = start = x
+                elif op == LT:
+                    regs[x] = regs[y] < regs[z]
+                elif op == SUB:
+                    value = regs[y] - regs[z]
+                    regs[x] = value if INT_MIN <= value <= INT_MAX else wrap_int(value)
+                elif op == MUL:
+                    value = regs[y] * regs[z]
+                    regs[x] = value if INT_MIN <= value <= INT_MAX else wrap_int(value)
+                elif op == EQ:
+                    regs[x] = regs[y] == regs[z]
+                elif op == LE:
+                    regs[x] = regs[y] <= regs[z]
+                elif op == GT:
+                    regs[x] = regs[y] > regs[z]
+                elif op == GE:
+                    regs[x] = regs[y] >= regs[z]
+                elif op == NE:
+                    regs[x] = regs[y] != regs[z]
+                elif op == JUMP_IF_TRUE:
+                    if regs[x]:
+                        executed += pc - start
+                        if executed > budget:
+                            raise self.budget_exceeded()
+                        pc = start = y
+                elif op == LOAD_GLOBAL:
+                    regs[x] = globals_[y]
+                elif op == STORE_GLOBAL:
+                    globals_[x] = regs[y]
+                elif op == CALL:
+                    executed += pc - start
+                    if executed > budget:
+                        raise self.budget_exceeded()
+                    callee = functions[y]
+                    args, hops = call_sites[z]
+                    frame = list(callee.template)
+                    link = regs
+                    for _ in range(hops):
+                        link = link[0]
+                    frame[0] = link
+                    for param, arg in zip(callee.params, args):
+                        frame[param] = regs[arg]
+                    stack.append((code, pc, regs, x))
+                    if len(stack) > MAX_CALL_DEPTH:
+                        raise VMError("Estouro da pilha de chamadas.")
+                    code, regs = callee.code, frame
+                    pc = start = 0
+                elif op == RETURN:
+                    executed += pc - start
+                    value = regs[x]
+                    code, pc, regs, dest = stack.pop()
+                    regs[dest] = value
+                    start = pc
+                elif op == DIV:
+                    if regs[z] == 0:
+                        raise VMError("Divisão por zero.")
+                    regs[x] = divide(regs[y], regs[z])
+                elif op == NEG:
+                    regs[x] = wrap_int(-regs[y])
+                elif op == NOT:
+                    regs[x] = not regs[y]
+                elif op == PRINT:
+                    append(format_value(regs[x]))
+                elif op == LOAD_OUTER:
+                    frame = regs
+                    for _ in range(y):
+                        frame = frame[0]
+                    regs[x] = frame[z]
+                elif op == STORE_OUTER:
+                    frame = regs
+                    for _ in range(x):
+                        frame = frame[0]
+                    frame[y] = regs[z]
+                elif op == HALT:
+                    executed += pc - start
+                    break
+        finally:
+            self.executed = executed
+
+
+def run(bytecode: Bytecode, budget: int = DEFAULT_BUDGET, out: TextIO = None) -> int:
+    return VM(bytecode, budget, out).run()